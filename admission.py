@@ -0,0 +1,184 @@
+"""
+Admission control for expensive work.
+
+Each kind of work (transcription, OCR, conversion) passes through a gate
+that lets a fixed number of requests run at once and a bounded number wait
+for their turn, first come first served. A request that finds the gate full
+is rejected at once with an estimated wait instead of piling onto the CPU
+and memory already in use.
+
+Every request carries a cost in the gate's unit (seconds of audio, pages)
+once it is known. The gate keeps a moving average of the processing time
+per unit it has observed, so the estimated wait is the queued and remaining
+running work divided over the concurrent slots.
+
+Gates are per process; combine_stats() sums up the same gate across the
+server's worker processes for reporting.
+"""
+
+import math
+import threading
+import time
+
+
+class Overloaded(Exception):
+    """Raised when a gate has no room; retry_after is the estimated wait in seconds"""
+
+    def __init__(self, gate, retry_after):
+        super().__init__(f"Server is busy with {gate} requests, try again in {retry_after} seconds")
+        self.gate = gate
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """
+    A request's place at a gate.
+
+    Use it as a context manager around the work: entering waits for a free
+    slot and leaving releases it. release() may be called at any time and
+    more than once, e.g. to give up a place that was never used.
+    """
+
+    def __init__(self, gate, cost=None):
+        self.gate = gate
+        self.cost = cost
+        self.admitted_at = time.time()
+        self.started_at = None
+        self.released = False
+
+    def set_cost(self, units):
+        """Set the size of the work in the gate's unit, once it is known"""
+        with self.gate._cond:
+            self.cost = units
+
+    def wait(self):
+        """Block until this ticket may run"""
+        self.gate._start(self)
+
+    def release(self):
+        self.gate._release(self)
+
+    def __enter__(self):
+        self.wait()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdmissionGate:
+    """Concurrency limit and bounded wait queue for one kind of work"""
+
+    def __init__(self, name, max_concurrent=2, max_queued=8, unit='request', default_cost=1.0,
+                 default_seconds_per_unit=1.0, smoothing=0.2):
+        self.name = name
+        self.max_concurrent = max(1, max_concurrent)
+        self.max_queued = max(0, max_queued)
+        self.unit = unit
+        self.smoothing = smoothing
+        # Moving averages, seeded with the defaults until work has been observed
+        self.seconds_per_unit = default_seconds_per_unit
+        self.typical_cost = default_cost
+        self.admitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self._waiting = []
+        self._running = []
+        self._cond = threading.Condition()
+
+    def admit(self, cost=None, reject=True):
+        """
+        Return a Ticket for new work, waiting to start.
+
+        Raises Overloaded when every slot and queue place is taken, unless
+        reject is False (work that has already been accepted elsewhere, such
+        as queued background jobs, waits regardless).
+        """
+        with self._cond:
+            if reject and len(self._running) + len(self._waiting) >= self.max_concurrent + self.max_queued:
+                self.rejected += 1
+                raise Overloaded(self.name, self._retry_after())
+            ticket = Ticket(self, cost)
+            self._waiting.append(ticket)
+            self.admitted += 1
+            return ticket
+
+    def retry_after(self, extra=0):
+        """Whole seconds until queued work is likely to be done, counting `extra` more requests"""
+        with self._cond:
+            return self._retry_after(extra)
+
+    def _retry_after(self, extra=0):
+        return max(1, math.ceil(self._estimated_wait(extra)))
+
+    def _estimated_wait(self, extra=0):
+        # Caller holds self._cond
+        now = time.time()
+        work = sum(max(0.0, self._cost(ticket) * self.seconds_per_unit - (now - ticket.started_at))
+                   for ticket in self._running)
+        work += sum(self._cost(ticket) * self.seconds_per_unit for ticket in self._waiting)
+        work += extra * self.typical_cost * self.seconds_per_unit
+        return work / self.max_concurrent
+
+    def _cost(self, ticket):
+        return self.typical_cost if ticket.cost is None else ticket.cost
+
+    def _start(self, ticket):
+        with self._cond:
+            if ticket.released or ticket.started_at is not None:
+                return
+            while not (self._waiting[0] is ticket and len(self._running) < self.max_concurrent):
+                self._cond.wait()
+            self._waiting.pop(0)
+            self._running.append(ticket)
+            ticket.started_at = time.time()
+
+    def _release(self, ticket):
+        with self._cond:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.started_at is None:
+                self._waiting.remove(ticket)
+            else:
+                self._running.remove(ticket)
+                self.completed += 1
+                elapsed = time.time() - ticket.started_at
+                if ticket.cost:
+                    self.seconds_per_unit += self.smoothing * (elapsed / ticket.cost - self.seconds_per_unit)
+                    self.typical_cost += self.smoothing * (ticket.cost - self.typical_cost)
+            self._cond.notify_all()
+
+    def stats(self):
+        """Return limits, current load and the estimated wait for new work"""
+        with self._cond:
+            return {
+                'unit': self.unit,
+                'max_concurrent': self.max_concurrent,
+                'max_queued': self.max_queued,
+                'running': len(self._running),
+                'queued': len(self._waiting),
+                'available': max(0, self.max_concurrent + self.max_queued
+                                 - len(self._running) - len(self._waiting)),
+                'seconds_per_unit': round(self.seconds_per_unit, 3),
+                'estimated_wait': round(self._estimated_wait(), 1),
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'completed': self.completed
+            }
+
+
+def combine_stats(per_process):
+    """
+    Combine stats() of the same gate in several processes: limits, load and
+    counters are added up, and the estimated wait is the longest of them.
+    """
+    per_process = list(per_process)
+    combined = dict(per_process[0])
+    for key in ('max_concurrent', 'max_queued', 'running', 'queued', 'available',
+                'admitted', 'rejected', 'completed'):
+        combined[key] = sum(stats[key] for stats in per_process)
+    combined['seconds_per_unit'] = round(sum(stats['seconds_per_unit'] for stats in per_process)
+                                         / len(per_process), 3)
+    combined['estimated_wait'] = max(stats['estimated_wait'] for stats in per_process)
+    return combined
@@ -1,99 +1,42 @@
+# First, so the startup time it reports covers every other import
+from capabilities import Capabilities, CapabilityUnavailable, installed
 import os
 import tempfile
-import subprocess
 import shutil
 import time
-import re
-from flask import Flask, request, jsonify, send_file, render_template
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from flask import Flask, Response, g, request, jsonify, send_file, render_template, stream_with_context
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
-import whisper
-from werkzeug.utils import secure_filename
 import mimetypes
+from admission import AdmissionGate, Overloaded, combine_stats
+from jobs import JobQueue, JobQueueFull
+from model_registry import ModelRegistry
+from inference import InferenceEngine, transcribe
+from audio_decode import SAMPLE_RATE, decode_audio, detect_ffmpeg, real_time_factor
+from long_audio import iter_transcribe_segments, transcribe_long_audio
+from result_cache import ResultCache, cache_key
+from artifacts import ArtifactStore
+from ingest import IngestRequest, ingest_upload
+from batch import ZipStream, expand_archives, make_names_unique
+from pdf_text import parse_page_ranges
+import metrics
+from metrics import Counter, Gauge, Histogram, MultiProcessCollector
+from transcript_output import (
+    OUTPUT_FORMATS, compact_segments, format_transcription_with_sentences, parse_formats,
+    sentence_text, text_segments, write_transcript
+)
 
-# Optional imports for document conversion and OCR
-try:
-    from docx import Document
-    from docx.shared import Inches
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-
-try:
-    from pypdf import PdfReader, PdfWriter
-    PDF_AVAILABLE = True
-except ImportError:
-    try:
-        from PyPDF2 import PdfReader, PdfWriter
-        PDF_AVAILABLE = True
-    except ImportError:
-        PDF_AVAILABLE = False
-
-try:
-    from pdf2docx import Converter
-    PDF2DOCX_AVAILABLE = True
-except ImportError:
-    PDF2DOCX_AVAILABLE = False
-
-try:
-    from openpyxl import load_workbook, Workbook
-    EXCEL_AVAILABLE = True
-except ImportError:
-    EXCEL_AVAILABLE = False
-
-try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import SimpleDocTemplate, Paragraph
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
-
-try:
-    import pytesseract
-    from PIL import Image
-    OCR_AVAILABLE = True
-    
-    # Try to find Tesseract executable in common Windows locations
-    import os as os_module
-    tesseract_paths = [
-        r"C:\Program Files\Tesseract-OCR\tesseract.exe",
-        r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
-        r"C:\Users\{}\AppData\Local\Programs\Tesseract-OCR\tesseract.exe".format(os_module.getenv('USERNAME', '')),
-    ]
-    
-    # Check if tesseract is in PATH
-    tesseract_found = False
-    if shutil.which('tesseract'):
-        tesseract_found = True
-    else:
-        # Try common installation paths
-        for path in tesseract_paths:
-            if os_module.path.exists(path):
-                pytesseract.pytesseract.tesseract_cmd = path
-                tesseract_found = True
-                print(f"Found Tesseract at: {path}")
-                break
-    
-    if not tesseract_found:
-        print("Warning: Tesseract OCR not found in PATH or common locations.")
-        print("OCR functionality may not work. Please install Tesseract OCR.")
-        print("Download from: https://github.com/UB-Mannheim/tesseract/wiki")
-        
-except ImportError:
-    OCR_AVAILABLE = False
+# Document converters; each library is optional
+from converters import (
+    DOCX_AVAILABLE, EXCEL_AVAILABLE, PDF2DOCX_AVAILABLE, PDF_AVAILABLE, REPORTLAB_AVAILABLE,
+    conversion_routes, convert_file
+)
 
-try:
-    from pdf2image import convert_from_path
-    PDF2IMAGE_AVAILABLE = True
-except ImportError:
-    PDF2IMAGE_AVAILABLE = False
-
-try:
-    from deep_translator import GoogleTranslator
-    TRANSLATION_AVAILABLE = True
-except ImportError:
-    TRANSLATION_AVAILABLE = False
+from ocr_engine import OcrEngine
+from translation import LANGUAGE_CODES, TranslationMemory, Translator, load_backend
 
 app = Flask(__name__)
 CORS(app)
@@ -112,107 +55,330 @@ ALLOWED_IMAGE_EXTENSIONS = {
 }
 ALLOWED_EXTENSIONS = ALLOWED_AUDIO_EXTENSIONS | ALLOWED_DOCUMENT_EXTENSIONS | ALLOWED_IMAGE_EXTENSIONS
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+# Requests larger than this are rejected from Content-Length before any body is read
+app.config['MAX_CONTENT_LENGTH'] = MAX_FILE_SIZE + 1024 * 1024  # file plus form fields
+# Batch requests carry many files, each still limited to MAX_FILE_SIZE
+BATCH_MAX_CONTENT_LENGTH = int(os.environ.get('BATCH_MAX_TOTAL_MB', '2048')) * 1024 * 1024
+
+class UploadRequest(IngestRequest):
+    """Streams uploaded files into UPLOAD_FOLDER, aborting past MAX_FILE_SIZE"""
+    upload_folder = UPLOAD_FOLDER
+    max_file_size = MAX_FILE_SIZE
+    
+    @property
+    def max_content_length(self):
+        if self.path == '/batch':
+            return BATCH_MAX_CONTENT_LENGTH
+        return super().max_content_length
+
+app.request_class = UploadRequest
+
+# Results are cached by upload content and parameters so repeat uploads return instantly
+RESULT_CACHE_DIR = os.environ.get('RESULT_CACHE_DIR', os.path.join('cache', 'results'))
+RESULT_CACHE_MAX_MB = int(os.environ.get('RESULT_CACHE_MAX_MB', '1024'))
+RESULT_CACHE_ENABLED = os.environ.get('RESULT_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+# Result files served by the download endpoints, under unique IDs
+ARTIFACT_DIR = os.environ.get('ARTIFACT_DIR', 'artifacts')
+ARTIFACT_MAX_MB = int(os.environ.get('ARTIFACT_MAX_MB', '5120'))
+ARTIFACT_TTL = int(os.environ.get('ARTIFACT_TTL', '86400'))  # seconds
+ARTIFACT_SWEEP_INTERVAL = int(os.environ.get('ARTIFACT_SWEEP_INTERVAL', '300'))  # seconds
+
+# Batch requests (POST /batch) fan items out across this many threads
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', '4'))
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', '200'))
+BATCH_OPERATIONS = ('auto', 'transcribe', 'ocr', 'convert')
+# Capability each batch operation needs
+BATCH_CAPABILITIES = {'transcribe': 'transcription', 'ocr': 'ocr', 'convert': 'conversion'}
+# Response fields copied into each batch manifest entry
+BATCH_MANIFEST_FIELDS = ('language', 'model', 'audio_duration', 'real_time_factor', 'target_language',
+                         'mode', 'pages', 'cached')
+
+# Translation backend ('google' or 'module:attribute' for a custom one), worker
+# threads and the SQLite translation memory that remembers translated lines
+TRANSLATION_BACKEND = os.environ.get('TRANSLATION_BACKEND', 'google')
+TRANSLATION_WORKERS = int(os.environ.get('TRANSLATION_WORKERS', '4'))
+TRANSLATION_CHUNK_CHARS = int(os.environ.get('TRANSLATION_CHUNK_CHARS', '4500'))
+TRANSLATION_MEMORY_PATH = os.environ.get('TRANSLATION_MEMORY_PATH',
+                                         os.path.join('cache', 'translation_memory.sqlite3'))
+
+# Capabilities this process offers ("all", or e.g. "ocr,conversion" for
+# workers without torch). Their libraries are found without importing
+# them and imported on first use.
+CAPABILITIES_PROFILE = os.environ.get('CAPABILITIES', 'all')
+capabilities = Capabilities(CAPABILITIES_PROFILE, required={
+    # Custom translation backends bring their own library
+    'translation': ('deep_translator',) if TRANSLATION_BACKEND == 'google' else ()
+})
+
+# OCR needs pytesseract and Pillow; PDFs are rendered with pdf2image
+OCR_AVAILABLE = capabilities.available('ocr')
+PDF2IMAGE_AVAILABLE = installed('pdf2image')
+
+# File name suffixes for saved translations
+LANGUAGE_FILE_NAMES = {'fr': 'french', 'es': 'spanish', 'de': 'german', 'nl': 'dutch', 'en': 'english'}
+
+# Background transcription jobs (POST /upload with async=true)
+TRANSCRIPTION_WORKERS = int(os.environ.get('TRANSCRIPTION_WORKERS', '2'))
+MAX_QUEUED_JOBS = int(os.environ.get('MAX_QUEUED_JOBS', '100'))
+JOB_RESULT_TTL = int(os.environ.get('JOB_RESULT_TTL', '3600'))  # seconds
+# Hosts job callbacks may be sent to; empty allows any host with only public addresses
+CALLBACK_ALLOWED_HOSTS = os.environ.get('CALLBACK_ALLOWED_HOSTS', '').split(',')
+# Snapshots of each server process's metrics and load; unset for a single process
+METRICS_DIR = os.environ.get('METRICS_DIR')
+
+# Shared by all server processes so a job can be polled through any of them
+JOB_STATE_DIR = os.environ.get('JOB_STATE_DIR', os.path.join('cache', 'jobs'))
+
+# Admission control: how many of each kind of work run at once and how many
+# may wait; requests beyond that are rejected with 429 and a Retry-After.
+# Gates are per process, so the defaults split server-wide totals over the
+# server processes (WEB_CONCURRENCY, set by gunicorn.conf.py). A model
+# transcribes one file at a time (see inference.py), so by default each
+# process runs one transcription.
+SERVER_PROCESSES = max(1, int(os.environ.get('WEB_CONCURRENCY', '1')))
+
+def per_process(total):
+    return str(max(1, -(-total // SERVER_PROCESSES)))
+
+TRANSCRIBE_MAX_CONCURRENT = int(os.environ.get('TRANSCRIBE_MAX_CONCURRENT', '1'))
+TRANSCRIBE_MAX_QUEUED = int(os.environ.get('TRANSCRIBE_MAX_QUEUED', per_process(8)))
+OCR_MAX_CONCURRENT = int(os.environ.get('OCR_MAX_CONCURRENT', per_process(2)))
+OCR_MAX_QUEUED = int(os.environ.get('OCR_MAX_QUEUED', per_process(8)))
+CONVERT_MAX_CONCURRENT = int(os.environ.get('CONVERT_MAX_CONCURRENT', per_process(4)))
+CONVERT_MAX_QUEUED = int(os.environ.get('CONVERT_MAX_QUEUED', per_process(16)))
 
 # Ensure upload directory exists
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
-os.makedirs('transcriptions', exist_ok=True)
-os.makedirs('conversions', exist_ok=True)
-os.makedirs('ocr_results', exist_ok=True)
-
-# Load Whisper model (base model for good balance of speed and accuracy)
-# You can change this to 'tiny', 'small', 'medium', or 'large' based on your needs
-model = None
-
-def check_ffmpeg():
-    """Check if FFmpeg is installed and available"""
-    ffmpeg_path = shutil.which('ffmpeg')
-    if ffmpeg_path is None:
-        return False, None
+
+# Prometheus metrics served by /metrics
+HTTP_REQUESTS = Counter('http_requests_total', 'HTTP requests by endpoint and status code',
+                        ['endpoint', 'status'])
+HTTP_ERRORS = Counter('http_request_errors_total', 'HTTP requests answered with a 4xx or 5xx status',
+                      ['endpoint'])
+HTTP_DURATION = Histogram('http_request_duration_seconds',
+                          'Request handling time, including streamed response bodies', ['endpoint'])
+HTTP_IN_FLIGHT = Gauge('http_requests_in_flight', 'Requests being handled', ['endpoint'])
+UPLOADS = Counter('uploads_total', 'Uploaded files by endpoint and file format', ['endpoint', 'format'])
+UPLOAD_BYTES = Counter('upload_bytes_total', 'Uploaded bytes by endpoint and file format',
+                       ['endpoint', 'format'])
+STAGE_DURATION = Histogram('stage_duration_seconds',
+                           'Time spent in each processing stage (upload_write, decode, model_load, '
+                           'transcribe, format, translate, ocr_page, ocr, convert)', ['stage'])
+CONVERTER_DURATION = Histogram('converter_duration_seconds', 'Time per converter step', ['converter'])
+WORK_IN_PROGRESS = Gauge('work_in_progress', 'Transcriptions, OCR runs and conversions being processed',
+                         ['kind'])
+REAL_TIME_FACTOR = Histogram('transcription_real_time_factor',
+                             'Transcription seconds per second of audio', ['model'],
+                             buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 3, 5))
+AUDIO_SECONDS = Counter('transcribed_audio_seconds_total', 'Seconds of audio transcribed', ['model'])
+ADMISSION_REJECTED = Counter('admission_rejected_total', 'Requests rejected with 429 by each admission gate',
+                             ['gate'])
+
+# Long-lived Tesseract workers shared by all OCR requests
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', str(os.cpu_count() or 1)))
+OCR_LANG = os.environ.get('OCR_LANG', 'eng')
+OCR_PSM = int(os.environ.get('OCR_PSM', '3'))
+OCR_ENGINE = os.environ.get('OCR_ENGINE', 'auto').lower()
+OCR_BATCH_PAGES = int(os.environ.get('OCR_BATCH_PAGES', '8'))
+OCR_DPI = int(os.environ.get('OCR_DPI', '200'))
+OCR_MAX_DPI = 600
+# In hybrid mode, PDF pages with fewer text-layer characters than this are OCR'd
+HYBRID_MIN_TEXT_CHARS = int(os.environ.get('HYBRID_MIN_TEXT_CHARS', '50'))
+OCR_MODES = ('ocr', 'hybrid')
+# Image formats passed to Tesseract as they are
+OCR_ENGINE_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'tiff', 'tif', 'bmp'}
+
+def record_ocr_pages(count, seconds):
+    # Pages recognised together are timed together; each counts as its share
+    for _ in range(count):
+        STAGE_DURATION.observe(seconds / count, stage='ocr_page')
+
+def find_tesseract():
+    """Path of the Tesseract executable, from PATH or a common Windows location"""
+    path = shutil.which('tesseract')
+    if path:
+        return path
+    tesseract_paths = [
+        r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+        r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+        r"C:\Users\{}\AppData\Local\Programs\Tesseract-OCR\tesseract.exe".format(os.getenv('USERNAME', '')),
+    ]
+    for path in tesseract_paths:
+        if os.path.exists(path):
+            print(f"Found Tesseract at: {path}")
+            return path
+    print("Warning: Tesseract OCR not found in PATH or common locations.")
+    print("OCR functionality may not work. Please install Tesseract OCR.")
+    print("Download from: https://github.com/UB-Mannheim/tesseract/wiki")
+    return None
+
+# Created on first use, so processes that never OCR never look for Tesseract
+ocr_engine = None
+ocr_engine_lock = threading.Lock()
+
+def get_ocr_engine():
+    """Return the shared OCR engine, locating Tesseract the first time"""
+    global ocr_engine
+    with ocr_engine_lock:
+        if ocr_engine is None:
+            ocr_engine = OcrEngine(
+                lang=OCR_LANG,
+                psm=OCR_PSM,
+                workers=OCR_WORKERS,
+                backend=OCR_ENGINE,
+                batch_pages=OCR_BATCH_PAGES,
+                tesseract_cmd=find_tesseract(),
+                on_pages=record_ocr_pages
+            )
+        return ocr_engine
+
+# PDF to TXT conversions of at least this many pages are split across worker processes
+PDF_TEXT_WORKERS = int(os.environ.get('PDF_TEXT_WORKERS', str(os.cpu_count() or 1)))
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', '64'))
+
+# Workbooks with several sheets are converted across this many worker processes
+SPREADSHEET_WORKERS = int(os.environ.get('SPREADSHEET_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Long recordings are split on silences and transcribed in parallel worker processes
+LONG_AUDIO_WORKERS = int(os.environ.get('LONG_AUDIO_WORKERS', '2'))
+LONG_AUDIO_CHUNK_SECONDS = int(os.environ.get('LONG_AUDIO_CHUNK_SECONDS', '300'))
+LONG_AUDIO_MIN_SECONDS = int(os.environ.get('LONG_AUDIO_MIN_SECONDS', '600'))  # used when long_audio=auto
+
+# Window length for /upload-stream; shorter windows mean earlier first text
+STREAM_WINDOW_SECONDS = int(os.environ.get('STREAM_WINDOW_SECONDS', '30'))
+
+# Whisper models (base model for good balance of speed and accuracy)
+# Clients can pick any of WHISPER_ALLOWED_MODELS per request with the 'model' field
+WHISPER_MODEL = os.environ.get('WHISPER_MODEL', 'base')
+WHISPER_ALLOWED_MODELS = os.environ.get('WHISPER_ALLOWED_MODELS', 'tiny,base,small,medium').split(',')
+WHISPER_PRELOAD_MODELS = os.environ.get('WHISPER_PRELOAD_MODELS', WHISPER_MODEL).split(',')
+WHISPER_MODEL_MEMORY_MB = float(os.environ.get('WHISPER_MODEL_MEMORY_MB', '0'))  # 0 = no limit
+
+# CPU inference: int8 quantises the models' linear layers. Thread counts of 0 keep torch's
+# defaults; under Gunicorn TORCH_THREADS defaults to CPUs / workers (see gunicorn.conf.py)
+WHISPER_DEVICE = os.environ.get('WHISPER_DEVICE', 'auto')
+WHISPER_PRECISION = os.environ.get('WHISPER_PRECISION', 'fp32')
+TORCH_THREADS = int(os.environ.get('TORCH_THREADS', '0'))
+TORCH_INTEROP_THREADS = int(os.environ.get('TORCH_INTEROP_THREADS', '0'))
+
+inference_engine = InferenceEngine(
+    device=WHISPER_DEVICE,
+    precision=WHISPER_PRECISION,
+    threads=TORCH_THREADS,
+    interop_threads=TORCH_INTEROP_THREADS
+)
+
+model_registry = ModelRegistry(
+    default_model=WHISPER_MODEL,
+    allowed_models=[name.strip() for name in WHISPER_ALLOWED_MODELS if name.strip()],
+    memory_budget_mb=WHISPER_MODEL_MEMORY_MB,
+    engine=inference_engine
+)
+
+result_cache = ResultCache(
+    directory=RESULT_CACHE_DIR,
+    max_bytes=RESULT_CACHE_MAX_MB * 1024 * 1024,
+    enabled=RESULT_CACHE_ENABLED
+)
+
+artifact_store = ArtifactStore(
+    directory=ARTIFACT_DIR,
+    max_bytes=ARTIFACT_MAX_MB * 1024 * 1024,
+    default_ttl=ARTIFACT_TTL,
+    sweep_interval=ARTIFACT_SWEEP_INTERVAL
+)
+
+transcription_jobs = JobQueue(
+    worker_count=TRANSCRIPTION_WORKERS,
+    max_queued=MAX_QUEUED_JOBS,
+    job_ttl=JOB_RESULT_TTL,
+    state_dir=JOB_STATE_DIR,
+    callback_allowed_hosts=CALLBACK_ALLOWED_HOSTS
+)
+
+Gauge('transcription_jobs', 'Background transcription jobs by status', ['status'],
+      callback=lambda: {(status,): count for status, count in transcription_jobs.stats().items()
+                        if status != 'workers'})
+Gauge('whisper_models_loaded', 'Whisper models resident in memory (1) or evicted (0)', ['model'],
+      callback=lambda: {(name,): int(stats['loaded'])
+                        for name, stats in model_registry.stats()['models'].items()})
+Gauge('whisper_models_memory_mb', 'Parameter memory of resident Whisper models',
+      callback=lambda: model_registry.stats()['resident_memory_mb'])
+# Every process reads the same store, so processes are not added up
+Gauge('artifact_store_size_mb', 'Size of stored result files',
+      callback=lambda: artifact_store.stats()['size_mb'], aggregate='max')
+
+# Costs are seconds of audio, pages and documents; the defaults seed the
+# throughput estimates until real work has been timed
+transcription_gate = AdmissionGate('transcription', TRANSCRIBE_MAX_CONCURRENT, TRANSCRIBE_MAX_QUEUED,
+                                   unit='audio_second', default_cost=120, default_seconds_per_unit=0.5)
+ocr_gate = AdmissionGate('ocr', OCR_MAX_CONCURRENT, OCR_MAX_QUEUED,
+                         unit='page', default_cost=4, default_seconds_per_unit=2)
+conversion_gate = AdmissionGate('conversion', CONVERT_MAX_CONCURRENT, CONVERT_MAX_QUEUED,
+                                unit='document', default_cost=1, default_seconds_per_unit=5)
+ADMISSION_GATES = (transcription_gate, ocr_gate, conversion_gate)
+
+Gauge('admission_requests', 'Requests running or waiting at each admission gate', ['gate', 'state'],
+      callback=lambda: {(gate.name, state): stats[state] for gate in ADMISSION_GATES
+                        for stats in [gate.stats()] for state in ('running', 'queued')})
+Gauge('admission_estimated_wait_seconds', 'Estimated wait for new work at each admission gate', ['gate'],
+      callback=lambda: {(gate.name,): gate.stats()['estimated_wait'] for gate in ADMISSION_GATES},
+      aggregate='max')
+
+def process_status():
+    """Load of this process, shared with the other server processes through METRICS_DIR"""
+    return {
+        'gates': {gate.name: gate.stats() for gate in ADMISSION_GATES},
+        'jobs': transcription_jobs.stats(),
+        'models': model_registry.stats()
+    }
+
+# Each Gunicorn worker writes its metrics and load to METRICS_DIR (see
+# gunicorn.conf.py), so /metrics, /ready and /models answer for all workers
+process_metrics = MultiProcessCollector(METRICS_DIR, status=process_status) if METRICS_DIR else None
+
+def worker_statuses():
+    """{pid: process_status()} of every running server process"""
+    if process_metrics is None:
+        return {str(os.getpid()): process_status()}
+    return process_metrics.statuses()
+
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+translator = None
+TRANSLATION_AVAILABLE = False
+if capabilities.enabled('translation'):
     try:
-        # Try to get version to verify it works
-        result = subprocess.run(['ffmpeg', '-version'], 
-                              capture_output=True, 
-                              timeout=5,
-                              text=True)
-        if result.returncode == 0:
-            return True, ffmpeg_path
-    except (subprocess.TimeoutExpired, FileNotFoundError, Exception):
-        pass
-    return False, None
-
-def load_model():
-    global model
-    if model is None:
-        print("Loading Whisper model... This may take a moment.")
-        load_start = time.time()
-        model = whisper.load_model("base")
-        load_end = time.time()
-        load_time = load_end - load_start
-        print(f"Model loaded successfully! (took {load_time:.2f} seconds)")
-        return model, load_time
-    return model, 0
-
-def format_transcription_with_sentences(text):
-    """
-    Format transcription text with sentences on separate lines.
-    Splits on sentence endings (. ! ?) followed by space and capital letter.
-    """
-    if not text:
-        return text
-    
-    # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text.strip())
-    
-    # Split on sentence endings: . ! ? followed by space and capital letter
-    pattern = r'([.!?])\s+([A-Z])'
-    parts = re.split(pattern, text)
-    
-    if len(parts) == 1:
-        # No sentence endings found, return as is
-        return text
-    
-    # Reconstruct sentences
-    formatted_lines = []
-    i = 0
-    
-    while i < len(parts):
-        if i == 0:
-            # First sentence (before any split)
-            if parts[i].strip():
-                formatted_lines.append(parts[i].strip())
-        elif i + 1 < len(parts):
-            # We have: punctuation, space, next sentence start
-            punctuation = parts[i]  # . ! or ?
-            next_sentence_start = parts[i + 1]  # Capital letter + rest
-            
-            # Complete previous sentence with punctuation
-            if formatted_lines:
-                formatted_lines[-1] += punctuation
-            else:
-                formatted_lines.append(punctuation)
-            
-            # Start new sentence
-            if next_sentence_start.strip():
-                formatted_lines.append(next_sentence_start.strip())
-            
-            i += 1  # Skip next part as we processed it
-        else:
-            # Remaining text
-            if parts[i].strip():
-                if formatted_lines:
-                    formatted_lines[-1] += " " + parts[i].strip()
-                else:
-                    formatted_lines.append(parts[i].strip())
-        
-        i += 1
-    
-    # Join with newlines
-    result = '\n'.join(line.strip() for line in formatted_lines if line.strip())
-    
-    # Clean up excessive newlines
-    result = re.sub(r'\n{3,}', '\n\n', result)
-    
-    return result
+        translator = Translator(
+            load_backend(TRANSLATION_BACKEND),
+            memory=TranslationMemory(TRANSLATION_MEMORY_PATH),
+            workers=TRANSLATION_WORKERS,
+            max_chunk_chars=TRANSLATION_CHUNK_CHARS
+        )
+        TRANSLATION_AVAILABLE = True
+    except Exception as e:
+        print(f"Translation unavailable: {str(e)}")
+
+def check_ffmpeg(refresh=False):
+    """Check if FFmpeg is installed and available (probed once, then cached)"""
+    return detect_ffmpeg(refresh)
+
+def load_model(model_name=None):
+    """Get a Whisper model from the registry, returning (model, load_time)"""
+    capabilities.load('transcription')
+    inference_engine.configure_threads()
+    return model_registry.get(model_name)
+
+def preload_models():
+    """Load and warm up the configured models in the background, if this process transcribes"""
+    if not capabilities.available('transcription'):
+        return None
+    names = [name.strip() for name in WHISPER_PRELOAD_MODELS if name.strip()]
+    thread = threading.Thread(target=model_registry.preload, args=(names,),
+                              daemon=True, name='model-preload')
+    thread.start()
+    return thread
 
 def allowed_file(filename, extension_set=None):
     if extension_set is None:
@@ -224,141 +390,120 @@ def get_file_extension(filename):
     """Get file extension without dot"""
     return filename.rsplit('.', 1)[1].lower() if '.' in filename else ''
 
-def convert_docx_to_txt(filepath):
-    """Convert DOCX to TXT"""
-    if not DOCX_AVAILABLE:
-        raise Exception("python-docx library not available")
-    
-    doc = Document(filepath)
-    text = []
-    for paragraph in doc.paragraphs:
-        text.append(paragraph.text)
-    return '\n'.join(text)
-
-def convert_docx_to_pdf(filepath, output_path):
-    """Convert DOCX to PDF"""
-    if not DOCX_AVAILABLE or not REPORTLAB_AVAILABLE:
-        raise Exception("Required libraries not available (python-docx or reportlab)")
-    
-    doc = Document(filepath)
-    pdf = SimpleDocTemplate(output_path, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    for paragraph in doc.paragraphs:
-        if paragraph.text.strip():
-            p = Paragraph(paragraph.text, styles['Normal'])
-            story.append(p)
-    
-    pdf.build(story)
-    return output_path
-
-def convert_pdf_to_txt(filepath):
-    """Convert PDF to TXT"""
-    if not PDF_AVAILABLE:
-        raise Exception("pypdf library not available")
-    
-    reader = PdfReader(filepath)
-    text = []
-    for page in reader.pages:
-        text.append(page.extract_text())
-    return '\n'.join(text)
-
-def convert_pdf_to_docx(filepath, output_path):
-    """Convert PDF to DOCX"""
-    if not PDF2DOCX_AVAILABLE:
-        raise Exception("pdf2docx library not available")
-    
-    cv = Converter(filepath)
-    cv.convert(output_path)
-    cv.close()
-    return output_path
-
-def convert_txt_to_pdf(filepath, output_path):
-    """Convert TXT to PDF"""
-    if not REPORTLAB_AVAILABLE:
-        raise Exception("reportlab library not available")
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        text = f.read()
-    
-    pdf = SimpleDocTemplate(output_path, pagesize=letter)
-    styles = getSampleStyleSheet()
-    story = []
-    
-    for line in text.split('\n'):
-        if line.strip():
-            p = Paragraph(line, styles['Normal'])
-            story.append(p)
-    
-    pdf.build(story)
-    return output_path
-
-def convert_txt_to_docx(filepath, output_path):
-    """Convert TXT to DOCX"""
-    if not DOCX_AVAILABLE:
-        raise Exception("python-docx library not available")
-    
-    with open(filepath, 'r', encoding='utf-8') as f:
-        text = f.read()
-    
-    doc = Document()
-    for line in text.split('\n'):
-        if line.strip():
-            doc.add_paragraph(line)
-    
-    doc.save(output_path)
-    return output_path
-
-def convert_excel_to_txt(filepath):
-    """Convert Excel to TXT"""
-    if not EXCEL_AVAILABLE:
-        raise Exception("openpyxl library not available")
-    
-    wb = load_workbook(filepath)
-    text_lines = []
-    
-    for sheet_name in wb.sheetnames:
-        text_lines.append(f"Sheet: {sheet_name}")
-        ws = wb[sheet_name]
-        for row in ws.iter_rows(values_only=True):
-            row_text = '\t'.join(str(cell) if cell is not None else '' for cell in row)
-            if row_text.strip():
-                text_lines.append(row_text)
-        text_lines.append('')
-    
-    return '\n'.join(text_lines)
-
-def perform_ocr(filepath):
-    """Perform OCR on image or PDF file"""
-    if not OCR_AVAILABLE:
-        raise Exception("pytesseract library not available")
+def capability_error(name):
+    """A 503 response if this process cannot do a capability's work, else None"""
+    try:
+        capabilities.check(name)
+    except CapabilityUnavailable as e:
+        return jsonify({'error': str(e)}), 503
+    return None
+
+def admit_request(gate):
+    """
+    Take a place at an admission gate for the current request.
+    
+    Returns (ticket, None), or (None, 429 response) when the gate is full.
+    Tickets still held when the request ends are released then.
+    """
+    try:
+        ticket = gate.admit()
+    except Overloaded as e:
+        ADMISSION_REJECTED.inc(gate=gate.name)
+        return None, overloaded_response(str(e), e.retry_after)
+    g.setdefault('admission_tickets', []).append(ticket)
+    return ticket, None
+
+def overloaded_response(message, retry_after):
+    response = jsonify({'error': message, 'retry_after': retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def ocr_page_total(filepath, pages=None):
+    """Pages an OCR run will process: the selected PDF pages, or 1 for an image"""
+    if get_file_extension(filepath) == 'pdf' and PDF2IMAGE_AVAILABLE:
+        from ocr_pages import pdf_page_count
+        return len(parse_page_ranges(pages, pdf_page_count(filepath)))
+    return 1
+
+def perform_ocr(filepath, pages=None, dpi=None, output=None, format_page=None,
+                mode='ocr', page_stats=None):
+    """
+    Perform OCR on image or PDF file.
+    
+    Images and PDF pages are recognised by the shared OCR engine, with PDF
+    pages rendered in short batches across its workers; pages selects which
+    ones (e.g. "1-3,5"). In 'hybrid' mode only PDF pages without a usable
+    text layer are OCR'd and the rest use their embedded text. Each page's
+    text goes through format_page if given and, when output is an open text
+    file, is written to it in page order as soon as it is ready. Page counts
+    per method are stored in page_stats if given. Returns the full text.
+    """
+    capabilities.load('ocr')
+    engine = get_ocr_engine()
     
     ext = get_file_extension(filepath)
     text_parts = []
     
+    def add_part(text):
+        if output is not None:
+            if text_parts:
+                output.write('\n\n')
+            output.write(text)
+            output.flush()
+        text_parts.append(text)
+    
     if ext == 'pdf':
         if not PDF2IMAGE_AVAILABLE:
             raise Exception("pdf2image library not available for PDF OCR")
+        from ocr_pages import hybrid_pdf_text, ocr_pdf_pages, pdf_page_count
         
-        # Convert PDF pages to images
-        images = convert_from_path(filepath)
-        for i, image in enumerate(images):
-            text = pytesseract.image_to_string(image)
+        page_numbers = parse_page_ranges(pages, pdf_page_count(filepath))
+        
+        def add_page(page_number, text, method='ocr'):
             if text.strip():
-                text_parts.append(f"--- Page {i+1} ---\n{text}")
+                if format_page:
+                    text = format_page(text)
+                add_part(f"--- Page {page_number} ---\n{text}")
+        
+        if mode == 'hybrid':
+            counts = hybrid_pdf_text(filepath, page_numbers, engine, dpi=dpi or OCR_DPI,
+                                     min_chars=HYBRID_MIN_TEXT_CHARS, on_page=add_page)
+        else:
+            ocr_pdf_pages(filepath, page_numbers, engine, dpi=dpi or OCR_DPI, on_page=add_page)
+            counts = {'text_layer_pages': 0, 'ocr_pages': len(page_numbers)}
+        if page_stats is not None:
+            page_stats.update(counts)
     else:
         # Image file
-        image = Image.open(filepath)
-        text = pytesseract.image_to_string(image)
-        text_parts.append(text)
+        text = ocr_image(filepath)
+        if format_page:
+            text = format_page(text)
+        add_part(text)
     
     return '\n\n'.join(text_parts)
 
+def ocr_image(filepath):
+    """OCR one image file on the shared engine"""
+    engine = get_ocr_engine()
+    ext = get_file_extension(filepath)
+    if ext in OCR_ENGINE_IMAGE_EXTENSIONS:
+        return engine.submit(engine.image_to_string, filepath).result()
+    
+    # Formats Tesseract may not read itself are converted to PNG first
+    from PIL import Image
+    with tempfile.TemporaryDirectory(prefix='ocr-image-') as temp_dir:
+        png_path = os.path.join(temp_dir, 'image.png')
+        Image.open(filepath).save(png_path)
+        return engine.submit(engine.image_to_string, png_path).result()
+
 def translate_text(text, target_language='en'):
     """
     Translate text to target language.
     
+    Lines are translated in chunks on the translator's worker pool, and
+    lines seen before are taken from the translation memory.
+    
     Args:
         text: Text to translate
         target_language: Target language code (en, fr, es, de, nl)
@@ -372,27 +517,11 @@ def translate_text(text, target_language='en'):
     if not text or not text.strip():
         return text
     
-    # Language code mapping
-    language_map = {
-        'en': 'en',
-        'english': 'en',
-        'fr': 'fr',
-        'french': 'fr',
-        'es': 'es',
-        'spanish': 'es',
-        'de': 'de',
-        'german': 'de',
-        'nl': 'nl',
-        'dutch': 'nl'
-    }
-    
-    target_lang = language_map.get(target_language.lower(), 'en')
+    target_lang = LANGUAGE_CODES.get(target_language.lower(), 'en')
     
     try:
-        # Use Google Translator (free, no API key needed)
-        translator = GoogleTranslator(source='auto', target=target_lang)
-        translated_text = translator.translate(text)
-        return translated_text
+        capabilities.load('translation')
+        return translator.translate(text, target_lang)
     except Exception as e:
         raise Exception(f"Translation failed: {str(e)}")
 
@@ -404,20 +533,446 @@ def index():
 def health():
     return jsonify({'status': 'healthy'})
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
+@app.route('/ready', methods=['GET'])
+def ready():
+    """
+    Readiness: 200 while every admission gate can take more work, else 503,
+    with each gate's load summed over the server processes
+    """
+    workers = worker_statuses()
+    gates = {gate.name: combine_stats(status['gates'][gate.name] for status in workers.values())
+             for gate in ADMISSION_GATES}
+    jobs = {}
+    for status in workers.values():
+        for key, count in status['jobs'].items():
+            jobs[key] = jobs.get(key, 0) + count
+    accepting = all(stats['available'] > 0 for stats in gates.values())
+    return jsonify({
+        'ready': accepting,
+        'gates': gates,
+        'jobs': jobs,
+        'workers': {pid: status['gates'] for pid, status in workers.items()}
+    }), 200 if accepting else 503
+
+def transcription_segments(result, audio_duration=0):
+    """Timed segments of a Whisper result, or one untimed segment if it has none"""
+    if result.get('segments'):
+        return compact_segments(result['segments'])
+    return text_segments(result.get('text', ''), audio_duration)
+
+def save_transcript_outputs(segments, base_name, formats, language, audio_duration, text=None):
+    """
+    Write the requested output formats to the artifact store.
+    
+    text, if given, is the already built sentence-per-line transcript and
+    is saved as the txt output as is. Returns {format: file info}.
+    """
+    outputs = {}
+    for fmt in formats:
+        output_filename = f"{base_name}.{fmt}"
+        with artifact_store.create('transcription', output_filename) as artifact:
+            if fmt == 'txt' and text is not None:
+                with open(artifact.path, 'w', encoding='utf-8') as f:
+                    f.write(text)
+            else:
+                write_transcript(segments, fmt, artifact.path, language=language, duration=audio_duration)
+        outputs[fmt] = {
+            'filename': output_filename,
+            'artifact_id': artifact.id,
+            'download_url': f'/download/{artifact.id}'
+        }
+    return outputs
+
+def finish_transcription(result, filename, target_language, model_name, start_time,
+                         transcription_time, model_load_time, audio_duration, progress,
+                         formats=('txt',)):
+    """
+    Format, translate and save a Whisper result, returning the response data
+    shared by /upload, background jobs and the streaming summary event.
+    """
+    detected_language = result.get('language', 'unknown')
+    
+    # Build sentence lines straight from the segments
+    progress('formatting', 0.8)
+    format_start = time.time()
+    segments = transcription_segments(result, audio_duration)
+    formatted_text = sentence_text(segments)
+    format_time = time.time() - format_start
+    
+    # Translate if requested and translation is available
+    translated_text = None
+    translation_time = 0
+    translation_filename = None
+    translation_artifact = None
+    
+    if target_language and target_language != 'en' and TRANSLATION_AVAILABLE:
+        try:
+            progress('translating', 0.85)
+            translation_start = time.time()
+            translated_text = translate_text(formatted_text, target_language)
+            translated_text = format_transcription_with_sentences(translated_text)
+            translation_time = time.time() - translation_start
+            STAGE_DURATION.observe(translation_time, stage='translate')
+            
+            # Save translated version
+            base_name = os.path.splitext(filename)[0]
+            lang_name = LANGUAGE_FILE_NAMES.get(target_language, target_language)
+            translation_filename = f"{base_name}_{lang_name}.txt"
+            translation_artifact = artifact_store.write_text('transcription', translation_filename,
+                                                             translated_text)
+        except Exception as e:
+            print(f"Translation failed: {str(e)}")
+            translated_text = None
+    
+    # Save original transcription in every requested format; the plain
+    # text file is always written
+    progress('saving', 0.95)
+    base_name = os.path.splitext(filename)[0]
+    transcription_filename = base_name + '.txt'
+    save_start = time.time()
+    outputs = save_transcript_outputs(segments, base_name, ['txt'] + [f for f in formats if f != 'txt'],
+                                      detected_language, round(audio_duration, 2), text=formatted_text)
+    STAGE_DURATION.observe(format_time + time.time() - save_start, stage='format')
+    
+    STAGE_DURATION.observe(transcription_time, stage='transcribe')
+    if model_load_time:
+        STAGE_DURATION.observe(model_load_time, stage='model_load')
+    if audio_duration > 0:
+        REAL_TIME_FACTOR.observe(transcription_time / audio_duration, model=model_name)
+        AUDIO_SECONDS.inc(audio_duration, model=model_name)
+    
+    # Calculate processing time
+    processing_time = time.time() - start_time
+    
+    response_data = {
+        'success': True,
+        'transcription': formatted_text,
+        'filename': transcription_filename,
+        'language': detected_language,
+        'model': model_name,
+        'artifact_id': outputs['txt']['artifact_id'],
+        'download_url': outputs['txt']['download_url'],
+        'processing_time': round(processing_time, 2),
+        'transcription_time': round(transcription_time, 2),
+        'model_load_time': round(model_load_time, 2),
+        'audio_duration': round(audio_duration, 2),
+        'real_time_factor': real_time_factor(transcription_time, audio_duration),
+        'outputs': outputs
+    }
+    
+    if 'chunks' in result:
+        response_data['chunks'] = result['chunks']
+    
+    # Add translation data if available
+    if translated_text:
+        response_data['translated_text'] = translated_text
+        response_data['translation_filename'] = translation_filename
+        response_data['translation_artifact_id'] = translation_artifact.id
+        response_data['translation_download_url'] = f'/download/{translation_artifact.id}'
+        response_data['translation_time'] = round(translation_time, 2)
+        response_data['target_language'] = target_language
+    
+    return response_data
+
+def translation_complete(response_data, target_language):
+    """Whether response data has the translation that was asked for, if any"""
+    return not target_language or target_language == 'en' or bool(response_data.get('translated_text'))
+
+def restore_cached_transcription(cached_data, filename, start_time, formats=('txt',)):
+    """
+    Rebuild /upload response data from a cached result, saving the cached
+    transcript under this upload's file names in the requested formats.
+    """
+    response_data = dict(cached_data)
+    segments = response_data.pop('segments', None) or text_segments(
+        cached_data['transcription'], cached_data.get('audio_duration'))
+    base_name = os.path.splitext(filename)[0]
+    
+    transcription_filename = base_name + '.txt'
+    response_data['outputs'] = save_transcript_outputs(
+        segments, base_name, ['txt'] + [f for f in formats if f != 'txt'],
+        cached_data.get('language'), cached_data.get('audio_duration'),
+        text=cached_data['transcription']
+    )
+    response_data['filename'] = transcription_filename
+    response_data['artifact_id'] = response_data['outputs']['txt']['artifact_id']
+    response_data['download_url'] = response_data['outputs']['txt']['download_url']
+    
+    if cached_data.get('translated_text'):
+        lang_name = LANGUAGE_FILE_NAMES.get(cached_data['target_language'], cached_data['target_language'])
+        translation_filename = f"{base_name}_{lang_name}.txt"
+        translation_artifact = artifact_store.write_text('transcription', translation_filename,
+                                                         cached_data['translated_text'])
+        response_data['translation_filename'] = translation_filename
+        response_data['translation_artifact_id'] = translation_artifact.id
+        response_data['translation_download_url'] = f'/download/{translation_artifact.id}'
+        response_data['translation_time'] = 0
+    
+    response_data['processing_time'] = round(time.time() - start_time, 2)
+    response_data['transcription_time'] = 0
+    response_data['model_load_time'] = 0
+    response_data['real_time_factor'] = 0
+    response_data['cached'] = True
+    return response_data
+
+def no_progress(stage, fraction=None):
+    pass
+
+def transcribe_upload(filepath, filename, target_language='en', model_name=None,
+                      long_audio='auto', result_key=None, progress=None, formats=('txt',),
+                      ticket=None):
+    """
+    Transcribe a saved upload, translate it if requested and save the results
+    in the requested output formats.
+    
+    long_audio is True to always use parallel chunked transcription, False to
+    never use it, or 'auto' to use it for recordings of at least
+    LONG_AUDIO_MIN_SECONDS.
+
+    The work waits for a slot at the transcription gate, using ticket if
+    the request was already admitted there.
+
+    Returns the response data for the upload, which is also stored in the
+    result cache under result_key if one is given. The uploaded file is
+    removed once processing finishes, whether or not it succeeded.
+    """
+    if progress is None:
+        progress = no_progress
+    if ticket is None:
+        ticket = transcription_gate.admit(reject=False)
+    
+    progress('waiting', 0.0)
+    ticket.wait()
+    WORK_IN_PROGRESS.inc(kind='transcription')
+    try:
+        # Start timing
+        start_time = time.time()
+        
+        # Decode once; the same samples feed either transcription path
+        progress('decoding', 0.02)
+        model_name = model_registry.resolve(model_name)
+        with STAGE_DURATION.time(stage='decode'):
+            audio = decode_audio(filepath)
+        audio_duration = len(audio) / SAMPLE_RATE
+        ticket.set_cost(audio_duration)
+        use_chunks = long_audio is True or (
+            long_audio == 'auto' and LONG_AUDIO_WORKERS > 1
+            and audio_duration >= LONG_AUDIO_MIN_SECONDS
+        )
+        
+        if use_chunks:
+            # Chunk workers load their own copy of the model
+            model_load_time = 0
+            print(f"Transcribing {filename} ({audio_duration:.0f}s) in chunks "
+                  f"with {LONG_AUDIO_WORKERS} workers and model '{model_name}'...")
+            progress('transcribing', 0.1)
+            transcription_start = time.time()
+            result = transcribe_long_audio(
+                audio,
+                model_name,
+                chunk_seconds=LONG_AUDIO_CHUNK_SECONDS,
+                workers=LONG_AUDIO_WORKERS,
+                progress=lambda done, total: progress('transcribing', 0.1 + 0.7 * done / total),
+                engine=inference_engine
+            )
+            transcription_end = time.time()
+        else:
+            # Load model and transcribe
+            progress('loading_model', 0.05)
+            whisper_model, model_load_time = load_model(model_name)
+            print(f"Transcribing {filename} with model '{model_name}'...")
+            
+            # Transcribe audio
+            progress('transcribing', 0.1)
+            transcription_start = time.time()
+            result = transcribe(
+                whisper_model,
+                audio,
+                language=None,  # Auto-detect language
+                task="transcribe"
+            )
+            transcription_end = time.time()
+        
+        response_data = finish_transcription(
+            result, filename, target_language, model_name, start_time,
+            transcription_end - transcription_start, model_load_time, audio_duration, progress,
+            formats
+        )
+        # A translation that failed (or is unavailable) is retried on the next
+        # upload instead of being served from the cache without it
+        if result_key and translation_complete(response_data, target_language):
+            # Segments are kept so a cache hit can produce any output format
+            result_cache.put(result_key, dict(response_data, segments=transcription_segments(result)))
+        return response_data
+    
+    finally:
+        ticket.release()
+        WORK_IN_PROGRESS.dec(kind='transcription')
+        # Clean up uploaded file
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+def stream_transcription(filepath, filename, target_language='en', model_name=None, result_key=None,
+                         formats=('txt',), ticket=None):
+    """
+    Transcribe a saved upload window by window, yielding (event, data) pairs.
+    
+    A 'start' event is followed by one 'segment' event per decoded segment
+    and a final 'summary' event carrying the same data as /upload returns.
+    Transcription starts once ticket (or a new place at the transcription
+    gate) gets a slot. The uploaded file is removed when the generator
+    finishes or is closed.
+    """
+    if ticket is None:
+        ticket = transcription_gate.admit(reject=False)
+    ticket.wait()
+    WORK_IN_PROGRESS.inc(kind='transcription')
+    try:
+        start_time = time.time()
+        model_name = model_registry.resolve(model_name)
+        with STAGE_DURATION.time(stage='decode'):
+            audio = decode_audio(filepath)
+        audio_duration = len(audio) / SAMPLE_RATE
+        ticket.set_cost(audio_duration)
+        whisper_model, model_load_time = load_model(model_name)
+        yield 'start', {
+            'filename': filename,
+            'model': model_name,
+            'audio_duration': round(audio_duration, 2),
+            'model_load_time': round(model_load_time, 2)
+        }
+        
+        transcription_start = time.time()
+        texts = []
+        segments = []
+        language = None
+        for segment, language in iter_transcribe_segments(whisper_model, audio,
+                                                          window_seconds=STREAM_WINDOW_SECONDS):
+            texts.append(segment['text'])
+            segments.append(segment)
+            yield 'segment', {
+                'id': segment['id'],
+                'start': segment['start'],
+                'end': segment['end'],
+                'text': segment['text'].strip(),
+                'language': language,
+                'elapsed': round(time.time() - start_time, 2)
+            }
+        transcription_time = time.time() - transcription_start
+        
+        result = {'text': ''.join(texts), 'segments': segments, 'language': language or 'unknown'}
+        response_data = finish_transcription(
+            result, filename, target_language, model_name, start_time,
+            transcription_time, model_load_time, audio_duration, no_progress, formats
+        )
+        if result_key and translation_complete(response_data, target_language):
+            result_cache.put(result_key, dict(response_data, segments=transcription_segments(result)))
+        yield 'summary', response_data
+    
+    finally:
+        ticket.release()
+        WORK_IN_PROGRESS.dec(kind='transcription')
+        if os.path.exists(filepath):
+            os.remove(filepath)
+
+def format_sse(event, data):
+    """Format one Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def receive_upload(check_extension=True):
+    """
+    Validate the 'file' field of the current request and take ownership of it.
+    
+    Returns (upload, None) on success or (None, error response) on failure.
+    The upload lives at a unique path in UPLOAD_FOLDER; upload.filename is
+    the sanitised original name used for result files.
+    """
     if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
+        return None, (jsonify({'error': 'No file provided'}), 400)
     
     file = request.files['file']
     
     if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+        return None, (jsonify({'error': 'No file selected'}), 400)
     
-    if not allowed_file(file.filename):
-        return jsonify({
+    if check_extension and not allowed_file(file.filename):
+        return None, (jsonify({
             'error': f'File type not allowed. Supported formats: {", ".join(ALLOWED_EXTENSIONS)}'
-        }), 400
+        }), 400)
+    
+    upload = ingest_upload(file, UPLOAD_FOLDER, MAX_FILE_SIZE)
+    stats = upload.stats()
+    # Labels are limited to known formats so clients cannot create new series
+    upload_format = get_file_extension(upload.filename) or 'none'
+    if upload_format not in ALLOWED_EXTENSIONS and upload_format != 'none':
+        upload_format = 'other'
+    STAGE_DURATION.observe(upload.ingest_time, stage='upload_write')
+    UPLOADS.inc(endpoint=request.endpoint, format=upload_format)
+    UPLOAD_BYTES.inc(stats['size_bytes'], endpoint=request.endpoint, format=upload_format)
+    print(f"Received {upload.filename}: {stats['size_bytes']} bytes in {stats['ingest_time']}s "
+          f"({stats['mb_per_sec']} MB/s)")
+    return upload, None
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    return jsonify({'error': f'File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024)}MB'}), 413
+
+@app.teardown_request
+def discard_unclaimed_uploads(exc=None):
+    # Uploads a handler rejected before claiming them are removed here
+    request.discard_unclaimed_uploads()
+
+@app.teardown_request
+def release_admission_tickets(exc=None):
+    # Places a handler or an unstarted stream did not use are freed here
+    for ticket in g.pop('admission_tickets', []):
+        ticket.release()
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_endpoint = request.endpoint or 'unmatched'
+    g.metrics_start = time.time()
+    HTTP_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+@app.after_request
+def count_response(response):
+    g.metrics_status = response.status_code
+    return response
+
+@app.teardown_request
+def finish_request_metrics(exc=None):
+    # Runs after a streamed body has been sent, so streams are timed in full
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is None:
+        return
+    status = g.pop('metrics_status', 500)
+    HTTP_IN_FLIGHT.dec(endpoint=endpoint)
+    HTTP_REQUESTS.inc(endpoint=endpoint, status=status)
+    if status >= 400:
+        HTTP_ERRORS.inc(endpoint=endpoint)
+    HTTP_DURATION.observe(time.time() - g.metrics_start, endpoint=endpoint)
+
+def parse_long_audio_option(value):
+    """Map the long_audio form field to True, False or 'auto'"""
+    value = (value or 'auto').lower()
+    if value in ('1', 'true', 'yes'):
+        return True
+    if value in ('0', 'false', 'no'):
+        return False
+    return 'auto'
+
+def wants_async_job():
+    """Whether the client asked for /upload to run as a background job"""
+    value = request.form.get('async', request.args.get('async', ''))
+    return value.lower() in ('1', 'true', 'yes')
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    start_time = time.time()
+    
+    error = capability_error('transcription')
+    if error:
+        return error
     
     # Check for FFmpeg before processing
     ffmpeg_available, ffmpeg_path = check_ffmpeg()
@@ -427,126 +982,233 @@ def upload_file():
         }), 500
     
     try:
-        # Start timing
-        start_time = time.time()
-        
-        # Save uploaded file
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
-        # Check file size
-        file_size = os.path.getsize(filepath)
-        if file_size > MAX_FILE_SIZE:
-            os.remove(filepath)
-            return jsonify({'error': f'File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024)}MB'}), 400
-        
-        # Load model and transcribe
-        whisper_model, model_load_time = load_model()
-        print(f"Transcribing {filename}...")
-        
-        # Transcribe audio
-        transcription_start = time.time()
-        result = whisper_model.transcribe(
-            filepath,
-            language=None,  # Auto-detect language
-            task="transcribe"
-        )
-        transcription_end = time.time()
-        
-        # Extract transcription text
-        transcription_text = result["text"]
-        detected_language = result.get('language', 'unknown')
-        
-        # Format transcription with sentences on separate lines
-        formatted_text = format_transcription_with_sentences(transcription_text)
-        
+        model_name = model_registry.resolve(request.form.get('model'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    callback_url = request.form.get('callback_url') or None
+    if callback_url:
+        try:
+            transcription_jobs.check_callback_url(callback_url)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    # Output formats to save, e.g. "txt,srt,vtt,json"
+    try:
+        formats = parse_formats(request.form.get('formats'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    upload, error = receive_upload()
+    if error:
+        return error
+    
+    try:
         # Get target language for translation (default: English)
         target_language = request.form.get('target_language', 'en').lower()
+        long_audio = parse_long_audio_option(request.form.get('long_audio'))
         
-        # Translate if requested and translation is available
-        translated_text = None
-        translation_time = 0
-        translation_filename = None
-        
-        if target_language and target_language != 'en' and TRANSLATION_AVAILABLE:
-            try:
-                translation_start = time.time()
-                translated_text = translate_text(formatted_text, target_language)
-                translated_text = format_transcription_with_sentences(translated_text)
-                translation_time = time.time() - translation_start
-                
-                # Save translated version
-                base_name = os.path.splitext(filename)[0]
-                lang_codes = {'fr': 'french', 'es': 'spanish', 'de': 'german', 'nl': 'dutch', 'en': 'english'}
-                lang_name = lang_codes.get(target_language, target_language)
-                translation_filename = f"{base_name}_{lang_name}.txt"
-                translation_path = os.path.join('transcriptions', translation_filename)
-                
-                with open(translation_path, 'w', encoding='utf-8') as f:
-                    f.write(translated_text)
-            except Exception as e:
-                print(f"Translation failed: {str(e)}")
-                translated_text = None
-        
-        # Save original transcription to file
-        transcription_filename = os.path.splitext(filename)[0] + '.txt'
-        transcription_path = os.path.join('transcriptions', transcription_filename)
+        # Identical audio with identical settings was already transcribed
+        result_key = cache_key(upload.sha256, kind='transcription', model=model_name,
+                               precision=inference_engine.precision, task='transcribe',
+                               target_language=target_language)
+        cached = result_cache.get(result_key)
+        if cached:
+            upload.discard()
+            response_data = restore_cached_transcription(cached[0], upload.filename, start_time,
+                                                         formats)
+            response_data['upload'] = upload.stats()
+            return jsonify(response_data)
         
-        with open(transcription_path, 'w', encoding='utf-8') as f:
-            f.write(formatted_text)
-        
-        # Clean up uploaded file
-        os.remove(filepath)
-        
-        # Calculate processing time
-        end_time = time.time()
-        processing_time = end_time - start_time
-        transcription_time = transcription_end - transcription_start
-        
-        response_data = {
-            'success': True,
-            'transcription': formatted_text,
-            'filename': transcription_filename,
-            'language': detected_language,
-            'download_url': f'/download/{transcription_filename}',
-            'processing_time': round(processing_time, 2),
-            'transcription_time': round(transcription_time, 2),
-            'model_load_time': round(model_load_time, 2)
-        }
-        
-        # Add translation data if available
-        if translated_text:
-            response_data['translated_text'] = translated_text
-            response_data['translation_filename'] = translation_filename
-            response_data['translation_download_url'] = f'/download/{translation_filename}'
-            response_data['translation_time'] = round(translation_time, 2)
-            response_data['target_language'] = target_language
+        if wants_async_job() or callback_url:
+            job_id = transcription_jobs.submit(
+                transcribe_upload, upload.filepath, upload.filename, target_language, model_name,
+                long_audio, result_key, callback_url=callback_url, formats=formats
+            )
+            return jsonify({
+                'success': True,
+                'job_id': job_id,
+                'status': 'queued',
+                'status_url': f'/jobs/{job_id}',
+                'upload': upload.stats()
+            }), 202
         
+        ticket, error = admit_request(transcription_gate)
+        if error:
+            upload.discard()
+            return error
+        response_data = transcribe_upload(upload.filepath, upload.filename, target_language,
+                                          model_name, long_audio, result_key, formats=formats,
+                                          ticket=ticket)
+        response_data['upload'] = upload.stats()
         return jsonify(response_data)
     
+    except JobQueueFull as e:
+        upload.discard()
+        ADMISSION_REJECTED.inc(gate='transcription_jobs')
+        # Queued jobs are waiting for the same transcription slots
+        return overloaded_response(str(e), transcription_gate.retry_after(
+            extra=transcription_jobs.stats()['queued']))
     except Exception as e:
         # Clean up on error
-        if os.path.exists(filepath):
-            os.remove(filepath)
+        upload.discard()
         return jsonify({'error': f'Transcription failed: {str(e)}'}), 500
 
-@app.route('/download/<filename>')
-def download_file(filename):
+@app.route('/upload-stream', methods=['POST'])
+def upload_stream():
+    """Transcribe an upload and stream each segment as a Server-Sent Event"""
+    start_time = time.time()
+    
+    error = capability_error('transcription')
+    if error:
+        return error
+    
+    ffmpeg_available, ffmpeg_path = check_ffmpeg()
+    if not ffmpeg_available:
+        return jsonify({
+            'error': 'FFmpeg is not installed or not found in PATH. FFmpeg is required for audio transcription. Please install FFmpeg and restart the server. See INSTALL_FFMPEG.md for installation instructions.'
+        }), 500
+    
     try:
-        filepath = os.path.join('transcriptions', secure_filename(filename))
-        if os.path.exists(filepath):
-            return send_file(filepath, as_attachment=True, download_name=filename)
-        else:
-            return jsonify({'error': 'File not found'}), 404
+        model_name = model_registry.resolve(request.form.get('model'))
+        formats = parse_formats(request.form.get('formats'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    upload, error = receive_upload()
+    if error:
+        return error
+    
+    target_language = request.form.get('target_language', 'en').lower()
+    
+    result_key = cache_key(upload.sha256, kind='transcription', model=model_name,
+                           precision=inference_engine.precision, task='transcribe',
+                           target_language=target_language)
+    cached = result_cache.get(result_key)
+    if cached:
+        upload.discard()
+        summary = restore_cached_transcription(cached[0], upload.filename, start_time, formats)
+        return Response(format_sse('summary', summary), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    
+    ticket, error = admit_request(transcription_gate)
+    if error:
+        upload.discard()
+        return error
+    
+    def generate():
+        events = stream_transcription(upload.filepath, upload.filename, target_language,
+                                      model_name, result_key, formats, ticket)
+        try:
+            for event, data in events:
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse('error', {'error': f'Transcription failed: {str(e)}'})
+        finally:
+            events.close()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Get status, progress and (when finished) the result of a transcription job"""
+    job = transcription_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/jobs', methods=['GET'])
+def job_summary():
+    """Get counts of transcription jobs by status"""
+    return jsonify(transcription_jobs.stats())
+
+def send_artifact(artifact_id, kind):
+    """
+    Send a stored result file under its original name, or a 404 if it is
+    unknown or expired.
+    
+    Text files are sent precompressed when the client accepts brotli or
+    gzip. Range requests get the uncompressed file, so byte ranges (and
+    resumed downloads) refer to its bytes. Artifacts never change, so the
+    strong ETag answers If-None-Match with a 304 and clients may cache the
+    file until it expires.
+    """
+    artifact = artifact_store.get(artifact_id, kind)
+    if artifact is None:
+        return jsonify({'error': 'File not found'}), 404
+    
+    encoding = None
+    if artifact.encodings and 'Range' not in request.headers:
+        encoding = request.accept_encodings.best_match(artifact.encodings)
+    # Each representation needs its own strong ETag; artifacts indexed
+    # before ETags were stored fall back to Werkzeug's file-based one
+    etag = artifact.etag or True
+    if encoding and artifact.etag:
+        etag = f"{artifact.etag}-{encoding}"
+    
+    try:
+        response = send_file(
+            artifact.variant_path(encoding) if encoding else artifact.path,
+            mimetype=mimetypes.guess_type(artifact.name)[0] or 'application/octet-stream',
+            as_attachment=True,
+            download_name=artifact.name,
+            etag=etag,
+            conditional=True
+        )
+    except FileNotFoundError:
+        return jsonify({'error': 'File not found'}), 404
+    
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if artifact.encodings:
+        response.vary.add('Accept-Encoding')
+    # Results are per user, so only the client's own cache keeps them
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    response.cache_control.max_age = max(0, int(artifact.expires_at - time.time()))
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/download/<artifact_id>')
+def download_file(artifact_id):
+    try:
+        return send_artifact(artifact_id, 'transcription')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus metrics: request counts, stage timings, in-flight work and loaded models"""
+    text = metrics.render() if process_metrics is None else process_metrics.render()
+    return Response(text, content_type=metrics.CONTENT_TYPE)
+
+@app.route('/models', methods=['GET'])
+def models_status():
+    """Get loaded Whisper models with load time, memory and hit counts, per server process"""
+    data = model_registry.stats()
+    data['workers'] = {pid: status['models'] for pid, status in worker_statuses().items()}
+    return jsonify(data)
+
+@app.route('/cache-stats', methods=['GET'])
+def cache_stats():
+    """Get result cache size and hit/miss counters"""
+    return jsonify(result_cache.stats())
+
+@app.route('/artifact-stats', methods=['GET'])
+def artifact_stats():
+    """Get stored result file counts and sizes by kind, and the disk quota"""
+    return jsonify(artifact_store.stats())
+
 @app.route('/supported-formats', methods=['GET'])
 def supported_formats():
     ffmpeg_available, ffmpeg_path = check_ffmpeg()
     return jsonify({
         'formats': list(ALLOWED_EXTENSIONS),
+        'output_formats': list(OUTPUT_FORMATS),
         'max_file_size_mb': MAX_FILE_SIZE / (1024 * 1024),
         'ffmpeg_available': ffmpeg_available,
         'ffmpeg_path': ffmpeg_path
@@ -554,8 +1216,9 @@ def supported_formats():
 
 @app.route('/check-ffmpeg', methods=['GET'])
 def check_ffmpeg_status():
-    """Check FFmpeg installation status"""
-    ffmpeg_available, ffmpeg_path = check_ffmpeg()
+    """Check FFmpeg installation status (pass ?refresh=1 to probe again)"""
+    refresh = request.args.get('refresh', '').lower() in ('1', 'true', 'yes')
+    ffmpeg_available, ffmpeg_path = check_ffmpeg(refresh)
     if ffmpeg_available:
         return jsonify({
             'available': True,
@@ -570,174 +1233,479 @@ def check_ffmpeg_status():
             'install_guide': 'See INSTALL_FFMPEG.md for installation instructions'
         }), 503
 
-@app.route('/convert-document', methods=['POST'])
-def convert_document():
-    """Convert document from one format to another"""
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
-    
-    target_format = request.form.get('target_format', '').lower()
-    if not target_format:
-        return jsonify({'error': 'Target format not specified'}), 400
+def run_conversion(upload, target_format, pages=None, max_pages=None, sheet=None, start_time=None,
+                   ticket=None):
+    """
+    Convert an ingested upload to target_format, returning the response data.
     
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+    Results are served from and stored in the result cache; other
+    conversions wait for a slot at the conversion gate, using ticket if the
+    request was already admitted there. Raises ValueError for unsupported
+    conversions and bad page or sheet selections. The upload is removed
+    once processing finishes.
+    """
+    start_time = start_time or time.time()
+    filename = upload.filename
+    filepath = upload.filepath
     
+    WORK_IN_PROGRESS.inc(kind='conversion')
     try:
-        start_time = time.time()
-        
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
-        file_size = os.path.getsize(filepath)
-        if file_size > MAX_FILE_SIZE:
-            os.remove(filepath)
-            return jsonify({'error': f'File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024)}MB'}), 400
-        
         source_ext = get_file_extension(filename)
         
         # Generate output filename
         base_name = os.path.splitext(filename)[0]
         output_filename = f"{base_name}.{target_format}"
-        output_path = os.path.join('conversions', output_filename)
         
-        # Perform conversion based on source and target formats
-        if source_ext == 'docx' and target_format == 'txt':
-            text = convert_docx_to_txt(filepath)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text)
-        elif source_ext == 'docx' and target_format == 'pdf':
-            convert_docx_to_pdf(filepath, output_path)
-        elif source_ext == 'pdf' and target_format == 'txt':
-            text = convert_pdf_to_txt(filepath)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text)
-        elif source_ext == 'pdf' and target_format == 'docx':
-            convert_pdf_to_docx(filepath, output_path)
-        elif source_ext == 'txt' and target_format == 'pdf':
-            convert_txt_to_pdf(filepath, output_path)
-        elif source_ext == 'txt' and target_format == 'docx':
-            convert_txt_to_docx(filepath, output_path)
-        elif source_ext in ['xlsx', 'xls'] and target_format == 'txt':
-            text = convert_excel_to_txt(filepath)
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(text)
-        else:
-            os.remove(filepath)
-            return jsonify({'error': f'Conversion from {source_ext} to {target_format} is not supported'}), 400
+        # Identical document was already converted to this format
+        result_key = cache_key(upload.sha256, kind='conversion', source_format=source_ext,
+                               target_format=target_format, pages=pages, max_pages=max_pages,
+                               sheet=sheet)
+        cached = result_cache.get(result_key)
+        if cached and 'output' in cached[1]:
+            with artifact_store.create('conversion', output_filename) as artifact:
+                shutil.copyfile(cached[1]['output'], artifact.path)
+            response_data = {
+                'success': True,
+                'filename': output_filename,
+                'artifact_id': artifact.id,
+                'download_url': f'/download-conversion/{artifact.id}',
+                'processing_time': round(time.time() - start_time, 2),
+                'cached': True
+            }
+            if cached[0].get('route'):
+                response_data['route'] = cached[0]['route']
+            if cached[0].get('pages'):
+                response_data['pages'] = cached[0]['pages']
+            return response_data
+        
+        # Convert directly or through the cheapest chain of converters
+        capabilities.load('conversion')
+        with ticket or conversion_gate.admit(reject=False):
+            with artifact_store.create('conversion', output_filename) as artifact:
+                stats = convert_file(
+                    filepath,
+                    source_ext,
+                    target_format,
+                    artifact.path,
+                    pages=pages,
+                    max_pages=max_pages,
+                    sheet=sheet,
+                    pdf_workers=PDF_TEXT_WORKERS,
+                    pdf_parallel_min_pages=PDF_PARALLEL_MIN_PAGES,
+                    spreadsheet_workers=SPREADSHEET_WORKERS
+                )
         
         processing_time = time.time() - start_time
+        STAGE_DURATION.observe(processing_time, stage='convert')
+        for step in stats['steps']:
+            CONVERTER_DURATION.observe(step['seconds'], converter=step['converter'])
         
-        # Clean up uploaded file
-        os.remove(filepath)
+        result_cache.put(result_key, stats, {'output': artifact.path})
         
-        return jsonify({
+        response_data = {
             'success': True,
             'filename': output_filename,
-            'download_url': f'/download-conversion/{output_filename}',
-            'processing_time': round(processing_time, 2)
-        })
+            'artifact_id': artifact.id,
+            'download_url': f'/download-conversion/{artifact.id}',
+            'processing_time': round(processing_time, 2),
+            'route': stats['route']
+        }
+        if stats.get('pages'):
+            response_data['pages'] = stats['pages']
+        return response_data
+    
+    finally:
+        WORK_IN_PROGRESS.dec(kind='conversion')
+        # Clean up uploaded file
+        upload.discard()
+
+@app.route('/convert-document', methods=['POST'])
+def convert_document():
+    """Convert document from one format to another"""
+    start_time = time.time()
     
+    error = capability_error('conversion')
+    if error:
+        return error
+    
+    target_format = request.form.get('target_format', '').lower()
+    if not target_format:
+        return jsonify({'error': 'Target format not specified'}), 400
+    
+    # Optional page selection for PDF sources
+    pages = request.form.get('pages', '').strip() or None
+    try:
+        max_pages = int(request.form['max_pages']) if request.form.get('max_pages') else None
+    except ValueError:
+        return jsonify({'error': 'max_pages must be a whole number'}), 400
+    # Sheet to export when converting a workbook to CSV (default: first sheet)
+    sheet = request.form.get('sheet', '').strip() or None
+    
+    upload, error = receive_upload(check_extension=False)
+    if error:
+        return error
+    
+    ticket, error = admit_request(conversion_gate)
+    if error:
+        upload.discard()
+        return error
+    
+    try:
+        response_data = run_conversion(upload, target_format, pages=pages, max_pages=max_pages,
+                                       sheet=sheet, start_time=start_time, ticket=ticket)
+        response_data['upload'] = upload.stats()
+        return jsonify(response_data)
+    
+    except ValueError as e:
+        # Unsupported conversion or bad page or sheet selection
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        if os.path.exists(filepath):
-            os.remove(filepath)
         return jsonify({'error': f'Conversion failed: {str(e)}'}), 500
 
-@app.route('/ocr', methods=['POST'])
-def ocr_endpoint():
-    """Perform OCR on image or PDF file"""
-    if 'file' not in request.files:
-        return jsonify({'error': 'No file provided'}), 400
-    
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+def run_ocr(upload, pages=None, dpi=None, mode='ocr', start_time=None, ticket=None):
+    """
+    OCR an ingested image or PDF upload, returning the response data.
     
-    if not OCR_AVAILABLE:
-        return jsonify({
-            'error': 'OCR functionality not available. Please install pytesseract and Tesseract OCR engine.'
-        }), 503
+    Each page is formatted with sentences on separate lines and saved as it
+    completes. Results are served from and stored in the result cache;
+    other files wait for a slot at the OCR gate, using ticket if the
+    request was already admitted there. Raises ValueError for bad page
+    selections. The upload is removed once processing finishes.
+    """
+    start_time = start_time or time.time()
+    dpi = dpi or OCR_DPI
+    filename = upload.filename
+    filepath = upload.filepath
     
+    WORK_IN_PROGRESS.inc(kind='ocr')
     try:
-        start_time = time.time()
-        
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
-        file_size = os.path.getsize(filepath)
-        if file_size > MAX_FILE_SIZE:
-            os.remove(filepath)
-            return jsonify({'error': f'File too large. Maximum size: {MAX_FILE_SIZE / (1024*1024)}MB'}), 400
-        
-        # Perform OCR
-        ocr_text = perform_ocr(filepath)
-        
-        # Format with sentences
-        formatted_text = format_transcription_with_sentences(ocr_text)
-        
-        # Save OCR result
         base_name = os.path.splitext(filename)[0]
         output_filename = f"{base_name}_ocr.txt"
-        output_path = os.path.join('ocr_results', output_filename)
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(formatted_text)
+        # Identical file was already OCR'd with the same settings
+        result_key = cache_key(upload.sha256, kind='ocr', pages=pages, dpi=dpi, mode=mode,
+                               lang=OCR_LANG, psm=OCR_PSM,
+                               min_text_chars=HYBRID_MIN_TEXT_CHARS if mode == 'hybrid' else None)
+        cached = result_cache.get(result_key)
+        if cached:
+            formatted_text = cached[0]['text']
+            page_stats = cached[0].get('pages', {})
+            artifact = artifact_store.write_text('ocr', output_filename, formatted_text)
+        else:
+            page_stats = {}
+            page_total = ocr_page_total(filepath, pages)
+            ticket = ticket or ocr_gate.admit(reject=False)
+            ticket.set_cost(page_total)
+            with ticket, artifact_store.create('ocr', output_filename) as artifact:
+                with open(artifact.path, 'w', encoding='utf-8') as f, STAGE_DURATION.time(stage='ocr'):
+                    formatted_text = perform_ocr(
+                        filepath,
+                        pages=pages,
+                        dpi=dpi,
+                        output=f,
+                        format_page=format_transcription_with_sentences,
+                        mode=mode,
+                        page_stats=page_stats
+                    )
+            result_cache.put(result_key, {'text': formatted_text, 'pages': page_stats})
         
         processing_time = time.time() - start_time
         
-        # Clean up uploaded file
-        os.remove(filepath)
-        
-        return jsonify({
+        response_data = {
             'success': True,
             'text': formatted_text,
             'filename': output_filename,
-            'download_url': f'/download-ocr/{output_filename}',
-            'processing_time': round(processing_time, 2)
-        })
+            'artifact_id': artifact.id,
+            'download_url': f'/download-ocr/{artifact.id}',
+            'processing_time': round(processing_time, 2),
+            'mode': mode
+        }
+        if page_stats:
+            response_data['pages'] = page_stats
+        if cached:
+            response_data['cached'] = True
+        return response_data
+    
+    finally:
+        WORK_IN_PROGRESS.dec(kind='ocr')
+        # Clean up uploaded file
+        upload.discard()
+
+def parse_ocr_options(form):
+    """
+    Read the pages, dpi and mode OCR fields from a form.
     
+    Returns ((pages, dpi, mode), None) or (None, error message).
+    """
+    pages = form.get('pages', '').strip() or None
+    try:
+        dpi = int(form.get('dpi') or OCR_DPI)
+    except ValueError:
+        return None, 'dpi must be a whole number'
+    if not 50 <= dpi <= OCR_MAX_DPI:
+        return None, f'dpi must be between 50 and {OCR_MAX_DPI}'
+    mode = form.get('mode', 'ocr').lower()
+    if mode not in OCR_MODES:
+        return None, f'mode must be one of: {", ".join(OCR_MODES)}'
+    return (pages, dpi, mode), None
+
+@app.route('/ocr', methods=['POST'])
+def ocr_endpoint():
+    """Perform OCR on image or PDF file"""
+    start_time = time.time()
+    
+    error = capability_error('ocr')
+    if error:
+        return error
+    
+    # Optional PDF page selection and rendering resolution
+    options, error = parse_ocr_options(request.form)
+    if error:
+        return jsonify({'error': error}), 400
+    pages, dpi, mode = options
+    
+    upload, error = receive_upload(check_extension=False)
+    if error:
+        return error
+    
+    ticket, error = admit_request(ocr_gate)
+    if error:
+        upload.discard()
+        return error
+    
+    try:
+        response_data = run_ocr(upload, pages=pages, dpi=dpi, mode=mode, start_time=start_time,
+                                ticket=ticket)
+        response_data['upload'] = upload.stats()
+        return jsonify(response_data)
+    
+    except ValueError as e:
+        # Bad page selection
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        if os.path.exists(filepath):
-            os.remove(filepath)
         return jsonify({'error': f'OCR failed: {str(e)}'}), 500
 
-@app.route('/download-conversion/<filename>')
-def download_conversion(filename):
-    """Download converted document"""
+def batch_operation(filename, operation, target_format=None):
+    """Pick the operation for one batch item, raising ValueError if none applies"""
+    ext = get_file_extension(filename)
+    if operation == 'auto':
+        if ext in ALLOWED_AUDIO_EXTENSIONS:
+            operation = 'transcribe'
+        elif ext in ALLOWED_IMAGE_EXTENSIONS or (ext == 'pdf' and not target_format):
+            operation = 'ocr'
+        elif target_format:
+            operation = 'convert'
+        else:
+            raise ValueError(f'No operation for .{ext} files; specify target_format to convert them')
+    
+    if operation == 'transcribe' and ext not in ALLOWED_AUDIO_EXTENSIONS:
+        raise ValueError(f'.{ext} files cannot be transcribed')
+    if operation == 'ocr' and ext not in ALLOWED_IMAGE_EXTENSIONS | {'pdf'}:
+        raise ValueError(f'.{ext} files cannot be OCR\'d')
+    if operation == 'convert' and not target_format:
+        raise ValueError('Target format not specified')
+    return operation
+
+def run_batch_item(upload, operation, options, submitted_at):
+    """
+    Process one batch item with the same functions as the single-file endpoints.
+    
+    Returns (response data, [(filename, artifact ID), ...] of result files, seconds queued).
+    """
+    queued_time = time.time() - submitted_at
     try:
-        filepath = os.path.join('conversions', secure_filename(filename))
-        if os.path.exists(filepath):
-            return send_file(filepath, as_attachment=True, download_name=filename)
+        capabilities.check(BATCH_CAPABILITIES[operation])
+    except CapabilityUnavailable:
+        upload.discard()
+        raise
+    if operation == 'transcribe':
+        if not check_ffmpeg()[0]:
+            upload.discard()
+            raise Exception('FFmpeg is not installed or not found in PATH')
+        result_key = cache_key(upload.sha256, kind='transcription', model=options['model'],
+                               precision=inference_engine.precision, task='transcribe',
+                               target_language=options['target_language'])
+        cached = result_cache.get(result_key)
+        if cached:
+            upload.discard()
+            data = restore_cached_transcription(cached[0], upload.filename, time.time(),
+                                                options['formats'])
         else:
-            return jsonify({'error': 'File not found'}), 404
+            # Waits for a transcription slot like any other transcription
+            data = transcribe_upload(upload.filepath, upload.filename, options['target_language'],
+                                     options['model'], options['long_audio'], result_key,
+                                     formats=options['formats'])
+        outputs = [(output['filename'], output['artifact_id']) for output in data['outputs'].values()]
+        if data.get('translation_filename'):
+            outputs.append((data['translation_filename'], data['translation_artifact_id']))
+    elif operation == 'ocr':
+        data = run_ocr(upload, pages=options['pages'], dpi=options['dpi'], mode=options['mode'])
+        outputs = [(data['filename'], data['artifact_id'])]
+    else:
+        data = run_conversion(upload, options['target_format'], pages=options['pages'],
+                              max_pages=options['max_pages'], sheet=options['sheet'])
+        outputs = [(data['filename'], data['artifact_id'])]
+    return data, outputs, queued_time
+
+@app.route('/batch', methods=['POST'])
+def batch():
+    """
+    Process many files (or zip archives of files) concurrently and stream
+    back a zip of the results.
+    
+    Each item's result files are added to the archive under a folder named
+    after the item as soon as it finishes; manifest.json at the end records
+    every item's status and timings.
+    """
+    start_time = time.time()
+    
+    operation = request.form.get('operation', 'auto').lower()
+    if operation not in BATCH_OPERATIONS:
+        return jsonify({'error': f'operation must be one of: {", ".join(BATCH_OPERATIONS)}'}), 400
+    
+    ocr_options, error = parse_ocr_options(request.form)
+    if error:
+        return jsonify({'error': error}), 400
+    try:
+        max_pages = int(request.form['max_pages']) if request.form.get('max_pages') else None
+        model_name = model_registry.resolve(request.form.get('model'))
+        formats = parse_formats(request.form.get('formats'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    options = {
+        'target_format': request.form.get('target_format', '').lower() or None,
+        'target_language': request.form.get('target_language', 'en').lower(),
+        'model': model_name,
+        'long_audio': parse_long_audio_option(request.form.get('long_audio')),
+        'formats': formats,
+        'pages': ocr_options[0],
+        'dpi': ocr_options[1],
+        'mode': ocr_options[2],
+        'max_pages': max_pages,
+        'sheet': request.form.get('sheet', '').strip() or None
+    }
+    
+    files = [file for file in request.files.getlist('files') + request.files.getlist('file')
+             if file.filename]
+    if not files:
+        return jsonify({'error': 'No files provided'}), 400
+    
+    uploads = []
+    try:
+        for file in files:
+            uploads.append(ingest_upload(file, UPLOAD_FOLDER, MAX_FILE_SIZE))
+        uploads = make_names_unique(expand_archives(uploads, UPLOAD_FOLDER, MAX_FILE_SIZE,
+                                                    BATCH_MAX_FILES))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception:
+        for upload in uploads:
+            upload.discard()
+        raise
+    
+    def generate():
+        archive = ZipStream()
+        manifest = []
+        pending = {}
+        try:
+            for index, upload in enumerate(uploads):
+                entry = {'index': index, 'file': upload.filename, 'size_bytes': upload.size}
+                try:
+                    entry['operation'] = batch_operation(upload.filename, operation,
+                                                         options['target_format'])
+                except ValueError as e:
+                    upload.discard()
+                    entry.update(status='error', error=str(e))
+                    manifest.append(entry)
+                    continue
+                future = batch_pool.submit(run_batch_item, upload, entry['operation'], options,
+                                           time.time())
+                pending[future] = (entry, upload)
+            
+            for future in as_completed(list(pending)):
+                entry, upload = pending.pop(future)
+                try:
+                    data, outputs, queued_time = future.result()
+                except Exception as e:
+                    entry.update(status='error', error=str(e))
+                else:
+                    entry.update(status='ok', queued_time=round(queued_time, 2),
+                                 processing_time=data.get('processing_time'), outputs=[])
+                    entry.update({field: data[field] for field in BATCH_MANIFEST_FIELDS if field in data})
+                    missing = []
+                    for name, artifact_id in outputs:
+                        artifact = artifact_store.get(artifact_id)
+                        if artifact is None:
+                            # Evicted (e.g. for the size limit) before it could be added
+                            missing.append(name)
+                            continue
+                        arcname = f"{entry['file']}/{name}"
+                        yield from archive.add_file(arcname, artifact.path)
+                        entry['outputs'].append(arcname)
+                    if missing:
+                        entry.update(status='error', missing_outputs=missing,
+                                     error=f"Outputs no longer available: {', '.join(missing)}")
+                manifest.append(entry)
+            
+            total_time = time.time() - start_time
+            succeeded = sum(1 for entry in manifest if entry['status'] == 'ok')
+            summary = {
+                'items': len(manifest),
+                'succeeded': succeeded,
+                'failed': len(manifest) - succeeded,
+                'total_time': round(total_time, 2),
+                'items_per_minute': round(len(manifest) / total_time * 60, 2) if total_time else None
+            }
+            print(f"Batch of {len(manifest)} items finished in {total_time:.1f}s "
+                  f"({succeeded} succeeded)")
+            manifest.sort(key=lambda entry: entry['index'])
+            yield from archive.add_bytes('manifest.json',
+                                         json.dumps({'summary': summary, 'items': manifest}, indent=2))
+            yield from archive.close()
+        finally:
+            # Client went away: drop items that have not started
+            for future, (entry, upload) in pending.items():
+                if future.cancel():
+                    upload.discard()
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='application/zip',
+        headers={
+            'Content-Disposition': 'attachment; filename=batch_results.zip',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+
+@app.route('/download-conversion/<artifact_id>')
+def download_conversion(artifact_id):
+    """Download converted document"""
+    try:
+        return send_artifact(artifact_id, 'conversion')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/download-ocr/<filename>')
-def download_ocr(filename):
+@app.route('/download-ocr/<artifact_id>')
+def download_ocr(artifact_id):
     """Download OCR result"""
     try:
-        filepath = os.path.join('ocr_results', secure_filename(filename))
-        if os.path.exists(filepath):
-            return send_file(filepath, as_attachment=True, download_name=filename)
-        else:
-            return jsonify({'error': 'File not found'}), 404
+        return send_artifact(artifact_id, 'ocr')
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 @app.route('/supported-conversions', methods=['GET'])
 def supported_conversions():
-    """Get supported document conversion formats"""
+    """Get supported document conversion formats, generated from the converter registry"""
+    routes = conversion_routes()
     return jsonify({
-        'conversions': {
-            'docx': ['txt', 'pdf'],
-            'pdf': ['txt', 'docx'],
-            'txt': ['pdf', 'docx'],
-            'xlsx': ['txt'],
-            'xls': ['txt']
+        'enabled': capabilities.enabled('conversion'),
+        'conversions': {source: sorted(targets) for source, targets in routes.items()},
+        'routes': {
+            f'{source}->{target}': route
+            for source, targets in routes.items()
+            for target, route in targets.items()
+            if len(route) > 2
         },
         'libraries_available': {
             'docx': DOCX_AVAILABLE,
@@ -754,8 +1722,16 @@ def ocr_capabilities():
     return jsonify({
         'available': OCR_AVAILABLE,
         'pdf2image_available': PDF2IMAGE_AVAILABLE,
+        'workers': OCR_WORKERS,
+        'engine': get_ocr_engine().info() if OCR_AVAILABLE else None,
+        'default_dpi': OCR_DPI,
+        'max_dpi': OCR_MAX_DPI,
+        'modes': list(OCR_MODES) if PDF_AVAILABLE else ['ocr'],
         'supported_formats': list(ALLOWED_IMAGE_EXTENSIONS) + ['pdf'] if OCR_AVAILABLE else [],
-        'message': 'OCR is available' if OCR_AVAILABLE else 'OCR requires pytesseract and Tesseract OCR engine installation'
+        'message': 'OCR is available' if OCR_AVAILABLE else (
+            'OCR requires pytesseract and Tesseract OCR engine installation' if capabilities.enabled('ocr')
+            else 'OCR is not enabled on this server'
+        )
     })
 
 @app.route('/translation-capabilities', methods=['GET'])
@@ -770,9 +1746,23 @@ def translation_capabilities():
             'de': 'German',
             'nl': 'Dutch'
         },
-        'message': 'Translation is available' if TRANSLATION_AVAILABLE else 'Translation requires deep-translator library installation'
+        'backend': TRANSLATION_BACKEND,
+        'workers': TRANSLATION_WORKERS,
+        'memory': translator.memory.stats() if translator else None,
+        'message': 'Translation is available' if TRANSLATION_AVAILABLE else (
+            'Translation requires deep-translator library installation' if capabilities.enabled('translation')
+            else 'Translation is not enabled on this server'
+        )
     })
 
+@app.route('/capabilities', methods=['GET'])
+def capabilities_status():
+    """Capability profile of this process, with startup time, memory and import timings"""
+    return jsonify(capabilities.stats())
+
+capabilities.started()
+print(capabilities.report())
+
 if __name__ == '__main__':
     print("Starting Audio Transcription Server...")
     print("Supported formats:", ", ".join(ALLOWED_EXTENSIONS))
@@ -788,5 +1778,9 @@ if __name__ == '__main__':
         print("  See INSTALL_FFMPEG.md for installation instructions.")
         print("  The server will start, but transcription will fail until FFmpeg is installed.")
     
+    # With the reloader on, only the child process that serves requests preloads
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        preload_models()
+    
     app.run(debug=True, host='0.0.0.0', port=5012)
 
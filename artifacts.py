@@ -0,0 +1,307 @@
+"""
+Store for result files served to clients.
+
+Every artifact gets a unique ID and lives at <directory>/<id[:2]>/<id>.<ext>,
+so uploads with the same name never overwrite each other's results and no
+directory grows too large. A SQLite index records each artifact's download
+name, size, expiry and last access: downloads are a primary key lookup and
+eviction is an ordered query, never a directory scan.
+
+Artifacts expire after their TTL. A background sweep removes expired ones
+and, when the store is over its size quota, the least recently used ones.
+The index is shared by every process using the same directory.
+
+Artifacts never change once committed. At commit time each one gets a
+strong ETag from its content, and text artifacts get gzip (and, with the
+brotli package, brotli) variants next to them, so downloads can be
+answered with 304s and served compressed without compressing per request.
+"""
+
+import gzip
+import hashlib
+import os
+import shutil
+import sqlite3
+import threading
+import time
+import uuid
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+# Extensions of artifacts that compress well; documents such as docx, xlsx
+# and most PDFs are compressed already
+COMPRESSIBLE_EXTENSIONS = {'.txt', '.srt', '.vtt', '.json', '.csv', '.md', '.html', '.xml', '.tsv'}
+# Smaller files fit in a packet or two either way
+MIN_COMPRESS_BYTES = 1024
+# Preferred first; clients that accept several get the first one
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+class Artifact:
+    """A stored (or reserved) result file"""
+
+    def __init__(self, artifact_id, kind, name, path, size=None, created_at=None, expires_at=None,
+                 etag=None, encodings=()):
+        self.id = artifact_id
+        self.kind = kind
+        self.name = name
+        self.path = path
+        self.size = size
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.etag = etag
+        # Content encodings with a precompressed variant, preferred first
+        self.encodings = list(encodings)
+
+    def variant_path(self, encoding):
+        """Path of the precompressed variant for a content encoding"""
+        return self.path + ENCODING_SUFFIXES[encoding]
+
+
+class ArtifactStore:
+    """Uniquely named result files with a size quota and TTL eviction"""
+
+    def __init__(self, directory='artifacts', max_bytes=5 * 1024 * 1024 * 1024, default_ttl=86400,
+                 sweep_interval=300):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.sweep_interval = sweep_interval
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._pid = None
+        self._connection = None
+        self._sweeper = None
+        os.makedirs(directory, exist_ok=True)
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS artifacts ('
+            'id TEXT PRIMARY KEY, kind TEXT NOT NULL, name TEXT NOT NULL, path TEXT NOT NULL, '
+            'size INTEGER NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL, '
+            'last_access REAL NOT NULL)'
+        )
+        # Added after the first release of the index
+        columns = {row[1] for row in self._db.execute('PRAGMA table_info(artifacts)')}
+        for column in ('etag', 'encodings'):
+            if column not in columns:
+                self._db.execute(f'ALTER TABLE artifacts ADD COLUMN {column} TEXT')
+        self._db.execute('CREATE INDEX IF NOT EXISTS artifacts_expires ON artifacts (expires_at)')
+        self._db.execute('CREATE INDEX IF NOT EXISTS artifacts_last_access ON artifacts (last_access)')
+        self._db.commit()
+
+    @property
+    def _db(self):
+        # A connection must not be used across fork, so each process opens its own
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(os.path.join(self.directory, 'index.sqlite3'),
+                                               check_same_thread=False, timeout=30)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._pid = os.getpid()
+        return self._connection
+
+    def reserve(self, kind, name):
+        """Return a new, not yet indexed Artifact whose path can be written"""
+        artifact_id = uuid.uuid4().hex
+        ext = os.path.splitext(name)[1]
+        path = os.path.join(self.directory, artifact_id[:2], artifact_id + ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return Artifact(artifact_id, kind, name, path)
+
+    def commit(self, artifact, ttl=None):
+        """
+        Index a reserved artifact once its file is written; it expires after
+        ttl seconds. Computes its ETag and writes its compressed variants.
+        """
+        artifact.etag = self._content_etag(artifact.path)
+        artifact.encodings = self._precompress(artifact)
+        # The quota counts the variants too
+        artifact.size = sum(os.path.getsize(path) for path in self._paths(artifact.path, artifact.encodings))
+        now = time.time()
+        artifact.created_at = now
+        artifact.expires_at = now + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO artifacts (id, kind, name, path, size, created_at, expires_at, last_access, '
+                'etag, encodings) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (artifact.id, artifact.kind, artifact.name, os.path.relpath(artifact.path, self.directory),
+                 artifact.size, now, artifact.expires_at, now, artifact.etag, ','.join(artifact.encodings))
+            )
+            self._db.commit()
+            over_quota = self._total_bytes() > self.max_bytes
+        if over_quota:
+            self.evict()
+        self._ensure_sweeper()
+        return artifact
+
+    def discard(self, artifact):
+        """Remove a reserved artifact that was not committed"""
+        # Variants may have been written before it failed
+        self._remove(self._paths(artifact.path, ENCODING_SUFFIXES))
+
+    def _content_etag(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()[:32]
+
+    def _precompress(self, artifact):
+        """Write compressed variants of a text artifact; returns the encodings kept"""
+        size = os.path.getsize(artifact.path)
+        if (os.path.splitext(artifact.path)[1].lower() not in COMPRESSIBLE_EXTENSIONS
+                or size < MIN_COMPRESS_BYTES):
+            return []
+        encodings = []
+        for encoding in ENCODING_SUFFIXES:
+            if encoding == 'br' and not BROTLI_AVAILABLE:
+                continue
+            variant = artifact.variant_path(encoding)
+            try:
+                if encoding == 'br':
+                    # Quality 11 is several times slower for a few percent
+                    with open(artifact.path, 'rb') as f:
+                        data = brotli.compress(f.read(), quality=9)
+                    with open(variant, 'wb') as f:
+                        f.write(data)
+                else:
+                    # mtime=0 keeps the output identical for identical content
+                    with open(artifact.path, 'rb') as src, \
+                            gzip.GzipFile(variant, 'wb', compresslevel=9, mtime=0) as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+            except Exception as e:
+                print(f"Could not compress {artifact.name} with {encoding}: {str(e)}")
+                self._remove([variant])
+                continue
+            # Keep a variant only when it saves a worthwhile amount
+            if os.path.getsize(variant) < size * 0.9:
+                encodings.append(encoding)
+            else:
+                self._remove([variant])
+        return encodings
+
+    def _paths(self, path, encodings):
+        return [path] + [path + ENCODING_SUFFIXES[encoding] for encoding in encodings]
+
+    def _remove(self, paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def create(self, kind, name, ttl=None):
+        """
+        Context manager for writing a new artifact:
+
+            with store.create('ocr', 'scan_ocr.txt') as artifact:
+                write to artifact.path
+
+        The artifact is committed when the block finishes and discarded if
+        it raises.
+        """
+        return _Creation(self, kind, name, ttl)
+
+    def write_text(self, kind, name, text, ttl=None):
+        with self.create(kind, name, ttl) as artifact:
+            with open(artifact.path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        return artifact
+
+    def get(self, artifact_id, kind=None):
+        """Return the Artifact with this ID, or None if it is unknown, expired or of another kind"""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                'SELECT kind, name, path, size, created_at, expires_at, etag, encodings '
+                'FROM artifacts WHERE id = ?',
+                (artifact_id,)
+            ).fetchone()
+            if row is None or row[5] <= now or (kind is not None and row[0] != kind):
+                return None
+            self._db.execute('UPDATE artifacts SET last_access = ? WHERE id = ?', (now, artifact_id))
+            self._db.commit()
+        return Artifact(artifact_id, row[0], row[1], os.path.join(self.directory, row[2]),
+                        row[3], row[4], row[5], row[6], row[7].split(',') if row[7] else ())
+
+    def evict(self):
+        """Remove expired artifacts, then least recently used ones until under the quota"""
+        now = time.time()
+        with self._lock:
+            doomed = self._db.execute('SELECT id, path, size, encodings FROM artifacts WHERE expires_at <= ?',
+                                      (now,)).fetchall()
+            excess = self._total_bytes() - sum(row[2] for row in doomed) - self.max_bytes
+            if excess > 0:
+                expired = {row[0] for row in doomed}
+                cursor = self._db.execute(
+                    'SELECT id, path, size, encodings FROM artifacts ORDER BY last_access'
+                )
+                for row in cursor:
+                    if excess <= 0:
+                        break
+                    if row[0] not in expired:
+                        doomed.append(row)
+                        excess -= row[2]
+                cursor.close()
+            self._db.executemany('DELETE FROM artifacts WHERE id = ?', [(row[0],) for row in doomed])
+            self._db.commit()
+            self.evictions += len(doomed)
+        for _, path, _, encodings in doomed:
+            self._remove(self._paths(os.path.join(self.directory, path),
+                                     encodings.split(',') if encodings else ()))
+        return len(doomed)
+
+    def _total_bytes(self):
+        # Caller holds self._lock
+        return self._db.execute('SELECT COALESCE(SUM(size), 0) FROM artifacts').fetchone()[0]
+
+    def _ensure_sweeper(self):
+        # Started on first use rather than at import time, once per process
+        with self._lock:
+            if self._sweeper is not None and self._sweeper.is_alive():
+                return
+            self._sweeper = threading.Thread(target=self._sweep, daemon=True, name='artifact-sweeper')
+            self._sweeper.start()
+
+    def _sweep(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.evict()
+            except Exception as e:
+                print(f"Artifact eviction failed: {str(e)}")
+
+    def stats(self):
+        """Return artifact counts and sizes by kind, and the quota"""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT kind, COUNT(*), COALESCE(SUM(size), 0) FROM artifacts GROUP BY kind'
+            ).fetchall()
+        total = sum(size for _, _, size in rows)
+        return {
+            'artifacts': sum(count for _, count, _ in rows),
+            'size_mb': round(total / (1024 * 1024), 2),
+            'max_size_mb': round(self.max_bytes / (1024 * 1024), 2),
+            'default_ttl': self.default_ttl,
+            'evictions': self.evictions,
+            'kinds': {kind: {'artifacts': count, 'size_mb': round(size / (1024 * 1024), 2)}
+                      for kind, count, size in rows}
+        }
+
+
+class _Creation:
+    def __init__(self, store, kind, name, ttl):
+        self.store = store
+        self.ttl = ttl
+        self.artifact = store.reserve(kind, name)
+
+    def __enter__(self):
+        return self.artifact
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.store.commit(self.artifact, self.ttl)
+        else:
+            self.store.discard(self.artifact)
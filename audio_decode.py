@@ -0,0 +1,133 @@
+"""
+Audio decoding through ffmpeg.
+
+Audio is decoded straight into memory as 16 kHz mono float32 samples, which
+is what Whisper consumes, so the rest of the pipeline can work on one
+array: its length gives the duration for real-time factor reporting and it
+can be chunked or windowed without decoding again. ffmpeg detection is done
+once and cached instead of spawning `ffmpeg -version` per request.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+
+SAMPLE_RATE = 16000
+PIPE_CHUNK_SIZE = 1024 * 1024
+
+_ffmpeg_status = None
+_ffmpeg_lock = threading.Lock()
+
+
+def detect_ffmpeg(refresh=False):
+    """
+    Return (available, path) for ffmpeg, probing it only on first use.
+
+    Pass refresh=True to probe again, e.g. after installing ffmpeg.
+    """
+    global _ffmpeg_status
+    with _ffmpeg_lock:
+        if _ffmpeg_status is None or refresh:
+            _ffmpeg_status = _probe_ffmpeg()
+        return _ffmpeg_status
+
+
+def _probe_ffmpeg():
+    ffmpeg_path = shutil.which('ffmpeg')
+    if ffmpeg_path is None:
+        return False, None
+    try:
+        # Try to get version to verify it works
+        result = subprocess.run([ffmpeg_path, '-version'],
+                                capture_output=True,
+                                timeout=5,
+                                text=True)
+        if result.returncode == 0:
+            return True, ffmpeg_path
+    except (subprocess.TimeoutExpired, FileNotFoundError, Exception):
+        pass
+    return False, None
+
+
+def decode_audio(source, sample_rate=SAMPLE_RATE):
+    """
+    Decode audio to a mono float32 array at sample_rate.
+
+    source may be a file path, which ffmpeg reads directly (needed for
+    containers such as MP4 that keep their index at the end), or bytes or
+    a binary file object, which are piped into ffmpeg's stdin.
+    """
+    available, ffmpeg_path = detect_ffmpeg()
+    if not available:
+        raise Exception("FFmpeg is not installed or not found in PATH")
+
+    piped = not isinstance(source, (str, os.PathLike))
+    cmd = [
+        ffmpeg_path, '-hide_banner', '-loglevel', 'error', '-threads', '0',
+        '-i', 'pipe:0' if piped else os.fspath(source),
+        '-vn', '-sn', '-dn',
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(sample_rate), 'pipe:1'
+    ]
+    if not piped:
+        cmd.insert(1, '-nostdin')
+
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.PIPE if piped else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+
+    stderr_chunks = []
+    threads = [threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()),
+                                daemon=True)]
+    if piped:
+        threads.append(threading.Thread(target=_feed_stdin, args=(process.stdin, source),
+                                        daemon=True))
+    for thread in threads:
+        thread.start()
+
+    pcm = process.stdout.read()
+    process.wait()
+    for thread in threads:
+        thread.join()
+
+    if process.returncode != 0:
+        message = b''.join(stderr_chunks).decode(errors='ignore').strip()
+        raise Exception(f"Failed to decode audio: {message}")
+    # Imported here so processes that never transcribe never load numpy
+    import numpy as np
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+
+def _feed_stdin(stdin, source):
+    try:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            stdin.write(source)
+        else:
+            while True:
+                chunk = source.read(PIPE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                stdin.write(chunk)
+    except (BrokenPipeError, OSError):
+        # ffmpeg stopped reading; its exit status reports why
+        pass
+    finally:
+        try:
+            stdin.close()
+        except OSError:
+            pass
+
+
+def audio_duration(audio, sample_rate=SAMPLE_RATE):
+    """Duration in seconds of a decoded array"""
+    return len(audio) / sample_rate
+
+
+def real_time_factor(processing_seconds, duration_seconds):
+    """Processing time per second of audio; below 1 is faster than real time"""
+    if not duration_seconds:
+        return None
+    return round(processing_seconds / duration_seconds, 3)
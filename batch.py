@@ -0,0 +1,130 @@
+"""
+Helpers for batch requests: many files in, one streamed zip out.
+
+Uploaded zip archives are expanded into individual uploads, item names are
+made unique so results never overwrite each other, and results are written
+into a zip archive that is produced incrementally, so each item's files can
+be sent to the client as soon as that item finishes.
+"""
+
+import os
+import zipfile
+
+from werkzeug.datastructures import FileStorage
+
+from ingest import ingest_upload
+
+COPY_CHUNK_SIZE = 256 * 1024
+
+
+class _ZipBuffer:
+    """Write-only, unseekable sink that collects zip output until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ZipStream:
+    """
+    A zip archive written on the fly.
+
+    Each method is a generator yielding the archive bytes produced so far,
+    for use inside a streaming response.
+    """
+
+    def __init__(self):
+        self._buffer = _ZipBuffer()
+        # An unseekable target makes zipfile write data descriptors after each member
+        self._zip = zipfile.ZipFile(self._buffer, 'w', compression=zipfile.ZIP_DEFLATED)
+
+    def add_file(self, arcname, path):
+        with open(path, 'rb') as source, self._zip.open(arcname, 'w', force_zip64=True) as target:
+            while True:
+                chunk = source.read(COPY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                target.write(chunk)
+                data = self._buffer.drain()
+                if data:
+                    yield data
+        yield self._buffer.drain()
+
+    def add_bytes(self, arcname, data):
+        self._zip.writestr(arcname, data)
+        yield self._buffer.drain()
+
+    def close(self):
+        self._zip.close()
+        yield self._buffer.drain()
+
+
+def expand_archives(uploads, upload_folder, max_size, max_files):
+    """
+    Replace uploaded .zip files by uploads of the files they contain.
+
+    Each member is copied with the same size limit as a direct upload.
+    Directories, hidden files and macOS resource forks are skipped. Raises
+    ValueError if the batch would exceed max_files items.
+    """
+    expanded = []
+    try:
+        for upload in uploads:
+            if not upload.filename.lower().endswith('.zip'):
+                expanded.append(upload)
+                continue
+            try:
+                with zipfile.ZipFile(upload.filepath) as archive:
+                    for member in archive.infolist():
+                        name = os.path.basename(member.filename)
+                        if (member.is_dir() or not name or name.startswith('.')
+                                or member.filename.startswith('__MACOSX/')):
+                            continue
+                        if len(expanded) >= max_files:
+                            raise ValueError(f'Too many files in batch. Maximum: {max_files}')
+                        with archive.open(member) as stream:
+                            expanded.append(ingest_upload(FileStorage(stream=stream, filename=name),
+                                                          upload_folder, max_size))
+            except zipfile.BadZipFile:
+                raise ValueError(f'{upload.filename} is not a valid zip archive')
+            finally:
+                upload.discard()
+        if len(expanded) > max_files:
+            raise ValueError(f'Too many files in batch. Maximum: {max_files}')
+    except Exception:
+        for upload in expanded + uploads:
+            upload.discard()
+        raise
+    return expanded
+
+
+def make_names_unique(uploads):
+    """
+    Rename uploads whose names differ only in extension or repeat exactly.
+
+    Result files are named after the upload without its extension, so
+    "talk.mp3" and "talk.wav" in one batch would otherwise overwrite each
+    other's transcription.
+    """
+    seen = set()
+    for upload in uploads:
+        base_name, ext = os.path.splitext(upload.filename)
+        candidate = base_name
+        counter = 2
+        while candidate.lower() in seen:
+            candidate = f"{base_name}_{counter}"
+            counter += 1
+        seen.add(candidate.lower())
+        upload.filename = candidate + ext
+    return uploads
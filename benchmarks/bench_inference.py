@@ -0,0 +1,197 @@
+"""
+Speed and accuracy of Whisper inference settings on CPU.
+
+Transcribes the benchmark audio with each precision (see inference.py)
+and torch thread count, and reports per setting the model load time,
+parameter memory, real-time factor, speed-up over the first setting and
+word error rate (WER) against reference transcripts.
+
+References come from --corpus: a folder of audio files, each next to a
+transcript with the same name ending in .txt (a LibriSpeech or Common
+Voice sample works well). Without one, the synthetic recordings of
+corpus.py are used and the first setting's transcripts are the reference,
+so WER shows how far each setting drifts from it rather than true accuracy.
+
+Usage:
+    python benchmarks/bench_inference.py [--corpus DIR] [--model base] [--precisions fp32,int8]
+        [--threads 0,4] [--runs 2] [--output report.json]
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from corpus import make_speech_wav  # noqa: E402
+
+
+def normalize_words(text):
+    """Lower-case words without punctuation, as WER is usually scored"""
+    return re.sub(r"[^\w\s']", ' ', text.lower()).split()
+
+
+def word_edits(reference, hypothesis):
+    """Word-level edit distance (substitutions, deletions and insertions)"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_word in enumerate(reference, start=1):
+        current = [i]
+        for j, hyp_word in enumerate(hypothesis, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (ref_word != hyp_word)))
+        previous = current
+    return previous[-1]
+
+
+def word_error_rate(references, hypotheses):
+    """Corpus WER: total word edits over total reference words"""
+    edits = words = 0
+    for reference, hypothesis in zip(references, hypotheses):
+        reference, hypothesis = normalize_words(reference), normalize_words(hypothesis)
+        edits += word_edits(reference, hypothesis)
+        words += len(reference)
+    return edits / words if words else None
+
+
+def load_corpus(directory):
+    """[(audio path, reference text or None)] for the audio files in directory"""
+    from transcribe_batch import collect_inputs
+    items = []
+    for path in collect_inputs([directory]):
+        reference_path = os.path.splitext(path)[0] + '.txt'
+        reference = None
+        if os.path.exists(reference_path):
+            with open(reference_path, encoding='utf-8') as f:
+                reference = f.read()
+        items.append((path, reference))
+    return items
+
+
+def synthetic_corpus(directory, audio_seconds, seed=0):
+    """The speech-like recordings of the benchmark suite, without references"""
+    os.makedirs(directory, exist_ok=True)
+    items = []
+    for index, seconds in enumerate(audio_seconds):
+        # Same names as build_corpus, so the suite and this benchmark share the files
+        path = os.path.join(directory, f"speech_{seconds}s.wav")
+        if not os.path.exists(path):
+            make_speech_wav(path, seconds, seed=seed + index)
+        items.append((path, None))
+    return items
+
+
+def run_setting(engine, model_name, audios, runs, language):
+    """Load the model with engine and transcribe every recording; returns timings and texts"""
+    from inference import transcribe
+    from model_registry import model_memory_bytes, warm_up_model
+
+    engine.configure_threads()
+    start = time.perf_counter()
+    model = engine.load(model_name)
+    load_seconds = time.perf_counter() - start
+    warm_up_model(model)
+
+    texts = []
+    seconds = 0.0
+    for audio in audios:
+        best = None
+        for _ in range(max(1, runs)):
+            start = time.perf_counter()
+            result = transcribe(model, audio, language=language, task='transcribe', temperature=0)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        texts.append(result['text'].strip())
+        seconds += best
+    memory = model_memory_bytes(model)
+    del model
+    return {
+        'load_seconds': round(load_seconds, 2),
+        'memory_mb': round(memory / (1024 * 1024), 1),
+        'transcribe_seconds': round(seconds, 2),
+        'texts': texts
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark Whisper precision and thread settings on CPU')
+    parser.add_argument('--corpus', help='folder of audio files with same-named .txt reference transcripts')
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'bench-corpus', 'seed0'),
+                        help='where synthetic recordings are kept when --corpus is not given')
+    parser.add_argument('--audio-seconds', default='10,60', help='lengths of the synthetic recordings')
+    parser.add_argument('--model', default='base', help='Whisper model (default: base)')
+    parser.add_argument('--precisions', default='fp32,int8', help='comma-separated precisions to compare')
+    parser.add_argument('--threads', default='0',
+                        help="comma-separated torch thread counts; 0 is torch's default (default: 0)")
+    parser.add_argument('--runs', type=int, default=2, help='transcriptions per file; the fastest is timed')
+    parser.add_argument('--language', default=None, help='language code, or detect it per file')
+    parser.add_argument('--output', help='JSON report path')
+    args = parser.parse_args()
+
+    import torch
+    from audio_decode import audio_duration, decode_audio, detect_ffmpeg
+    from inference import InferenceEngine
+
+    if not detect_ffmpeg()[0]:
+        parser.error('FFmpeg not found')
+    if args.corpus:
+        items = load_corpus(args.corpus)
+    else:
+        items = synthetic_corpus(args.corpus_dir,
+                                 [int(value) for value in args.audio_seconds.split(',') if value.strip()])
+    audios = [decode_audio(path) for path, _ in items]
+    total_seconds = sum(audio_duration(audio) for audio in audios)
+    with_references = [index for index, (_, reference) in enumerate(items) if reference is not None]
+    print(f"{len(items)} recordings, {total_seconds:.0f}s of audio, "
+          f"{len(with_references)} with reference transcripts")
+
+    # 0 is resolved now, as earlier settings change torch's thread count
+    default_threads = torch.get_num_threads()
+    settings = [(precision.strip(), int(threads) or default_threads)
+                for precision in args.precisions.split(',') if precision.strip()
+                for threads in args.threads.split(',') if threads.strip()]
+    results = {}
+    baseline = None
+    reference_label = 'reference' if with_references else None
+    print(f"{'setting':<18} {'load':>7} {'memory':>8} {'RTF':>7} {'speed-up':>9} {'WER':>7}")
+    for precision, threads in settings:
+        name = f"{precision}, {threads} threads"
+        engine = InferenceEngine('cpu', precision, threads, 0)
+        result = run_setting(engine, args.model, audios, args.runs, args.language)
+        result['real_time_factor'] = round(result['transcribe_seconds'] / total_seconds, 3)
+        if baseline is None:
+            baseline = result
+            if not with_references:
+                reference_label = name
+        result['speed_up'] = round(baseline['transcribe_seconds'] / result['transcribe_seconds'], 2)
+        if with_references:
+            wer = word_error_rate([items[index][1] for index in with_references],
+                                  [result['texts'][index] for index in with_references])
+        else:
+            wer = word_error_rate(baseline['texts'], result['texts'])
+        result['wer'] = round(wer, 4) if wer is not None else None
+        results[name] = result
+        wer_text = f"{wer * 100:6.1f}%" if wer is not None else '      -'
+        print(f"{name:<18} {result['load_seconds']:6.2f}s {result['memory_mb']:6.0f}MB "
+              f"{result['real_time_factor']:7.3f} {result['speed_up']:8.2f}x {wer_text}")
+    print(f"WER against {reference_label}")
+
+    if args.output:
+        report = {
+            'model': args.model,
+            'audio_seconds': round(total_seconds, 2),
+            'wer_reference': reference_label,
+            'files': [os.path.basename(path) for path, _ in items],
+            'settings': results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
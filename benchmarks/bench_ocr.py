@@ -0,0 +1,92 @@
+"""
+Per-page OCR latency on a synthetic multi-page scan.
+
+Renders a text-only PDF made of page images (no text layer, like a
+scanner produces) and OCRs it two ways:
+
+  before  one pytesseract.image_to_string call, and so one tesseract
+          process, per page
+  after   the shared OcrEngine (tesserocr workers if installed, otherwise
+          batched tesseract invocations)
+
+Both use the same number of workers and the same rendering DPI.
+
+Usage:
+    python benchmarks/bench_ocr.py [--pages 20] [--workers 4] [--dpi 200] [--engine auto]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytesseract
+from pdf2image import convert_from_path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import make_scanned_pdf  # noqa: E402
+from ocr_engine import OcrEngine  # noqa: E402
+from ocr_pages import ocr_pdf_pages  # noqa: E402
+
+
+def bench_before(pdf_path, pages, workers, dpi):
+    def ocr_page(page_number):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = convert_from_path(pdf_path, dpi=dpi, first_page=page_number, last_page=page_number,
+                                      output_folder=temp_dir, fmt='png', paths_only=True)
+            return pytesseract.image_to_string(paths[0])
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(ocr_page, range(1, pages + 1)))
+
+
+def bench_after(engine, pdf_path, pages, dpi):
+    texts = []
+    ocr_pdf_pages(pdf_path, list(range(1, pages + 1)), engine, dpi=dpi,
+                  on_page=lambda page_number, text: texts.append(text))
+    return texts
+
+
+def report(label, elapsed, pages):
+    print(f"{label:<8} {elapsed:8.2f}s total  {elapsed / pages * 1000:8.1f} ms/page")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark per-page OCR latency')
+    parser.add_argument('--pages', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--dpi', type=int, default=200)
+    parser.add_argument('--engine', default='auto', help='auto, tesserocr or cli')
+    parser.add_argument('--batch-pages', type=int, default=8)
+    args = parser.parse_args()
+
+    engine = OcrEngine(workers=args.workers, backend=args.engine, batch_pages=args.batch_pages)
+    print(f"{args.pages} pages, {args.workers} workers, {args.dpi} dpi, engine: {engine.backend}")
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        pdf_path = os.path.join(temp_dir, 'scan.pdf')
+        make_scanned_pdf(pdf_path, args.pages, args.dpi)
+
+        start = time.perf_counter()
+        before = bench_before(pdf_path, args.pages, args.workers, args.dpi)
+        report('before', time.perf_counter() - start, args.pages)
+
+        # The first request pays for loading language data once per worker
+        start = time.perf_counter()
+        after = bench_after(engine, pdf_path, args.pages, args.dpi)
+        report('after', time.perf_counter() - start, args.pages)
+
+        start = time.perf_counter()
+        bench_after(engine, pdf_path, args.pages, args.dpi)
+        report('warm', time.perf_counter() - start, args.pages)
+
+    engine.shutdown()
+    matching = sum(a.split() == b.split() for a, b in zip(before, after))
+    print(f"{matching}/{args.pages} pages produced identical words")
+
+
+if __name__ == '__main__':
+    main()
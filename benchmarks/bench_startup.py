@@ -0,0 +1,72 @@
+"""
+Startup time and memory per capability profile.
+
+Imports app.py in a fresh interpreter for each profile (the CAPABILITIES
+setting) and reports how long the import took and the resident memory
+afterwards, then loads the profile's libraries as a preloading server
+does and reports each capability's import time and the memory it added.
+
+Usage:
+    python benchmarks/bench_startup.py [--profiles all,transcription,ocr+conversion,conversion]
+        [--runs 3]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Run in the child interpreter, whose only output line is the JSON result
+CHILD = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter() - start
+stats = app.capabilities.stats()
+app.capabilities.preload()
+loaded = app.capabilities.stats()
+print(json.dumps({'import_seconds': imported, 'baseline_rss_mb': stats['rss_mb'],
+                  'loaded_rss_mb': loaded['rss_mb'], 'capabilities': loaded['capabilities']}))
+"""
+
+
+def measure(profile):
+    """Import the app once in a new process with the given profile"""
+    with tempfile.TemporaryDirectory(prefix='bench-startup-') as work_dir:
+        python_path = os.pathsep.join(filter(None, [REPO_DIR, os.environ.get('PYTHONPATH')]))
+        env = dict(os.environ, CAPABILITIES=profile, PYTHONPATH=python_path,
+                   ARTIFACT_DIR=os.path.join(work_dir, 'artifacts'),
+                   RESULT_CACHE_DIR=os.path.join(work_dir, 'results'),
+                   JOB_STATE_DIR=os.path.join(work_dir, 'jobs'),
+                   TRANSLATION_MEMORY_PATH=os.path.join(work_dir, 'translation_memory.sqlite3'))
+        result = subprocess.run([sys.executable, '-c', CHILD], cwd=work_dir, env=env,
+                                capture_output=True, text=True)
+    if result.returncode != 0:
+        raise Exception(f"Profile '{profile}' failed:\n{result.stderr.strip()}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark startup time and memory per capability profile')
+    parser.add_argument('--profiles', default='all,transcription,ocr+conversion,conversion',
+                        help="comma-separated profiles; join capabilities within one with '+'")
+    parser.add_argument('--runs', type=int, default=3, help='imports per profile; the fastest is reported')
+    args = parser.parse_args()
+
+    print(f"{'profile':<28} {'import':>8} {'RSS':>8} {'loaded':>8}  capability imports")
+    for profile in args.profiles.split(','):
+        profile = profile.replace('+', ',')
+        runs = [measure(profile) for _ in range(max(1, args.runs))]
+        best = min(runs, key=lambda run: run['import_seconds'])
+        loads = ', '.join(f"{name} {info['import_seconds']:.2f}s +{info['rss_mb']} MB"
+                          for name, info in best['capabilities'].items() if info['loaded'])
+        print(f"{profile:<28} {best['import_seconds']:7.2f}s {best['baseline_rss_mb']:6.0f}MB "
+              f"{best['loaded_rss_mb']:6.0f}MB  {loads or '-'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,392 @@
+"""
+Benchmark suite for transcription, OCR and document conversion.
+
+Generates a synthetic corpus (speech-like WAVs, text and scanned PDFs, a
+text image, large xlsx, csv and txt files; see corpus.py) and drives the
+service's entry points on it:
+
+  direct  the view functions upload_file and convert_document in a
+          request context, and perform_ocr called on the file
+  client  the same endpoints through the Flask test client
+  cli     transcribe_file.transcribe_file, as the command line runs it
+
+Each scenario runs once to warm up (reported as cold_ms) and then at each
+concurrency level, recording latency percentiles, throughput, peak RSS
+and, for audio, the real-time factor. The results are written to a JSON
+report with stable keys so reports from two commits can be diffed or
+compared with --compare.
+
+Usage:
+    python benchmarks/bench_suite.py [--output report.json] [--concurrency 1,4]
+        [--iterations 5] [--only convert,ocr,transcribe] [--compare previous.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from corpus import build_corpus  # noqa: E402
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+GROUPS = ('transcribe', 'ocr', 'convert')
+
+CONVERSIONS = [
+    ('pdf', 'txt'),
+    ('xlsx', 'txt'),
+    ('xlsx', 'csv'),
+    ('csv', 'xlsx'),
+    ('txt', 'pdf'),
+    ('txt', 'docx'),
+]
+
+# call() performs one operation and raises on failure; audio_seconds is
+# set for transcription so the real-time factor can be reported
+Scenario = namedtuple('Scenario', ['key', 'call', 'audio_seconds', 'max_concurrency'])
+
+
+def current_rss_bytes():
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def max_rss_mb():
+    """Peak RSS of this process over its lifetime, where the platform reports it"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+class RssSampler:
+    """Samples this process's RSS in the background and keeps the peak"""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            rss = current_rss_bytes()
+            if rss is not None and (self.peak is None or rss > self.peak):
+                self.peak = rss
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def peak_mb(self):
+        return round(self.peak / (1024 * 1024), 1) if self.peak is not None else None
+
+
+def percentile(sorted_values, fraction):
+    """Linearly interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(values, scale=1.0, digits=1):
+    values = sorted(value * scale for value in values)
+    if not values:
+        return None
+    summary = {f"p{int(fraction * 100)}": percentile(values, fraction)
+               for fraction in (0.5, 0.9, 0.95, 0.99)}
+    summary.update(mean=sum(values) / len(values), min=values[0], max=values[-1])
+    return {name: round(value, digits) for name, value in summary.items()}
+
+
+def run_level(scenario, concurrency, requests):
+    """Make `requests` calls with `concurrency` threads and summarise them"""
+    latencies = []
+    errors = []
+
+    def timed_call(_):
+        start = time.perf_counter()
+        try:
+            scenario.call()
+        except Exception as e:
+            errors.append(str(e))
+            return
+        latencies.append(time.perf_counter() - start)
+
+    with RssSampler() as sampler:
+        wall_start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(timed_call, range(requests)))
+        wall = time.perf_counter() - wall_start
+
+    result = {
+        'requests': requests,
+        'errors': len(errors),
+        'wall_s': round(wall, 3),
+        'throughput_per_s': round(len(latencies) / wall, 3) if wall > 0 else None,
+        'latency_ms': summarize(latencies, scale=1000),
+        'peak_rss_mb': sampler.peak_mb
+    }
+    if errors:
+        result['first_error'] = errors[0][:500]
+    if scenario.audio_seconds:
+        result['rtf'] = summarize(latencies, scale=1 / scenario.audio_seconds, digits=3)
+        result['audio_hours_per_hour'] = round(
+            len(latencies) * scenario.audio_seconds / wall, 2) if wall > 0 else None
+    return result
+
+
+def check_response(response):
+    if response.status_code != 200:
+        data = response.get_json(silent=True) or {}
+        raise Exception(f"HTTP {response.status_code}: {data.get('error', response.status)}")
+    return response
+
+
+def call_view(app, view, path, file_path, fields):
+    """Call a view function directly in a request context, skipping the test client"""
+    with open(file_path, 'rb') as f:
+        data = dict(fields, file=(f, os.path.basename(file_path)))
+        with app.test_request_context(path, method='POST', data=data, content_type='multipart/form-data'):
+            return check_response(app.make_response(view()))
+
+
+def call_client(app, path, file_path, fields):
+    with open(file_path, 'rb') as f:
+        data = dict(fields, file=(f, os.path.basename(file_path)))
+        return check_response(app.test_client().post(path, data=data, content_type='multipart/form-data'))
+
+
+def call_cli(transcribe_file, file_path, model_name):
+    # The CLI narrates every step; keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()):
+        success = transcribe_file.transcribe_file(file_path, model_name)
+    if not success:
+        raise Exception("transcribe_file reported a failure")
+
+
+def build_scenarios(app_module, corpus, groups, model_name):
+    """Return (scenarios, {key: skip reason}) for the requested groups"""
+    app = app_module.app
+    scenarios = []
+    skipped = {}
+
+    def add(key, call, audio_seconds=None, max_concurrency=None):
+        scenarios.append(Scenario(key, call, audio_seconds, max_concurrency))
+
+    by_kind = {}
+    for name, item in corpus.items():
+        by_kind.setdefault(item['kind'], []).append((name, item))
+
+    if 'transcribe' in groups:
+        if not app_module.check_ffmpeg()[0]:
+            skipped['transcribe'] = 'FFmpeg not found'
+        else:
+            import transcribe_file
+            fields = {'model': model_name, 'target_language': ''}
+            for name, item in by_kind.get('audio', []):
+                path, seconds = item['path'], item['seconds']
+                add(f"transcribe/{name}/direct",
+                    lambda path=path: call_view(app, app_module.upload_file, '/upload', path, fields), seconds)
+                add(f"transcribe/{name}/client",
+                    lambda path=path: call_client(app, '/upload', path, fields), seconds)
+                # One CLI process transcribes one file at a time
+                add(f"transcribe/{name}/cli",
+                    lambda path=path: call_cli(transcribe_file, path, model_name), seconds, max_concurrency=1)
+
+    if 'ocr' in groups:
+        if not app_module.OCR_AVAILABLE or not shutil.which(app_module.get_ocr_engine().tesseract_cmd):
+            skipped['ocr'] = 'Tesseract OCR not available'
+        else:
+            items = list(by_kind.get('image', []))
+            if app_module.PDF2IMAGE_AVAILABLE:
+                items += by_kind.get('scanned_pdf', [])
+            else:
+                skipped['ocr/scanned_pdf'] = 'pdf2image not available'
+            for name, item in items:
+                path = item['path']
+                add(f"ocr/{name}/direct", lambda path=path: app_module.perform_ocr(path))
+                add(f"ocr/{name}/client", lambda path=path: call_client(app, '/ocr', path, {}))
+
+    if 'convert' in groups:
+        from converters import find_route
+        for source_format, target_format in CONVERSIONS:
+            if not find_route(source_format, target_format):
+                skipped[f"convert/{source_format}-{target_format}"] = 'no converter available'
+                continue
+            for name, item in by_kind.get(source_format, []):
+                path = item['path']
+                fields = {'target_format': target_format}
+                key = f"convert/{name}-{target_format}"
+                add(f"{key}/direct",
+                    lambda path=path, fields=fields: call_view(app, app_module.convert_document,
+                                                               '/convert-document', path, fields))
+                add(f"{key}/client",
+                    lambda path=path, fields=fields: call_client(app, '/convert-document', path, fields))
+
+    return scenarios, skipped
+
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                text=True, timeout=10).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                    cwd=REPO_DIR, capture_output=True, text=True, timeout=10).stdout.strip())
+        return commit or None, dirty
+    except (OSError, subprocess.SubprocessError):
+        return None, None
+
+
+def compare_reports(previous, current):
+    """Print the p50 latency change of every scenario and level in both reports"""
+    print()
+    print(f"{'scenario':<48} {'conc':>4} {'before ms':>10} {'after ms':>10} {'change':>8}")
+    for key in sorted(set(previous['results']) & set(current['results'])):
+        old_levels = previous['results'][key].get('levels', {})
+        new_levels = current['results'][key].get('levels', {})
+        for level in sorted(set(old_levels) & set(new_levels), key=int):
+            old = (old_levels[level].get('latency_ms') or {}).get('p50')
+            new = (new_levels[level].get('latency_ms') or {}).get('p50')
+            if old and new:
+                print(f"{key:<48} {level:>4} {old:>10.1f} {new:>10.1f} {(new - old) / old * 100:>7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark transcription, OCR and document conversion')
+    parser.add_argument('--output', default='benchmark-report.json', help='JSON report path')
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'bench-corpus'),
+                        help='where generated inputs are kept between runs')
+    parser.add_argument('--concurrency', default='1,4', help='comma-separated concurrency levels')
+    parser.add_argument('--iterations', type=int, default=5,
+                        help='requests per level (at least the concurrency level)')
+    parser.add_argument('--only', default=','.join(GROUPS), help=f"groups to run: {', '.join(GROUPS)}")
+    parser.add_argument('--model', default='tiny', help='Whisper model for transcription (default: tiny)')
+    parser.add_argument('--audio-seconds', default='10,60', help='lengths of the generated recordings')
+    parser.add_argument('--pdf-pages', default='5,100', help='page counts of the generated text PDFs')
+    parser.add_argument('--table-rows', type=int, default=20000, help='rows per sheet and in the CSV')
+    parser.add_argument('--text-lines', type=int, default=5000, help='lines in the generated text file')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--compare', help='earlier report to compare p50 latencies against')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    groups = [group.strip() for group in args.only.split(',') if group.strip()]
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown group(s): {', '.join(sorted(unknown))}")
+    output_path = os.path.abspath(args.output)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    corpus_dir = os.path.join(args.corpus_dir, f"seed{args.seed}")
+    print(f"Generating corpus in {corpus_dir}...")
+    corpus = build_corpus(
+        corpus_dir,
+        audio_seconds=[int(value) for value in args.audio_seconds.split(',') if value.strip()],
+        pdf_pages=[int(value) for value in args.pdf_pages.split(',') if value.strip()],
+        table_rows=args.table_rows,
+        text_lines=args.text_lines,
+        seed=args.seed
+    )
+
+    # Repeated inputs must be processed every time, not answered from the cache
+    os.environ['RESULT_CACHE_ENABLED'] = 'false'
+    os.environ['WHISPER_MODEL'] = args.model
+    os.environ['WHISPER_PRELOAD_MODELS'] = args.model
+    work_dir = tempfile.mkdtemp(prefix='bench-suite-')
+    os.chdir(work_dir)
+    import app as app_module
+
+    scenarios, skipped = build_scenarios(app_module, corpus, groups, args.model)
+    for key, reason in skipped.items():
+        print(f"skipped  {key}: {reason}")
+
+    commit, dirty = git_revision()
+    report = {
+        'meta': {
+            'commit': commit,
+            'dirty': dirty,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'args': vars(args)
+        },
+        'corpus': {name: {field: value for field, value in item.items() if field != 'path'}
+                   for name, item in corpus.items()},
+        'skipped': skipped,
+        'results': {}
+    }
+
+    try:
+        for scenario in scenarios:
+            # The first call loads models and fills caches; it is reported on its own
+            start = time.perf_counter()
+            try:
+                scenario.call()
+                result = {'cold_ms': round((time.perf_counter() - start) * 1000, 1), 'levels': {}}
+            except Exception as e:
+                print(f"failed   {scenario.key}: {str(e)}")
+                report['results'][scenario.key] = {'error': str(e)[:500]}
+                continue
+
+            for concurrency in levels:
+                if scenario.max_concurrency and concurrency > scenario.max_concurrency:
+                    continue
+                level = run_level(scenario, concurrency, max(args.iterations, concurrency))
+                result['levels'][str(concurrency)] = level
+                latency = level['latency_ms'] or {}
+                print(f"{scenario.key:<48} x{concurrency:<3} p50 {latency.get('p50', 0):>9.1f} ms  "
+                      f"p95 {latency.get('p95', 0):>9.1f} ms  {level['throughput_per_s']:>7.2f}/s  "
+                      f"errors {level['errors']}")
+            report['results'][scenario.key] = result
+    finally:
+        report['meta']['max_rss_mb'] = max_rss_mb()
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        os.chdir(REPO_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+        print(f"Report written to {output_path}")
+
+    if compare_path:
+        with open(compare_path, 'r', encoding='utf-8') as f:
+            compare_reports(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+"""
+Transcript formatting cost on a synthetic multi-hour transcript.
+
+Builds Whisper-style segments for several hours of speech and formats
+them two ways:
+
+  before  the old path: join all segment text into one string, then
+          re-split it into sentences with regular expressions
+  after   transcript_output: sentences, SRT, WebVTT and JSON written
+          from the segments in one pass each
+
+Time and peak Python memory (tracemalloc) are reported per output.
+
+Usage:
+    python benchmarks/bench_transcript_output.py [--hours 3] [--segment-seconds 4]
+"""
+
+import argparse
+import io
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transcript_output import OUTPUT_FORMATS, WRITERS, compact_segments  # noqa: E402
+
+SAMPLE_SENTENCES = [
+    "So the first thing we did was measure the soil moisture every morning.",
+    "It worked better than we expected",
+    "and the yields went up by almost a third.",
+    "Why does that matter?",
+    "Because the farmers could plan the harvest weeks ahead!",
+    "We also tried a second plot with a different irrigation schedule.",
+]
+
+
+def make_segments(hours, segment_seconds):
+    """Whisper-style segments covering the given number of hours"""
+    segments = []
+    start = 0.0
+    total = hours * 3600
+    index = 0
+    while start < total:
+        end = start + segment_seconds
+        text = ' ' + SAMPLE_SENTENCES[index % len(SAMPLE_SENTENCES)]
+        segments.append({'id': index, 'seek': 0, 'start': start, 'end': end, 'text': text,
+                         'tokens': list(range(20)), 'temperature': 0.0,
+                         'avg_logprob': -0.2, 'compression_ratio': 1.4, 'no_speech_prob': 0.01})
+        start = end
+        index += 1
+    return segments
+
+
+def legacy_format(text):
+    """The regex splitter the app and CLI used before transcript_output"""
+    if not text:
+        return text
+    text = re.sub(r'\s+', ' ', text.strip())
+    parts = re.split(r'([.!?])\s+([A-Z])', text)
+    if len(parts) == 1:
+        return text
+    formatted_lines = []
+    i = 0
+    while i < len(parts):
+        if i == 0:
+            if parts[i].strip():
+                formatted_lines.append(parts[i].strip())
+        elif i + 1 < len(parts):
+            if formatted_lines:
+                formatted_lines[-1] += parts[i]
+            else:
+                formatted_lines.append(parts[i])
+            if parts[i + 1].strip():
+                formatted_lines.append(parts[i + 1].strip())
+            i += 1
+        else:
+            if parts[i].strip():
+                if formatted_lines:
+                    formatted_lines[-1] += " " + parts[i].strip()
+                else:
+                    formatted_lines.append(parts[i].strip())
+        i += 1
+    result = '\n'.join(line.strip() for line in formatted_lines if line.strip())
+    return re.sub(r'\n{3,}', '\n\n', result)
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def report(label, elapsed, peak):
+    print(f"{label:<12} {elapsed * 1000:10.1f} ms  {peak / (1024 * 1024):8.1f} MB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark transcript output formatting')
+    parser.add_argument('--hours', type=float, default=3)
+    parser.add_argument('--segment-seconds', type=float, default=4)
+    args = parser.parse_args()
+
+    segments = make_segments(args.hours, args.segment_seconds)
+    print(f"{args.hours:g} hours, {len(segments)} segments")
+
+    def before():
+        text = ''.join(segment['text'] for segment in segments)
+        io.StringIO().write(legacy_format(text))
+
+    report('before txt', *measure(before))
+
+    compact = compact_segments(segments)
+    report('compact', *measure(lambda: compact_segments(segments)))
+    for fmt in OUTPUT_FORMATS:
+        report(f'after {fmt}', *measure(
+            lambda: WRITERS[fmt](compact, io.StringIO(), language='en', duration=args.hours * 3600)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Synthetic benchmark inputs.
+
+Every generator is deterministic for a given seed, so runs on different
+commits measure the same files.
+"""
+
+import csv
+import os
+import wave
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+SAMPLE_LINES = [
+    "The quick brown fox jumps over the lazy dog.",
+    "Pack my box with five dozen liquor jugs.",
+    "Sphinx of black quartz, judge my vow.",
+    "How vexingly quick daft zebras jump.",
+]
+
+
+def make_speech_wav(path, seconds, seed=0, sample_rate=SAMPLE_RATE):
+    """
+    Write a mono 16-bit WAV that sounds roughly like speech: a voiced
+    harmonic tone with a drifting pitch, shaped into syllables at about
+    4 Hz and broken up by pauses, over light background noise.
+    """
+    rng = np.random.default_rng(seed)
+    samples = int(seconds * sample_rate)
+    t = np.arange(samples) / sample_rate
+
+    # Pitch drifts between about 100 and 220 Hz
+    pitch = 160 + 60 * np.sin(2 * np.pi * 0.2 * t + rng.uniform(0, np.pi))
+    phase = 2 * np.pi * np.cumsum(pitch) / sample_rate
+    voice = sum(np.sin(harmonic * phase) / harmonic for harmonic in range(1, 6))
+
+    syllables = 0.5 * (1 + np.sin(2 * np.pi * 4 * t)) ** 2
+    # Pauses of 0.3-1.2 s every 2-6 s
+    speaking = np.ones(samples)
+    position = 0.0
+    while position < seconds:
+        position += rng.uniform(2, 6)
+        start = int(position * sample_rate)
+        position += rng.uniform(0.3, 1.2)
+        speaking[start:int(position * sample_rate)] = 0
+
+    audio = 0.3 * voice * syllables * speaking + 0.01 * rng.standard_normal(samples)
+    pcm = (np.clip(audio, -1, 1) * 32767).astype(np.int16)
+    with wave.open(path, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+
+
+def _font(size):
+    from PIL import ImageFont
+    try:
+        return ImageFont.truetype('DejaVuSans.ttf', size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def make_text_image(path, lines=30, dpi=200, label='Image'):
+    """Write an A4 page image of printed text"""
+    from PIL import Image, ImageDraw
+    width, height = int(8.27 * dpi), int(11.69 * dpi)
+    font = _font(dpi // 8)
+    image = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(image)
+    y = dpi // 2
+    draw.text((dpi // 2, y), label, fill=0, font=font)
+    for line in range(lines):
+        y += dpi // 4
+        draw.text((dpi // 2, y), SAMPLE_LINES[line % len(SAMPLE_LINES)], fill=0, font=font)
+    if path:
+        image.save(path)
+    return image
+
+
+def make_scanned_pdf(path, pages, dpi):
+    """Write a PDF whose pages are images of text"""
+    images = [make_text_image(None, dpi=dpi, label=f"Page {page_number}")
+              for page_number in range(1, pages + 1)]
+    images[0].save(path, save_all=True, append_images=images[1:], resolution=dpi)
+
+
+def make_text_pdf(path, pages, lines_per_page=45):
+    """Write a PDF with a text layer on every page"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    pdf = canvas.Canvas(path, pagesize=A4)
+    for page_number in range(1, pages + 1):
+        y = 800
+        pdf.drawString(50, y, f"Page {page_number}")
+        for line in range(lines_per_page):
+            y -= 16
+            pdf.drawString(50, y, SAMPLE_LINES[line % len(SAMPLE_LINES)])
+        pdf.showPage()
+    pdf.save()
+
+
+def make_text_file(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        for line in range(lines):
+            f.write(SAMPLE_LINES[line % len(SAMPLE_LINES)] + '\n')
+
+
+def make_csv(path, rows, columns=10, seed=0):
+    rng = np.random.default_rng(seed)
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([f"column_{column}" for column in range(columns)])
+        for row in range(rows):
+            writer.writerow([row] + [round(value, 4) for value in rng.random(columns - 1)])
+
+
+def make_workbook(path, rows, sheets=3, columns=10, seed=0):
+    """Write an xlsx workbook with a write-only workbook so generation stays fast"""
+    from openpyxl import Workbook
+    rng = np.random.default_rng(seed)
+    wb = Workbook(write_only=True)
+    for sheet in range(sheets):
+        worksheet = wb.create_sheet(f"Sheet{sheet + 1}")
+        worksheet.append([f"column_{column}" for column in range(columns)])
+        for row in range(rows):
+            worksheet.append([row] + [round(float(value), 4) for value in rng.random(columns - 1)])
+    wb.save(path)
+
+
+def build_corpus(directory, audio_seconds=(10, 60), pdf_pages=(5, 100), scanned_pages=4,
+                 table_rows=20000, text_lines=5000, seed=0):
+    """
+    Generate every benchmark input in directory, skipping files already
+    there. Returns {name: {'path', 'kind', ...}}.
+    """
+    os.makedirs(directory, exist_ok=True)
+    corpus = {}
+
+    def add(name, kind, make, **info):
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            make(path)
+        corpus[name] = dict(info, path=path, kind=kind, bytes=os.path.getsize(path))
+
+    for index, seconds in enumerate(audio_seconds):
+        add(f"speech_{seconds}s.wav", 'audio',
+            lambda path: make_speech_wav(path, seconds, seed=seed + index), seconds=seconds)
+    for pages in pdf_pages:
+        add(f"text_{pages}p.pdf", 'pdf', lambda path: make_text_pdf(path, pages), pages=pages)
+    add(f"scanned_{scanned_pages}p.pdf", 'scanned_pdf',
+        lambda path: make_scanned_pdf(path, scanned_pages, 150), pages=scanned_pages)
+    add("text_page.png", 'image', lambda path: make_text_image(path))
+    add(f"table_{table_rows}.xlsx", 'xlsx', lambda path: make_workbook(path, table_rows, seed=seed),
+        rows=table_rows)
+    add(f"table_{table_rows}.csv", 'csv', lambda path: make_csv(path, table_rows, seed=seed),
+        rows=table_rows)
+    add(f"text_{text_lines}.txt", 'txt', lambda path: make_text_file(path, text_lines), lines=text_lines)
+    return corpus
@@ -0,0 +1,227 @@
+"""
+Optional capabilities of the service and the libraries behind them.
+
+Whether a capability can be offered is discovered from the installed
+packages (importlib.util.find_spec) without importing any of them, so
+starting a process costs milliseconds rather than seconds. The libraries
+are imported on first use by Capabilities.load(), which records how long
+the import took and how much resident memory it added.
+
+A process can be limited to a profile of capabilities, e.g. "ocr,conversion"
+for workers that never import torch; work for a capability outside the
+profile is refused.
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+# Startup time is measured from here, so import this module first
+IMPORT_START = time.perf_counter()
+
+# load() imports the installed ones of modules, in order, with environment
+# set for the imports (native libraries such as libgomp read it once, when
+# they are loaded); every module in required must be installed for the
+# capability to be available
+Capability = namedtuple('Capability', ['title', 'modules', 'required', 'environment'], defaults=[{}])
+
+CAPABILITIES = {
+    'transcription': Capability('Transcription', ('numpy', 'torch', 'whisper'),
+                                ('numpy', 'torch', 'whisper')),
+    # OCR workers run in parallel, so each in-process Tesseract stays single-threaded
+    'ocr': Capability('OCR', ('PIL.Image', 'pytesseract', 'pdf2image', 'tesserocr'),
+                      ('PIL', 'pytesseract'), {'OMP_THREAD_LIMIT': '1'}),
+    # Each converter has its own library; formats without one are simply not offered
+    'conversion': Capability('Document conversion',
+                             ('pypdf', 'PyPDF2', 'docx', 'openpyxl', 'reportlab.platypus', 'pdf2docx'), ()),
+    # Custom translation backends need no library
+    'translation': Capability('Translation', ('deep_translator',), ()),
+}
+
+_installed = {}
+
+
+def installed(module):
+    """Whether a top-level module can be imported, found without importing it"""
+    module = module.split('.', 1)[0]
+    if module not in _installed:
+        try:
+            _installed[module] = module in sys.modules or importlib.util.find_spec(module) is not None
+        except (ImportError, ValueError):
+            _installed[module] = False
+    return _installed[module]
+
+
+def parse_profile(spec):
+    """Capability names in a profile such as "ocr,conversion"; "all" or empty selects every one"""
+    if not spec or not spec.strip() or spec.strip().lower() == 'all':
+        return list(CAPABILITIES)
+    names = [name.strip().lower() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in CAPABILITIES]
+    if unknown:
+        raise ValueError(f"Unknown capabilities: {', '.join(unknown)}. "
+                         f"Options: all, {', '.join(CAPABILITIES)}")
+    return [name for name in CAPABILITIES if name in names]
+
+
+def rss_mb():
+    """Resident memory of this process in MB, or None where it cannot be read"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current RSS; Linux reports kilobytes, macOS bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+_environment_lock = threading.Lock()
+
+
+@contextmanager
+def import_environment(environment):
+    """
+    Set environment variables that are not already set for the duration of
+    an import, restoring the process environment afterwards
+    """
+    with _environment_lock:
+        added = [name for name in environment if name not in os.environ]
+        for name in added:
+            os.environ[name] = environment[name]
+        try:
+            yield
+        finally:
+            for name in added:
+                os.environ.pop(name, None)
+
+
+class CapabilityUnavailable(Exception):
+    """Raised for work needing a capability that is disabled or not installed"""
+
+
+class Capabilities:
+    """
+    The capabilities one process offers, with import timings once they are loaded.
+
+    required overrides the modules a capability needs, e.g. when its
+    library depends on configuration.
+    """
+
+    def __init__(self, profile='all', required=None):
+        self.profile = parse_profile(profile)
+        self.required = {name: tuple((required or {}).get(name, capability.required))
+                         for name, capability in CAPABILITIES.items()}
+        self.startup_seconds = None
+        self.baseline_rss_mb = None
+        self._loaded = {}
+        self._locks = {name: threading.Lock() for name in CAPABILITIES}
+
+    def started(self):
+        """Record startup time and baseline memory, once the app is imported and before any loads"""
+        self.startup_seconds = round(time.perf_counter() - IMPORT_START, 3)
+        rss = rss_mb()
+        self.baseline_rss_mb = round(rss, 1) if rss is not None else None
+
+    def enabled(self, name):
+        return name in self.profile
+
+    def missing(self, name):
+        """Required modules of a capability that are not installed"""
+        return [module for module in self.required[name] if not installed(module)]
+
+    def available(self, name):
+        return self.enabled(name) and not self.missing(name)
+
+    def check(self, name):
+        """Raise CapabilityUnavailable unless this process can do the capability's work"""
+        if not self.enabled(name):
+            raise CapabilityUnavailable(
+                f"{CAPABILITIES[name].title} is not enabled on this server "
+                f"(capabilities: {', '.join(self.profile) or 'none'})")
+        missing = self.missing(name)
+        if missing:
+            raise CapabilityUnavailable(
+                f"{CAPABILITIES[name].title} needs {', '.join(missing)} installed")
+
+    def load(self, name):
+        """Import a capability's libraries on first use; later calls return at once"""
+        if name in self._loaded:
+            return
+        self.check(name)
+        with self._locks[name]:
+            if name in self._loaded:
+                return
+            rss_before = rss_mb()
+            start = time.perf_counter()
+            errors = {}
+            with import_environment(CAPABILITIES[name].environment):
+                for module in CAPABILITIES[name].modules:
+                    if installed(module):
+                        try:
+                            importlib.import_module(module)
+                        except Exception as e:
+                            # A broken optional library only takes its own formats away
+                            errors[module] = str(e)
+                            print(f"Could not import {module}: {str(e)}")
+            rss_after = rss_mb()
+            self._loaded[name] = {
+                'import_seconds': round(time.perf_counter() - start, 3),
+                'rss_mb': round(rss_after - rss_before, 1) if rss_before is not None else None,
+                'import_errors': errors
+            }
+
+    def preload(self, names=None):
+        """Load each available capability of the profile (or of names), skipping failures"""
+        for name in names or self.profile:
+            if self.available(name):
+                try:
+                    self.load(name)
+                except Exception as e:
+                    print(f"Failed to load {CAPABILITIES[name].title}: {str(e)}")
+
+    def stats(self):
+        """Profile, memory and per-capability availability and import timings"""
+        current = rss_mb()
+        return {
+            'profile': list(self.profile),
+            'startup_seconds': self.startup_seconds,
+            'baseline_rss_mb': self.baseline_rss_mb,
+            'rss_mb': round(current, 1) if current is not None else None,
+            'capabilities': {
+                name: dict({
+                    'enabled': self.enabled(name),
+                    'available': self.available(name),
+                    'missing': self.missing(name),
+                    'loaded': name in self._loaded
+                }, **self._loaded.get(name, {}))
+                for name in CAPABILITIES
+            }
+        }
+
+    def report(self):
+        """A few lines for the startup log"""
+        stats = self.stats()
+        lines = [f"Capabilities: {', '.join(stats['profile']) or 'none'} (started in "
+                 f"{stats['startup_seconds']}s, baseline RSS {stats['baseline_rss_mb']} MB, "
+                 f"now {stats['rss_mb']} MB)"]
+        for name, info in stats['capabilities'].items():
+            if not info['enabled']:
+                state = 'disabled'
+            elif info['missing']:
+                state = f"unavailable, {', '.join(info['missing'])} not installed"
+            elif info['loaded']:
+                state = f"loaded in {info['import_seconds']:.2f}s, +{info['rss_mb']} MB"
+            else:
+                state = 'available, loaded on first use'
+            lines.append(f"  {name}: {state}")
+        return '\n'.join(lines)
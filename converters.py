@@ -0,0 +1,291 @@
+"""
+Document converters and the registry that routes between them.
+
+Each converter registers the formats it reads and writes and an estimated
+relative cost. convert_file() uses a direct converter when one exists and
+otherwise the cheapest chain of converters (e.g. xlsx -> txt -> pdf).
+Intermediate results are passed between steps as in-memory buffers; only
+the final step writes to disk.
+
+Every converter is called as func(source, target, **options), where source
+is a file path or a binary buffer positioned at the start, and target is
+an output path or a binary buffer. Options a converter does not use are
+ignored. A converter may return a dict of stats to include in the result.
+"""
+
+import heapq
+import io
+import os
+import shutil
+import tempfile
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from capabilities import installed
+from pdf_text import PDF_READER_AVAILABLE, pdf_reader_class, select_pages, write_pdf_text
+
+# Libraries are found without importing them; each converter imports its
+# own on first use, so importing this module stays cheap
+DOCX_AVAILABLE = installed('docx')
+PDF_AVAILABLE = PDF_READER_AVAILABLE
+PDF2DOCX_AVAILABLE = installed('pdf2docx')
+EXCEL_AVAILABLE = installed('openpyxl')
+REPORTLAB_AVAILABLE = installed('reportlab')
+
+ConverterInfo = namedtuple('ConverterInfo', ['func', 'cost', 'available'])
+
+# (source format, target format) -> ConverterInfo
+CONVERTERS = {}
+
+
+def converter(source_formats, target_format, cost, available=True):
+    """Register a converter from each of source_formats to target_format"""
+    def register(func):
+        for source_format in source_formats:
+            CONVERTERS[(source_format, target_format)] = ConverterInfo(func, cost, available)
+        return func
+    return register
+
+
+def is_path(source):
+    return isinstance(source, (str, os.PathLike))
+
+
+@contextmanager
+def open_text_source(source):
+    """Read a path or binary buffer as UTF-8 text"""
+    if is_path(source):
+        with open(source, 'r', encoding='utf-8') as f:
+            yield f
+    else:
+        f = io.TextIOWrapper(source, encoding='utf-8')
+        try:
+            yield f
+        finally:
+            f.detach()
+
+
+@contextmanager
+def open_text_target(target, newline=None):
+    """Write UTF-8 text to a path or binary buffer"""
+    if is_path(target):
+        with open(target, 'w', encoding='utf-8', newline=newline) as f:
+            yield f
+    else:
+        f = io.TextIOWrapper(target, encoding='utf-8', newline=newline)
+        try:
+            yield f
+        finally:
+            f.flush()
+            f.detach()
+
+
+@converter(['docx'], 'txt', cost=1, available=DOCX_AVAILABLE)
+def convert_docx_to_txt(source, target, **options):
+    """Convert DOCX to TXT"""
+    from docx import Document
+    doc = Document(source)
+    with open_text_target(target) as f:
+        for index, paragraph in enumerate(doc.paragraphs):
+            if index:
+                f.write('\n')
+            f.write(paragraph.text)
+
+
+@converter(['docx'], 'pdf', cost=2, available=DOCX_AVAILABLE and REPORTLAB_AVAILABLE)
+def convert_docx_to_pdf(source, target, **options):
+    """Convert DOCX to PDF"""
+    from docx import Document
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate
+    doc = Document(source)
+    pdf = SimpleDocTemplate(target, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    for paragraph in doc.paragraphs:
+        if paragraph.text.strip():
+            story.append(Paragraph(paragraph.text, styles['Normal']))
+
+    pdf.build(story)
+
+
+@converter(['pdf'], 'txt', cost=2, available=PDF_AVAILABLE)
+def convert_pdf_to_txt(source, target, pages=None, max_pages=None, pdf_workers=1,
+                       pdf_parallel_min_pages=64, **options):
+    """
+    Convert PDF to TXT, writing each page as it is extracted.
+
+    pages selects which pages (e.g. "1-3,5") and max_pages caps how many.
+    Worker processes are only used when the source is a file on disk.
+    """
+    reader = pdf_reader_class()(source)
+    page_count = len(reader.pages)
+    page_numbers = select_pages(pages, page_count, max_pages)
+    with open_text_target(target) as f:
+        written = write_pdf_text(source if is_path(source) else None, f, page_numbers,
+                                 workers=pdf_workers if is_path(source) else 1,
+                                 parallel_min_pages=pdf_parallel_min_pages, reader=reader)
+    return {'pages': {'converted': written, 'total': page_count}}
+
+
+@converter(['pdf'], 'docx', cost=8, available=PDF2DOCX_AVAILABLE)
+def convert_pdf_to_docx(source, target, **options):
+    """Convert PDF to DOCX"""
+    from pdf2docx import Converter
+    cv = Converter(source) if is_path(source) else Converter(stream=source.getvalue())
+    try:
+        if is_path(target):
+            cv.convert(target)
+        else:
+            # pdf2docx only writes to a path
+            with tempfile.TemporaryDirectory(prefix='pdf2docx-') as temp_dir:
+                temp_path = os.path.join(temp_dir, 'output.docx')
+                cv.convert(temp_path)
+                with open(temp_path, 'rb') as f:
+                    shutil.copyfileobj(f, target)
+    finally:
+        cv.close()
+
+
+@converter(['txt'], 'pdf', cost=2, available=REPORTLAB_AVAILABLE)
+def convert_txt_to_pdf(source, target, **options):
+    """Convert TXT to PDF"""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import Paragraph, SimpleDocTemplate
+    pdf = SimpleDocTemplate(target, pagesize=letter)
+    styles = getSampleStyleSheet()
+    story = []
+
+    with open_text_source(source) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.strip():
+                story.append(Paragraph(line, styles['Normal']))
+
+    pdf.build(story)
+
+
+@converter(['txt'], 'docx', cost=1, available=DOCX_AVAILABLE)
+def convert_txt_to_docx(source, target, **options):
+    """Convert TXT to DOCX"""
+    from docx import Document
+    doc = Document()
+    with open_text_source(source) as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line.strip():
+                doc.add_paragraph(line)
+
+    doc.save(target)
+
+
+# openpyxl cannot read legacy .xls workbooks, so they are not offered
+@converter(['xlsx'], 'txt', cost=2, available=EXCEL_AVAILABLE)
+def convert_excel_to_txt(source, target, spreadsheet_workers=1, **options):
+    """Convert Excel to TXT, streaming rows to the output"""
+    from spreadsheets import write_workbook_text
+    with open_text_target(target) as f:
+        write_workbook_text(source, f, workers=spreadsheet_workers if is_path(source) else 1)
+
+
+@converter(['xlsx'], 'csv', cost=1, available=EXCEL_AVAILABLE)
+def convert_excel_to_csv(source, target, sheet=None, **options):
+    """Convert one sheet of an Excel workbook to CSV"""
+    from spreadsheets import write_sheet_csv
+    with open_text_target(target, newline='') as f:
+        write_sheet_csv(source, f, sheet=sheet)
+
+
+@converter(['csv'], 'txt', cost=1, available=EXCEL_AVAILABLE)
+def convert_csv_to_txt(source, target, **options):
+    """Convert CSV to tab-separated TXT"""
+    from spreadsheets import write_csv_text
+    with open_text_target(target) as f:
+        write_csv_text(source, f)
+
+
+@converter(['csv'], 'xlsx', cost=2, available=EXCEL_AVAILABLE)
+def convert_csv_to_excel(source, target, **options):
+    """Convert CSV to XLSX"""
+    from spreadsheets import write_csv_workbook
+    write_csv_workbook(source, target)
+
+
+def find_route(source_format, target_format):
+    """
+    Return the list of formats to convert through, or None if there is no way
+    (including to the same format, which would need no converter).
+
+    A direct converter is always used when available, since every extra
+    hop loses information; otherwise the chain with the lowest total cost
+    (then the fewest hops) wins.
+    """
+    if source_format == target_format:
+        return None
+    direct = CONVERTERS.get((source_format, target_format))
+    if direct and direct.available:
+        return [source_format, target_format]
+
+    queue = [(0, 0, [source_format])]
+    visited = set()
+    while queue:
+        cost, hops, route = heapq.heappop(queue)
+        current = route[-1]
+        if current == target_format:
+            return route
+        if current in visited:
+            continue
+        visited.add(current)
+        for (step_source, step_target), info in CONVERTERS.items():
+            if step_source == current and info.available and step_target not in visited:
+                heapq.heappush(queue, (cost + info.cost, hops + 1, route + [step_target]))
+    return None
+
+
+def conversion_routes():
+    """Map each source format to {target format: route} for every reachable target"""
+    formats = {source_format for source_format, _ in CONVERTERS}
+    formats |= {target_format for _, target_format in CONVERTERS}
+    routes = {}
+    for source_format in sorted(formats):
+        for target_format in sorted(formats):
+            if source_format == target_format:
+                continue
+            route = find_route(source_format, target_format)
+            if route:
+                routes.setdefault(source_format, {})[target_format] = route
+    return routes
+
+
+def convert_file(source_path, source_format, target_format, output_path, **options):
+    """
+    Convert source_path to target_format at output_path.
+
+    Returns the stats reported by the converters plus the route taken and
+    the time each step took. Raises ValueError if no chain of available
+    converters connects the two formats.
+    """
+    route = find_route(source_format, target_format)
+    if not route:
+        raise ValueError(f'Conversion from {source_format} to {target_format} is not supported')
+
+    stats = {'route': route, 'steps': []}
+    source = source_path
+    steps = list(zip(route, route[1:]))
+    for index, step in enumerate(steps):
+        final = index == len(steps) - 1
+        target = output_path if final else io.BytesIO()
+        step_start = time.perf_counter()
+        result = CONVERTERS[step].func(source, target, **options)
+        stats['steps'].append({'converter': f"{step[0]}-{step[1]}",
+                               'seconds': round(time.perf_counter() - step_start, 4)})
+        if result:
+            stats.update(result)
+        if not final:
+            target.seek(0)
+            source = target
+    return stats
@@ -0,0 +1,149 @@
+"""
+Gunicorn settings for running the service in production.
+
+    gunicorn --config gunicorn.conf.py app:app
+
+The app is imported once in the master process, and the libraries of its
+capabilities (CAPABILITIES, see capabilities.py) and the preloaded Whisper
+models are loaded there before the workers are forked, so every worker
+shares the same libraries and model weights copy-on-write instead of
+loading its own copy. Worker, thread and torch intra-op thread counts default to values
+derived from the CPU limit of the container (cgroup quota), not the CPU
+count of the host.
+
+Metrics, admission gate load and loaded models are kept per worker. Each
+worker writes a snapshot of them to METRICS_DIR, so /metrics, /ready and
+/models answer for all the workers, whichever one gets the request.
+"""
+
+import gc
+import math
+import os
+import tempfile
+
+
+def cpu_limit():
+    """CPUs available to this process: the cgroup quota, affinity or CPU count"""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            limit, period = f.read().split()[:2]
+        if limit != 'max':
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: quota is -1 without a limit
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                limit = int(f.read())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = int(f.read())
+            if limit > 0 and period > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+
+CPUS = cpu_limit()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5012')}"
+# One process per CPU: transcription is CPU bound, so more processes only
+# compete for the same cores and each one adds its own activations
+workers = int(os.environ.get('WEB_CONCURRENCY', str(CPUS)))
+# Read by the app, which splits its admission limits over the workers
+os.environ['WEB_CONCURRENCY'] = str(workers)
+# Shared by the workers for metrics and load; set before the app is imported
+if not os.environ.get('METRICS_DIR'):
+    os.environ['METRICS_DIR'] = tempfile.mkdtemp(prefix='audiotranscribe-metrics-')
+# Threads cover I/O-bound work within a process: uploads, job polling,
+# streamed responses and downloads
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', '8'))
+# torch intra-op threads per worker, so the workers together use the CPU limit
+torch_threads = int(os.environ.get('TORCH_THREADS', str(max(1, CPUS // max(1, workers)))))
+
+# gthread workers keep sending heartbeats while requests run, so a long
+# transcription does not hit the timeout; graceful_timeout lets running
+# requests finish on restart
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '300'))
+keepalive = 5
+preload_app = True
+# Capability libraries and Whisper models can be preloaded in the master
+# (shared by all workers) or left for each worker to load on first use
+preload_capabilities = os.environ.get('PRELOAD_CAPABILITIES', 'true').lower() in ('1', 'true', 'yes')
+preload_models = os.environ.get('PRELOAD_MODELS', 'true').lower() in ('1', 'true', 'yes')
+
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Forget snapshots left in METRICS_DIR by an earlier run"""
+    from metrics import MultiProcessCollector
+    MultiProcessCollector(os.environ['METRICS_DIR']).clear()
+
+
+def when_ready(server):
+    """Load capabilities and models in the master, after the app is imported and before forking"""
+    import app as service
+
+    server.log.info(f"{CPUS} CPUs: {workers} workers x {threads} threads, "
+                    f"{torch_threads} torch threads per worker, {service.inference_engine.precision} inference")
+    transcription = service.capabilities.available('transcription')
+    # CUDA cannot be initialised before fork; the NVML check does not initialise it
+    os.environ.setdefault('PYTORCH_NVML_BASED_CUDA_CHECK', '1')
+    if preload_capabilities:
+        service.capabilities.preload()
+
+    if preload_models and transcription:
+        import torch
+        if torch.cuda.is_available():
+            server.log.info("GPU available, models are loaded by each worker instead of the master")
+        else:
+            # A single thread keeps OpenMP from starting a thread pool in the master,
+            # which forked workers would inherit in a broken state. Warm-up runs
+            # inference, so it is left to the workers.
+            torch.set_num_threads(1)
+            names = [name.strip() for name in service.WHISPER_PRELOAD_MODELS if name.strip()]
+            service.model_registry.preload(names, warm_up=False)
+
+    for line in service.capabilities.report().splitlines():
+        server.log.info(line)
+    # Objects that exist now are never collected; keeps the garbage collector
+    # from writing to (and so copying) pages shared with the workers
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Per-worker setup: torch threads and model warm-up"""
+    import threading
+
+    import app as service
+    service.process_metrics.start()
+    if not service.capabilities.available('transcription'):
+        return
+    # Before torch is imported this sets OMP_NUM_THREADS, read by torch on first use
+    service.inference_engine.threads = torch_threads
+    service.inference_engine.configure_threads()
+    if preload_models:
+        # Warm up (or, on GPU, load) in the background so the worker starts serving at once
+        names = [name.strip() for name in service.WHISPER_PRELOAD_MODELS if name.strip()]
+
+        def warm_up():
+            registry = service.model_registry
+            loaded = {name for name, stats in registry.stats()['models'].items() if stats['loaded']}
+            registry.warm_up_loaded()
+            registry.preload([name for name in names if name not in loaded])
+
+        threading.Thread(target=warm_up, daemon=True, name='model-warm-up').start()
+
+
+def worker_exit(server, worker):
+    """Write the worker's final counts so totals keep them after it exits"""
+    import app as service
+    service.process_metrics.write()
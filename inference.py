@@ -0,0 +1,148 @@
+"""
+How Whisper models are loaded and run on this host.
+
+An InferenceEngine holds the device, precision and torch thread counts
+that every process running Whisper uses: the web server's model registry,
+long-audio and batch pool workers and the command line. On CPU, int8
+precision dynamically quantises the models' linear layers (the bulk of
+their weights and compute): weights are stored as int8 and activations
+are quantised on the fly, which makes CPU inference faster and the model
+smaller for a small loss of accuracy. benchmarks/bench_inference.py
+measures both against reference transcripts.
+
+Whisper installs key/value cache hooks on the model's decoder for every
+decode, so one model object runs one transcription at a time: transcribe()
+holds a lock per model. Parallelism comes from worker processes, each with
+its own model.
+"""
+
+import copy
+import os
+import sys
+import threading
+import weakref
+
+PRECISIONS = ('fp32', 'int8')
+DEVICES = ('auto', 'cpu', 'cuda')
+
+
+def quantize_linear_layers(model):
+    """Quantise a model's linear layers to int8 in place (dynamic quantisation)"""
+    import torch
+    # Whisper's Linear subclass only casts its weight to the input dtype, which
+    # is a no-op in fp32; quantize_dynamic matches exact types, so make them
+    # plain nn.Linear or nothing would be quantised
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear) and type(module).__module__.startswith('whisper'):
+            module.__class__ = torch.nn.Linear
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+_inference_locks = weakref.WeakKeyDictionary()
+_inference_locks_lock = threading.Lock()
+
+
+def inference_lock(model):
+    """The lock serialising inference on one model object"""
+    with _inference_locks_lock:
+        lock = _inference_locks.get(model)
+        if lock is None:
+            lock = _inference_locks[model] = threading.Lock()
+        return lock
+
+
+def transcribe(model, audio, **options):
+    """
+    model.transcribe with fp16 only on GPU, so CPU runs skip Whisper's FP16
+    warning. Concurrent calls on the same model wait for each other.
+    """
+    options.setdefault('fp16', model.device.type != 'cpu')
+    with inference_lock(model):
+        return model.transcribe(audio, **options)
+
+
+class InferenceEngine:
+    """
+    Device, precision and thread settings for Whisper inference.
+
+    threads and interop_threads of 0 leave torch's defaults. int8 only
+    applies to models on CPU; GPU models stay in full precision.
+    """
+
+    def __init__(self, device='auto', precision='fp32', threads=0, interop_threads=0):
+        self.device = device.strip().lower()
+        self.precision = precision.strip().lower()
+        if self.device not in DEVICES:
+            raise ValueError(f"Unknown device '{device}'. Options: {', '.join(DEVICES)}")
+        if self.precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}'. Options: {', '.join(PRECISIONS)}")
+        self.threads = max(0, threads)
+        self.interop_threads = max(0, interop_threads)
+        self._configured_pid = None
+
+    @property
+    def key(self):
+        return (self.device, self.precision, self.threads, self.interop_threads)
+
+    def for_workers(self, workers):
+        """A copy for one of `workers` processes sharing this engine's threads (or all CPUs)"""
+        engine = copy.copy(self)
+        engine.threads = max(1, (self.threads or os.cpu_count() or 1) // max(1, workers))
+        engine._configured_pid = None
+        return engine
+
+    def configure_threads(self):
+        """
+        Apply the thread counts to torch, once per process. Before torch is
+        imported this only sets OMP_NUM_THREADS and is applied again later.
+        """
+        if self._configured_pid == os.getpid():
+            return
+        torch = sys.modules.get('torch')
+        if torch is None:
+            if self.threads:
+                os.environ['OMP_NUM_THREADS'] = str(self.threads)
+            return
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        if self.interop_threads:
+            try:
+                # Only possible before the process has run any inter-op parallel work
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError as e:
+                print(f"Could not set torch inter-op threads: {str(e)}")
+        self._configured_pid = os.getpid()
+
+    def resolve_device(self):
+        if self.device != 'auto':
+            return self.device
+        import torch
+        return 'cuda' if torch.cuda.is_available() else 'cpu'
+
+    def load(self, name):
+        """Load a Whisper model on this engine's device, quantised for int8 on CPU"""
+        import whisper
+        device = self.resolve_device()
+        model = whisper.load_model(name, device=device)
+        if self.precision == 'int8':
+            if device == 'cpu':
+                model = quantize_linear_layers(model)
+            else:
+                print(f"int8 precision only applies on CPU; model '{name}' stays in full precision on {device}")
+        return model
+
+    def stats(self):
+        torch = sys.modules.get('torch')
+        return {
+            'device': self.device,
+            'precision': self.precision,
+            'threads': self.threads or None,
+            'interop_threads': self.interop_threads or None,
+            # What torch actually uses, once it is imported
+            'torch_threads': torch.get_num_threads() if torch is not None else None,
+            'torch_interop_threads': torch.get_num_interop_threads() if torch is not None else None
+        }
+
+    def describe(self):
+        threads = f"{self.threads} threads" if self.threads else 'default threads'
+        return f"{self.precision} on {self.device}, {threads}"
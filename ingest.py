@@ -0,0 +1,159 @@
+"""
+Upload ingestion.
+
+Multipart file parts are streamed straight to a unique path in the upload
+folder while the request body is parsed, hashed on the way and aborted as
+soon as they exceed the size limit, so an upload is written to disk exactly
+once and never clobbers another upload with the same name.
+"""
+
+import hashlib
+import os
+import time
+import uuid
+
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+class UploadTooLarge(RequestEntityTooLarge):
+    """Raised as soon as an upload grows past the size limit"""
+
+    def __init__(self, max_size):
+        super().__init__(f'File too large. Maximum size: {max_size / (1024*1024)}MB')
+
+
+def unique_upload_path(upload_folder, filename):
+    """Return a per-upload path that keeps the original name and extension"""
+    name = secure_filename(filename or '') or 'upload'
+    return os.path.join(upload_folder, f"{uuid.uuid4().hex}_{name}")
+
+
+class IngestFile:
+    """
+    Writable file used as the multipart stream target for one file part.
+
+    Tracks size, SHA-256 and write time as data arrives and deletes itself
+    if the part exceeds max_size.
+    """
+
+    def __init__(self, path, max_size):
+        self.path = path
+        self.max_size = max_size
+        self.size = 0
+        self.claimed = False
+        self._digest = hashlib.sha256()
+        self._file = open(path, 'w+b')
+        self._started = time.time()
+        self._finished = self._started
+
+    def write(self, data):
+        self.size += len(data)
+        if self.max_size and self.size > self.max_size:
+            self.discard()
+            raise UploadTooLarge(self.max_size)
+        self._digest.update(data)
+        self._finished = time.time()
+        return self._file.write(data)
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    @property
+    def ingest_time(self):
+        return self._finished - self._started
+
+    def discard(self):
+        """Close and delete the file unless it has been claimed"""
+        if not self._file.closed:
+            self._file.close()
+        if not self.claimed and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __getattr__(self, name):
+        # read, seek, tell, flush, close, ... go to the underlying file
+        return getattr(self._file, name)
+
+
+class IngestRequest(Request):
+    """Request class that streams multipart file parts into the upload folder"""
+
+    upload_folder = 'uploads'
+    max_file_size = 0
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None,
+                         content_length=None):
+        stream = IngestFile(unique_upload_path(self.upload_folder, filename), self.max_file_size)
+        self._ingest_files = getattr(self, '_ingest_files', [])
+        self._ingest_files.append(stream)
+        return stream
+
+    def discard_unclaimed_uploads(self):
+        """Delete file parts no handler claimed; called at request teardown"""
+        for stream in getattr(self, '_ingest_files', []):
+            stream.discard()
+
+
+class IngestedUpload:
+    """An upload written to its own path in the upload folder"""
+
+    def __init__(self, filepath, filename, size, sha256, ingest_time):
+        self.filepath = filepath
+        self.filename = filename
+        self.size = size
+        self.sha256 = sha256
+        self.ingest_time = ingest_time
+
+    @property
+    def bytes_per_sec(self):
+        return self.size / self.ingest_time if self.ingest_time > 0 else None
+
+    def stats(self):
+        """Size and ingest timing for responses and logs"""
+        rate = self.bytes_per_sec
+        return {
+            'size_bytes': self.size,
+            'ingest_time': round(self.ingest_time, 3),
+            'mb_per_sec': round(rate / (1024 * 1024), 2) if rate else None
+        }
+
+    def discard(self):
+        """Delete the uploaded file if it still exists"""
+        if os.path.exists(self.filepath):
+            os.remove(self.filepath)
+
+
+def ingest_upload(file, upload_folder, max_size):
+    """
+    Take ownership of an uploaded file, returning an IngestedUpload.
+
+    Files that IngestRequest already streamed to disk are claimed in place;
+    any other file-like upload is copied in chunks, hashing as it goes and
+    stopping as soon as max_size is exceeded.
+    """
+    filename = secure_filename(file.filename or '') or 'upload'
+    stream = getattr(file, 'stream', file)
+
+    if isinstance(stream, IngestFile):
+        stream.flush()
+        stream.claimed = True
+        stream.close()
+        return IngestedUpload(stream.path, filename, stream.size, stream.sha256, stream.ingest_time)
+
+    target = IngestFile(unique_upload_path(upload_folder, filename), max_size)
+    try:
+        while True:
+            chunk = stream.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            target.write(chunk)
+    except Exception:
+        target.discard()
+        raise
+    target.claimed = True
+    target.close()
+    return IngestedUpload(target.path, filename, target.size, target.sha256, target.ingest_time)
@@ -0,0 +1,293 @@
+"""
+Background job queue for long-running work such as audio transcription.
+
+Jobs are held in memory and executed by a fixed pool of worker threads, so
+all workers share whatever models the process has already loaded (and take
+turns using each one, see inference.py). Clients
+poll a job by ID for its status, progress and final result, or pass a
+callback URL that receives the finished job as a JSON POST. Callbacks only
+go to public addresses, or to an explicit list of allowed hosts, so clients
+cannot make the server post to internal services.
+
+With a state directory, each job is also written there as a JSON file
+whenever it changes, so a job submitted to one server process can be
+polled through any other process serving the same directory.
+"""
+
+import ipaddress
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import urllib.parse
+import urllib.request
+import uuid
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+def check_callback_url(url, allowed_hosts=None):
+    """
+    Raise ValueError unless url is an http(s) URL the server may post to: on
+    one of allowed_hosts if given, otherwise on a host with only public addresses
+    """
+    parsed = urllib.parse.urlsplit(url)
+    if parsed.scheme.lower() not in ('http', 'https') or not parsed.hostname:
+        raise ValueError('callback_url must be an http or https URL')
+    host = parsed.hostname.lower()
+    if allowed_hosts:
+        if host not in allowed_hosts:
+            raise ValueError(f"callback_url host '{host}' is not allowed")
+        return
+    try:
+        port = parsed.port or (443 if parsed.scheme.lower() == 'https' else 80)
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, ValueError) as e:
+        raise ValueError(f"callback_url host '{host}' could not be resolved: {str(e)}")
+    for address in addresses:
+        ip = ipaddress.ip_address(address.split('%')[0])
+        if ip.version == 6 and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        # Private, loopback, link-local (cloud metadata), reserved and multicast
+        if not ip.is_global or ip.is_multicast:
+            raise ValueError(f"callback_url host '{host}' is not a public address")
+
+
+class _NoRedirects(urllib.request.HTTPRedirectHandler):
+    # A redirect could point a checked callback at an internal address
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class JobQueue:
+    """A bounded queue of jobs drained by a pool of worker threads"""
+
+    def __init__(self, worker_count=2, max_queued=100, job_ttl=3600, state_dir=None,
+                 callback_allowed_hosts=None):
+        self.worker_count = max(1, worker_count)
+        self.job_ttl = job_ttl
+        self.state_dir = state_dir
+        self.callback_allowed_hosts = {host.strip().lower() for host in callback_allowed_hosts or ()
+                                       if host.strip()}
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._workers = []
+
+    def check_callback_url(self, url):
+        """Raise ValueError unless jobs may post their results to url"""
+        check_callback_url(url, self.callback_allowed_hosts)
+
+    def _ensure_workers(self):
+        # Workers are started on first use rather than at import time
+        with self._lock:
+            self._workers = [w for w in self._workers if w.is_alive()]
+            while len(self._workers) < self.worker_count:
+                worker = threading.Thread(target=self._work, daemon=True,
+                                          name=f"job-worker-{len(self._workers) + 1}")
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, func, *args, callback_url=None, **kwargs):
+        """
+        Queue func(*args, progress=..., **kwargs) for execution.
+
+        Returns the job ID. The function receives a `progress(stage, fraction)`
+        callable it can use to report how far along it is; its return value
+        becomes the job result.
+        """
+        self._ensure_workers()
+        self._prune()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': 'queued',
+            'stage': 'queued',
+            'progress': 0.0,
+            'result': None,
+            'error': None,
+            'created_at': time.time(),
+            'started_at': None,
+            'finished_at': None,
+            'callback_url': callback_url,
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+        # Saved before queueing so it cannot overwrite a worker's later update
+        self._save(job_id)
+        try:
+            self._queue.put_nowait((job_id, func, args, kwargs))
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job_id]
+            if self.state_dir:
+                try:
+                    os.remove(self._state_path(job_id))
+                except OSError:
+                    pass
+            raise JobQueueFull("Job queue is full, try again later")
+        return job_id
+
+    def get(self, job_id):
+        """Return a snapshot of the job, or None if it is unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            snapshot = dict(job) if job is not None else None
+        if snapshot is None:
+            # Submitted through another process sharing the state directory
+            snapshot = self._load(job_id)
+            if snapshot is None:
+                return None
+            snapshot.pop('owner_pid', None)
+        elif snapshot['status'] == 'queued':
+            snapshot['queue_position'] = self._queue_position(job_id)
+        snapshot.pop('callback_url', None)
+        return snapshot
+
+    def stats(self):
+        """Return counts of jobs by status"""
+        counts = {'queued': 0, 'running': 0, 'completed': 0, 'failed': 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job['status']] = counts.get(job['status'], 0) + 1
+        counts['workers'] = self.worker_count
+        return counts
+
+    def _queue_position(self, job_id):
+        with self._queue.mutex:
+            for position, item in enumerate(self._queue.queue):
+                if item[0] == job_id:
+                    return position + 1
+        return 0
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+        self._save(job_id)
+
+    def _state_path(self, job_id):
+        return os.path.join(self.state_dir, f"{job_id}.json")
+
+    def _save(self, job_id):
+        if not self.state_dir:
+            return
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            snapshot = dict(job, owner_pid=os.getpid())
+        path = self._state_path(job_id)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Failed to save state of job {job_id}: {str(e)}")
+
+    def _load(self, job_id):
+        if not self.state_dir or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+        try:
+            with open(self._state_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL"""
+        cutoff = time.time() - self.job_ttl
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job['finished_at'] is not None and job['finished_at'] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if self.state_dir:
+            self._prune_state(cutoff)
+
+    def _prune_state(self, cutoff):
+        # Covers jobs of every process, including ones that have since exited
+        try:
+            names = os.listdir(self.state_dir)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(self.state_dir, name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                if name.endswith('.json'):
+                    job = self._load(name[:-len('.json')]) or {}
+                    if job.get('finished_at') is None and _process_alive(job.get('owner_pid')):
+                        continue
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _work(self):
+        while True:
+            job_id, func, args, kwargs = self._queue.get()
+            try:
+                self._run(job_id, func, args, kwargs)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job_id, func, args, kwargs):
+        self._update(job_id, status='running', stage='started', started_at=time.time())
+
+        def progress(stage, fraction=None):
+            fields = {'stage': stage}
+            if fraction is not None:
+                fields['progress'] = round(min(max(fraction, 0.0), 1.0), 3)
+            self._update(job_id, **fields)
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+            self._update(job_id, status='completed', stage='completed', progress=1.0,
+                         result=result, finished_at=time.time())
+        except Exception as e:
+            self._update(job_id, status='failed', stage='failed',
+                         error=str(e), finished_at=time.time())
+
+        with self._lock:
+            job = self._jobs.get(job_id)
+            callback_url = job.get('callback_url') if job else None
+        if callback_url:
+            self._send_callback(job_id, callback_url)
+
+    def _send_callback(self, job_id, callback_url):
+        payload = json.dumps(self.get(job_id)).encode('utf-8')
+        req = urllib.request.Request(callback_url, data=payload,
+                                     headers={'Content-Type': 'application/json'},
+                                     method='POST')
+        try:
+            # Checked again, as the host's addresses may have changed since submission
+            self.check_callback_url(callback_url)
+            urllib.request.build_opener(_NoRedirects).open(req, timeout=10).close()
+        except Exception as e:
+            print(f"Job {job_id} callback to {callback_url} failed: {str(e)}")
+
+
+def _process_alive(pid):
+    if not pid:
+        return False
+    if os.name == 'nt':
+        # os.kill would terminate the process on Windows
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Exists but belongs to another user
+        return True
+    return True
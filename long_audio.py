@@ -0,0 +1,206 @@
+"""
+Parallel transcription of long recordings.
+
+The file is decoded once (see audio_decode) into 16 kHz mono PCM, split into
+chunks at the quietest point near each chunk boundary so words are not cut
+in half, and the chunks are transcribed concurrently by a pool of worker
+processes that each hold their own copy of the Whisper model. Text and
+segment timestamps are stitched back together in order.
+"""
+
+import atexit
+import multiprocessing
+import threading
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from audio_decode import SAMPLE_RATE
+from inference import InferenceEngine, transcribe
+
+FRAME_SECONDS = 0.1
+
+
+def find_chunk_boundaries(audio, chunk_seconds=300, search_seconds=30, sample_rate=SAMPLE_RATE):
+    """
+    Return (start, end) sample ranges of roughly chunk_seconds each.
+
+    Each boundary is moved to the quietest frame within search_seconds of
+    the nominal split point, which in speech is almost always a pause.
+    """
+    import numpy as np
+    total = len(audio)
+    chunk_samples = int(chunk_seconds * sample_rate)
+    if total <= chunk_samples:
+        return [(0, total)]
+
+    frame = int(FRAME_SECONDS * sample_rate)
+    frame_count = total // frame
+    # RMS energy per frame, computed once for the whole file
+    energy = np.sqrt(np.mean(audio[:frame_count * frame].reshape(frame_count, frame) ** 2, axis=1))
+    search_frames = int(search_seconds / FRAME_SECONDS)
+    search_samples = int(search_seconds * sample_rate)
+
+    boundaries = []
+    start = 0
+    # A short remainder is folded into the last chunk rather than left on its own
+    while total - start > chunk_samples + search_samples:
+        target_frame = (start + chunk_samples) // frame
+        low = max(start // frame + 1, target_frame - search_frames)
+        high = min(frame_count, target_frame + search_frames)
+        if high <= low:
+            split = start + chunk_samples
+        else:
+            split = (low + int(np.argmin(energy[low:high]))) * frame
+        boundaries.append((start, split))
+        start = split
+    boundaries.append((start, total))
+    return boundaries
+
+
+# Per-process state for pool workers
+_worker_model = None
+
+
+def _init_worker(model_name, engine):
+    global _worker_model
+    # Imported first so the thread counts are applied to torch itself
+    import torch  # noqa: F401
+    engine.configure_threads()
+    _worker_model = engine.load(model_name)
+
+
+def _transcribe_chunk(index, offset, audio, language, task):
+    result = transcribe(_worker_model, audio, language=language, task=task)
+    segments = []
+    for segment in result.get('segments', []):
+        segment = dict(segment)
+        segment['start'] = round(segment['start'] + offset, 3)
+        segment['end'] = round(segment['end'] + offset, 3)
+        segments.append(segment)
+    return index, result['text'], result.get('language'), segments
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(model_name, workers, engine=None):
+    """Return a process pool whose workers have model_name loaded, reusing it across calls"""
+    engine = (engine or InferenceEngine()).for_workers(workers)
+    key = (model_name, workers, engine.key)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            # spawn keeps workers independent of the parent's torch thread state
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(model_name, engine)
+            )
+            _pools[key] = pool
+        return pool
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+atexit.register(shutdown_pools)
+
+
+def transcribe_long_audio(audio, model_name, chunk_seconds=300, workers=2,
+                          language=None, task='transcribe', progress=None, engine=None):
+    """
+    Transcribe a decoded recording by splitting it into chunks and
+    transcribing them in parallel.
+
+    Returns a Whisper-style result dict with 'text', 'segments' and
+    'language', plus 'chunks' and 'duration'. progress(done, total) is
+    called as chunks finish. Workers load the model with engine's precision,
+    splitting its threads (or all CPUs) between them.
+    """
+    boundaries = find_chunk_boundaries(audio, chunk_seconds)
+    pool = get_pool(model_name, workers, engine)
+
+    futures = [
+        pool.submit(_transcribe_chunk, index, start / SAMPLE_RATE, audio[start:end], language, task)
+        for index, (start, end) in enumerate(boundaries)
+    ]
+
+    results = [None] * len(boundaries)
+    try:
+        for done, future in enumerate(as_completed(futures), start=1):
+            index, text, chunk_language, segments = future.result()
+            results[index] = (text, chunk_language, segments)
+            if progress:
+                progress(done, len(boundaries))
+    except Exception:
+        for future in futures:
+            future.cancel()
+        raise
+
+    # Stitch chunks back together in order
+    texts = []
+    segments = []
+    language_votes = Counter()
+    for index, (text, chunk_language, chunk_segments) in enumerate(results):
+        texts.append(text.strip())
+        start, end = boundaries[index]
+        if chunk_language:
+            language_votes[chunk_language] += end - start
+        for segment in chunk_segments:
+            segment['id'] = len(segments)
+            segments.append(segment)
+
+    return {
+        'text': ' '.join(text for text in texts if text),
+        'segments': segments,
+        'language': language_votes.most_common(1)[0][0] if language_votes else language,
+        'chunks': len(boundaries),
+        'duration': len(audio) / SAMPLE_RATE
+    }
+
+
+def iter_transcribe_segments(model, audio, window_seconds=30, language=None, task='transcribe'):
+    """
+    Transcribe a decoded recording window by window, yielding each segment
+    as soon as its window has been decoded.
+
+    Windows are split at pauses like long-audio chunks, and the tail of the
+    previous window's text is passed as the prompt for the next so context
+    carries across boundaries. Yields (segment, language) pairs where
+    language is the running duration-weighted guess.
+    """
+    search_seconds = min(5, window_seconds / 6)
+    language_votes = Counter()
+    prompt = None
+    segment_id = 0
+    for start, end in find_chunk_boundaries(audio, window_seconds - search_seconds, search_seconds):
+        offset = start / SAMPLE_RATE
+        result = transcribe(
+            model,
+            audio[start:end],
+            language=language,
+            task=task,
+            initial_prompt=prompt
+        )
+        if result.get('language'):
+            language_votes[result['language']] += end - start
+        running_language = language_votes.most_common(1)[0][0] if language_votes else language
+
+        for segment in result.get('segments', []):
+            yield {
+                'id': segment_id,
+                'start': round(segment['start'] + offset, 3),
+                'end': round(segment['end'] + offset, 3),
+                'text': segment['text']
+            }, running_language
+            segment_id += 1
+
+        text = result['text'].strip()
+        if text:
+            prompt = text[-200:]
@@ -0,0 +1,367 @@
+"""
+In-process metrics in the Prometheus text format.
+
+Counters, gauges and histograms with labels are kept in memory and
+rendered for scraping by the /metrics endpoint. Gauges can also be backed
+by a callback that is evaluated at scrape time, for values another object
+already tracks (queued jobs, loaded models).
+
+Values are kept per process. When the app runs in several worker
+processes behind one port, a MultiProcessCollector has each process write
+a snapshot of its metrics to a shared directory, and the process that
+answers a scrape merges them, so every scrape covers all the workers.
+"""
+
+import glob
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, from a few milliseconds up to long transcriptions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values):
+    if not names:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class Registry:
+    """The set of metrics rendered together on one scrape"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if any(existing.name == metric.name for existing in self._metrics):
+                raise ValueError(f"Metric '{metric.name}' is already registered")
+            self._metrics.append(metric)
+
+    def metrics(self):
+        with self._lock:
+            return list(self._metrics)
+
+    def render(self, values=None):
+        """
+        The text exposition of every metric; values optionally maps metric
+        names to merged (key, value) pairs to render instead of this process's
+        """
+        lines = []
+        for metric in self.metrics():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples(None if values is None else values.get(metric.name, [])))
+        return '\n'.join(lines) + '\n'
+
+    def dump(self):
+        """{name: [[label values, value], ...]} of every metric, for another process to merge"""
+        return {metric.name: [[list(key), value] for key, value in metric.values()]
+                for metric in self.metrics()}
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        if registry is not None:
+            registry.register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Metric '{self.name}' takes labels {', '.join(self.labelnames) or 'none'}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _snapshot(self):
+        with self._lock:
+            return sorted(self._values.items())
+
+    def values(self):
+        """(label values, value) pairs of this process"""
+        return self._snapshot()
+
+    def merge(self, per_process):
+        """Combine the values of several processes, given as lists of (key, value) pairs"""
+        merged = {}
+        for values in per_process:
+            for key, value in values:
+                merged[key] = merged.get(key, 0) + value
+        return sorted(merged.items())
+
+
+class Counter(_Metric):
+    """A value that only goes up"""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self, values=None):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in (self._snapshot() if values is None else values)]
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down.
+
+    With a callback, the value is read when metrics are rendered: the
+    callback returns a number, or for labelled gauges a dict mapping
+    label value tuples to numbers.
+
+    Across processes, values of running processes are added up, or with
+    aggregate='max' the largest is taken (for values every process reads
+    from the same shared source).
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, callback=None,
+                 aggregate='sum'):
+        super().__init__(name, documentation, labelnames, registry)
+        self.callback = callback
+        self.aggregate = aggregate
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def values(self):
+        if self.callback is None:
+            return self._snapshot()
+        try:
+            value = self.callback()
+        except Exception:
+            # A failing callback must not break the whole scrape
+            return []
+        return sorted(value.items()) if isinstance(value, dict) else [((), value)]
+
+    def merge(self, per_process):
+        if self.aggregate != 'max':
+            return super().merge(per_process)
+        merged = {}
+        for values in per_process:
+            for key, value in values:
+                merged[key] = max(merged.get(key, value), value)
+        return sorted(merged.items())
+
+    def samples(self, values=None):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in (self.values() if values is None else values)]
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY, buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets)) + ((math.inf,) if buckets[-1] != math.inf else ())
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def values(self):
+        with self._lock:
+            return sorted((key, [list(counts), total, count])
+                          for key, (counts, total, count) in self._values.items())
+
+    def merge(self, per_process):
+        merged = {}
+        for values in per_process:
+            for key, (counts, total, count) in values:
+                entry = merged.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+                entry[0] = [a + b for a, b in zip(entry[0], counts)]
+                entry[1] += total
+                entry[2] += count
+        return sorted(merged.items())
+
+    def samples(self, values=None):
+        lines = []
+        bucket_names = self.labelnames + ('le',)
+        for key, (counts, total, count) in (self.values() if values is None else values):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_names, key + (_format_value(bound),))} "
+                             f"{cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+def render():
+    """All metrics of the default registry in the text exposition format"""
+    return REGISTRY.render()
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MultiProcessCollector:
+    """
+    Metrics and status of every process sharing a directory.
+
+    Once started, a process writes its metric values (and status(), e.g.
+    admission gate load) to <directory>/<pid>.json every interval seconds.
+    render() merges the snapshots of all processes, with this process's
+    own values read live. Counters and histograms include processes that
+    have exited, so totals do not drop when a worker is replaced; gauges
+    and status only cover processes that are still running.
+    """
+
+    def __init__(self, directory, registry=REGISTRY, status=None, interval=1.0):
+        self.directory = directory
+        self.registry = registry
+        self.status = status
+        self.interval = interval
+        self._pid = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def clear(self):
+        """Remove every snapshot, e.g. when a new server starts with the same directory"""
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def start(self):
+        """Write this process's snapshots from now on; once per process"""
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+        self.write()
+        threading.Thread(target=self._run, daemon=True, name='metrics-writer').start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.write()
+            except Exception as e:
+                print(f"Writing metrics snapshot failed: {str(e)}")
+
+    def _snapshot(self):
+        return {
+            'pid': os.getpid(),
+            'updated_at': time.time(),
+            'metrics': self.registry.dump(),
+            'status': self.status() if self.status else None
+        }
+
+    def write(self):
+        """Write this process's snapshot now"""
+        snapshot = self._snapshot()
+        path = os.path.join(self.directory, f"{snapshot['pid']}.json")
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(temp_path, path)
+
+    def snapshots(self):
+        """[(snapshot, running)] of every process, this one first and up to date"""
+        own = self._snapshot()
+        result = [(own, True)]
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if snapshot.get('pid') != own['pid']:
+                result.append((snapshot, _process_alive(snapshot['pid'])))
+        return result
+
+    def statuses(self):
+        """{pid: status} of the running processes"""
+        return {str(snapshot['pid']): snapshot['status'] for snapshot, running in self.snapshots() if running}
+
+    def render(self):
+        """Metrics of all processes in the text exposition format"""
+        snapshots = self.snapshots()
+        values = {}
+        for metric in self.registry.metrics():
+            per_process = [
+                [(tuple(key), value) for key, value in snapshot['metrics'].get(metric.name, [])]
+                for snapshot, running in snapshots
+                if running or metric.kind != 'gauge'
+            ]
+            values[metric.name] = metric.merge(per_process)
+        return self.registry.render(values)
@@ -0,0 +1,163 @@
+"""
+Registry of loaded Whisper models.
+
+Models are loaded on demand (or preloaded at startup) by an inference
+engine (see inference.py), warmed up with a short silent inference so
+the first real request does not pay for lazy initialisation, and evicted
+least-recently-used first when the total parameter memory of loaded
+models exceeds a budget.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from inference import InferenceEngine, transcribe
+
+WHISPER_SAMPLE_RATE = 16000
+
+# whisper.available_models(), known without importing whisper (and torch)
+WHISPER_MODELS = ('tiny.en', 'tiny', 'base.en', 'base', 'small.en', 'small', 'medium.en', 'medium',
+                  'large-v1', 'large-v2', 'large-v3', 'large')
+
+
+def model_memory_bytes(model):
+    """Approximate resident memory of a model's parameters and buffers"""
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    # int8 linear layers keep their weights in packed params instead
+    for module in model.modules():
+        packed = getattr(module, '_packed_params', None)
+        if packed is not None and hasattr(packed, '_weight_bias'):
+            for tensor in packed._weight_bias():
+                if tensor is not None:
+                    total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def warm_up_model(model):
+    """Run one second of silence through the model to initialise kernels"""
+    import numpy as np
+    silence = np.zeros(WHISPER_SAMPLE_RATE, dtype=np.float32)
+    transcribe(model, silence, language='en')
+
+
+class ModelRegistry:
+    """Thread-safe LRU cache of Whisper models with per-model statistics"""
+
+    def __init__(self, default_model='base', allowed_models=None, memory_budget_mb=0,
+                 warm_up=True, engine=None):
+        self.default_model = default_model
+        self.engine = engine or InferenceEngine()
+        self.allowed_models = set(allowed_models or WHISPER_MODELS)
+        self.allowed_models.add(default_model)
+        self.memory_budget = int(memory_budget_mb * 1024 * 1024)
+        self.warm_up = warm_up
+        self._models = OrderedDict()
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def resolve(self, name=None):
+        """Return the model name to use, raising ValueError for unknown models"""
+        name = (name or self.default_model).strip().lower()
+        if name not in self.allowed_models:
+            raise ValueError(f"Unknown model '{name}'. Available models: "
+                             f"{', '.join(sorted(self.allowed_models))}")
+        return name
+
+    def get(self, name=None, warm_up=None):
+        """
+        Return (model, load_time) for the named model, loading it if needed.
+
+        load_time is 0 when the model was already resident. warm_up
+        overrides the registry's setting for a model loaded by this call.
+        """
+        name = self.resolve(name)
+        with self._lock:
+            stats = self._stats.setdefault(name, {
+                'loads': 0, 'hits': 0, 'evictions': 0,
+                'load_time': None, 'memory_mb': None, 'last_used': None
+            })
+            stats['last_used'] = time.time()
+            if name in self._models:
+                self._models.move_to_end(name)
+                stats['hits'] += 1
+                return self._models[name], 0
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Only one thread loads a given model; others wait and then hit
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    stats['hits'] += 1
+                    return self._models[name], 0
+
+            print(f"Loading Whisper model '{name}' ({self.engine.describe()})... This may take a moment.")
+            load_start = time.time()
+            model = self.engine.load(name)
+            if self.warm_up if warm_up is None else warm_up:
+                warm_up_model(model)
+            load_time = time.time() - load_start
+            memory = model_memory_bytes(model)
+            print(f"Model '{name}' loaded successfully! (took {load_time:.2f} seconds, "
+                  f"{memory / (1024 * 1024):.0f}MB)")
+
+            with self._lock:
+                self._models[name] = model
+                stats['loads'] += 1
+                stats['load_time'] = round(load_time, 2)
+                stats['memory_mb'] = round(memory / (1024 * 1024), 1)
+                self._evict(keep=name)
+            return model, load_time
+
+    def preload(self, names, warm_up=None):
+        """Load and warm up each of the named models, skipping failures"""
+        for name in names:
+            try:
+                self.get(name, warm_up=warm_up)
+            except Exception as e:
+                print(f"Failed to preload Whisper model '{name}': {str(e)}")
+
+    def warm_up_loaded(self):
+        """Warm up every resident model, e.g. in a process forked after preloading"""
+        with self._lock:
+            models = list(self._models.items())
+        for name, model in models:
+            try:
+                warm_up_model(model)
+            except Exception as e:
+                print(f"Failed to warm up Whisper model '{name}': {str(e)}")
+
+    def _evict(self, keep):
+        # Caller holds self._lock
+        if not self.memory_budget:
+            return
+        while self._resident_bytes() > self.memory_budget and len(self._models) > 1:
+            name = next(iter(self._models))
+            if name == keep:
+                self._models.move_to_end(name)
+                name = next(iter(self._models))
+            del self._models[name]
+            self._stats[name]['evictions'] += 1
+            print(f"Evicted Whisper model '{name}' to stay within the memory budget")
+
+    def _resident_bytes(self):
+        return sum(int(self._stats[name]['memory_mb'] * 1024 * 1024) for name in self._models)
+
+    def stats(self):
+        """Return registry configuration and per-model statistics"""
+        with self._lock:
+            models = {}
+            for name, stats in self._stats.items():
+                models[name] = dict(stats, loaded=name in self._models)
+            return {
+                'default_model': self.default_model,
+                'allowed_models': sorted(self.allowed_models),
+                'memory_budget_mb': round(self.memory_budget / (1024 * 1024), 1),
+                'resident_memory_mb': round(self._resident_bytes() / (1024 * 1024), 1),
+                'engine': self.engine.stats(),
+                'models': models
+            }
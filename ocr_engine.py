@@ -0,0 +1,150 @@
+"""
+OCR engine layer shared by every OCR request.
+
+The engine owns a long-lived pool of worker threads. With the optional
+tesserocr binding each worker keeps its own Tesseract instance, so
+language data is loaded once per worker for the life of the process
+instead of once per image. Without it, pages are OCR'd in batches with a
+single `tesseract` invocation reading a list of image files, so process
+start-up and language loading are paid once per batch rather than per page.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from capabilities import CAPABILITIES, import_environment, installed
+
+# Imported by the first worker that needs a Tesseract instance
+TESSEROCR_AVAILABLE = installed('tesserocr')
+
+ENGINE_BACKENDS = ('auto', 'tesserocr', 'cli')
+
+
+class OcrEngine:
+    """
+    A pool of Tesseract workers with configurable languages and page segmentation.
+
+    on_pages(count, seconds), if given, is called after each recognition
+    call with the number of images recognised and the time it took.
+    """
+
+    def __init__(self, lang='eng', psm=3, workers=None, backend='auto', batch_pages=8,
+                 tesseract_cmd=None, on_pages=None):
+        if backend not in ENGINE_BACKENDS:
+            raise ValueError(f"Unknown OCR backend '{backend}'. Options: {', '.join(ENGINE_BACKENDS)}")
+        if backend == 'tesserocr' and not TESSEROCR_AVAILABLE:
+            raise ValueError("OCR backend 'tesserocr' requested but tesserocr is not installed")
+        self.backend = 'tesserocr' if backend == 'tesserocr' or (backend == 'auto' and TESSEROCR_AVAILABLE) else 'cli'
+        self.lang = lang
+        self.psm = psm
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.batch_pages = max(1, batch_pages)
+        self.tesseract_cmd = tesseract_cmd or shutil.which('tesseract') or 'tesseract'
+        self.on_pages = on_pages
+        self._local = threading.local()
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._apis = []
+
+        # Workers run in parallel, so each tesseract process should stay
+        # single-threaded; in-process Tesseract gets the limit when it is
+        # imported (see _api)
+        self._env = dict(os.environ)
+        if self.workers > 1:
+            self._env.setdefault('OMP_THREAD_LIMIT', '1')
+
+    def submit(self, func, *args):
+        """Run func(*args) on one of the engine's workers, returning a future"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                    thread_name_prefix='ocr-worker')
+            return self._executor.submit(func, *args)
+
+    def _api(self):
+        # One Tesseract instance per worker thread, reused for every image it handles
+        api = getattr(self._local, 'api', None)
+        if api is None:
+            # Normally imported already by capabilities.load('ocr'), with the same environment
+            with import_environment(CAPABILITIES['ocr'].environment):
+                import tesserocr
+            api = tesserocr.PyTessBaseAPI(lang=self.lang, psm=self.psm)
+            self._local.api = api
+            self._apis.append(api)
+        return api
+
+    def image_to_string(self, image_path):
+        """OCR a single image file"""
+        return self.images_to_strings([image_path])[0]
+
+    def images_to_strings(self, image_paths):
+        """OCR several image files, returning one string per image in order"""
+        if not image_paths:
+            return []
+        start = time.perf_counter()
+        if self.backend == 'tesserocr':
+            api = self._api()
+            texts = []
+            for path in image_paths:
+                api.SetImageFile(path)
+                texts.append(api.GetUTF8Text())
+        else:
+            texts = self._run_cli(image_paths)
+        if self.on_pages:
+            self.on_pages(len(image_paths), time.perf_counter() - start)
+        return texts
+
+    def _run_cli(self, image_paths):
+        with tempfile.TemporaryDirectory(prefix='ocr-batch-') as temp_dir:
+            if len(image_paths) == 1:
+                source = image_paths[0]
+            else:
+                # Tesseract reads a text file of image paths as one multi-page job
+                source = os.path.join(temp_dir, 'images.txt')
+                with open(source, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(os.path.abspath(path) for path in image_paths) + '\n')
+            cmd = [self.tesseract_cmd, source, 'stdout', '-l', self.lang, '--psm', str(self.psm)]
+            result = subprocess.run(cmd, capture_output=True, env=self._env)
+        if result.returncode != 0:
+            raise Exception(f"Tesseract failed: {result.stderr.decode(errors='ignore').strip()}")
+
+        # Pages are separated by form feeds, with one after the last page
+        texts = result.stdout.decode('utf-8', errors='replace').split('\f')
+        texts = texts[:len(image_paths)]
+        texts += [''] * (len(image_paths) - len(texts))
+        return texts
+
+    def page_batches(self, pages):
+        """Group sorted page numbers into runs of consecutive pages of at most batch_pages"""
+        batches = []
+        for page_number in pages:
+            if (batches and page_number == batches[-1][-1] + 1
+                    and len(batches[-1]) < self.batch_pages):
+                batches[-1].append(page_number)
+            else:
+                batches.append([page_number])
+        return batches
+
+    def info(self):
+        """Engine configuration for capability reporting"""
+        return {
+            'backend': self.backend,
+            'lang': self.lang,
+            'psm': self.psm,
+            'workers': self.workers,
+            'batch_pages': self.batch_pages
+        }
+
+    def shutdown(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+        for api in self._apis:
+            api.End()
+        self._apis = []
@@ -0,0 +1,134 @@
+"""
+Page-at-a-time OCR for PDF files.
+
+Instead of rasterising a whole PDF into memory up front, short runs of
+consecutive pages are rendered to temporary PNGs, OCR'd by the shared
+OcrEngine and deleted. Runs are processed concurrently on the engine's
+workers with a bounded number in flight, and results are handed back
+strictly in page order as soon as each page and all pages before it are
+done.
+
+For mixed documents, hybrid_pdf_text() reads each page's embedded text
+layer first and only OCRs the pages where it is missing or too sparse.
+"""
+
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, wait
+
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+from pdf_text import pdf_reader_class
+
+# Pages whose text layer has fewer characters than this are treated as scanned
+MIN_TEXT_LAYER_CHARS = 50
+
+
+def pdf_page_count(filepath):
+    """Number of pages in a PDF, read with poppler's pdfinfo"""
+    return int(pdfinfo_from_path(filepath)['Pages'])
+
+
+def ocr_pdf_batch(engine, filepath, page_numbers, dpi):
+    """
+    Render a run of consecutive PDF pages with one pdftoppm call and OCR
+    them together, returning their texts in page order.
+    """
+    with tempfile.TemporaryDirectory(prefix='ocr-pages-') as temp_dir:
+        paths = convert_from_path(
+            filepath,
+            dpi=dpi,
+            first_page=page_numbers[0],
+            last_page=page_numbers[-1],
+            output_folder=temp_dir,
+            fmt='png',
+            paths_only=True
+        )
+        return engine.images_to_strings(sorted(paths))
+
+
+def ocr_pdf_pages(filepath, pages, engine, dpi=200, on_page=None):
+    """
+    OCR the given pages of a PDF in parallel on an OcrEngine.
+
+    Consecutive pages are rendered and recognised together in batches of
+    up to engine.batch_pages. on_page(page_number, text) is called in page
+    order as results become available. At most 2 * engine.workers batches
+    are rendered or buffered at once, so memory and temporary disk use stay
+    bounded however long the document is.
+    """
+    batches = engine.page_batches(pages)
+    max_ahead = engine.workers * 2
+    pending = {}
+    finished = {}
+    next_submit = 0
+    next_emit = 0
+
+    try:
+        while next_emit < len(batches):
+            while next_submit < len(batches) and next_submit < next_emit + max_ahead:
+                future = engine.submit(ocr_pdf_batch, engine, filepath, batches[next_submit], dpi)
+                pending[future] = next_submit
+                next_submit += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[pending.pop(future)] = future.result()
+
+            while next_emit in finished:
+                texts = finished.pop(next_emit)
+                for page_number, text in zip(batches[next_emit], texts):
+                    if on_page:
+                        on_page(page_number, text)
+                next_emit += 1
+    except Exception:
+        for future in pending:
+            future.cancel()
+        raise
+
+
+def hybrid_pdf_text(filepath, pages, engine, dpi=200, min_chars=MIN_TEXT_LAYER_CHARS,
+                    on_page=None):
+    """
+    Extract text from the given PDF pages, OCRing only pages without a usable text layer.
+
+    Pages whose extracted text has at least min_chars non-whitespace
+    characters use the text layer as is; the rest go through
+    ocr_pdf_pages(). on_page(page_number, text, method) is called in page
+    order with method 'text' or 'ocr'. Returns the page counts per method.
+    """
+    PdfReader = pdf_reader_class()
+    if PdfReader is None:
+        raise Exception("pypdf library not available for hybrid PDF extraction")
+
+    reader = PdfReader(filepath)
+    text_layer = {}
+    needs_ocr = []
+    for page_number in pages:
+        text = reader.pages[page_number - 1].extract_text() or ''
+        if len(''.join(text.split())) >= min_chars:
+            text_layer[page_number] = text
+        else:
+            needs_ocr.append(page_number)
+
+    text_pages = sorted(text_layer)
+    emitted = 0
+
+    def emit_text_pages(before=None):
+        nonlocal emitted
+        while emitted < len(text_pages) and (before is None or text_pages[emitted] < before):
+            page_number = text_pages[emitted]
+            if on_page:
+                on_page(page_number, text_layer.pop(page_number), 'text')
+            emitted += 1
+
+    def emit_ocr_page(page_number, text):
+        # Text-layer pages that come earlier in the document go out first
+        emit_text_pages(before=page_number)
+        if on_page:
+            on_page(page_number, text, 'ocr')
+
+    if needs_ocr:
+        ocr_pdf_pages(filepath, needs_ocr, engine, dpi=dpi, on_page=emit_ocr_page)
+    emit_text_pages()
+
+    return {'text_layer_pages': len(text_pages), 'ocr_pages': len(needs_ocr)}
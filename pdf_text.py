@@ -0,0 +1,174 @@
+"""
+Streaming PDF text extraction.
+
+Each page's text is written to the output file as soon as it is extracted
+instead of being collected and joined, so only a few pages are held in
+memory at once. Large page selections are split into runs of pages that
+are extracted concurrently by a pool of worker processes (text extraction
+is pure Python and would otherwise be limited to one core), with results
+written strictly in page order.
+"""
+
+import atexit
+import multiprocessing
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from capabilities import installed
+
+PDF_READER_AVAILABLE = installed('pypdf') or installed('PyPDF2')
+
+# Pages extracted per task handed to a worker process
+PAGES_PER_TASK = 16
+
+
+def parse_page_ranges(spec, page_count):
+    """
+    Parse a page selection such as "1-3,5,10-" into sorted 1-based page numbers.
+
+    An empty spec selects every page. Raises ValueError for malformed or
+    out-of-range selections.
+    """
+    if not spec or not spec.strip():
+        return list(range(1, page_count + 1))
+
+    pages = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = part.split('-', 1)
+                start = int(start) if start.strip() else 1
+                end = int(end) if end.strip() else page_count
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"Invalid page range '{part}'")
+        if start < 1 or end < start:
+            raise ValueError(f"Invalid page range '{part}'")
+        if start > page_count:
+            raise ValueError(f"Page {start} is out of range (document has {page_count} pages)")
+        pages.update(range(start, min(end, page_count) + 1))
+
+    if not pages:
+        raise ValueError("No pages selected")
+    return sorted(pages)
+
+
+def select_pages(spec, page_count, max_pages=None):
+    """Parse a page selection and keep at most its first max_pages pages"""
+    pages = parse_page_ranges(spec, page_count)
+    if max_pages is not None:
+        if max_pages < 1:
+            raise ValueError("max_pages must be at least 1")
+        pages = pages[:max_pages]
+    return pages
+
+
+def pdf_reader_class():
+    """pypdf's PdfReader (or PyPDF2's), imported on first use; None if neither is installed"""
+    if installed('pypdf'):
+        from pypdf import PdfReader
+    elif installed('PyPDF2'):
+        from PyPDF2 import PdfReader
+    else:
+        return None
+    return PdfReader
+
+
+# Per-process state for pool workers: the last PDF opened, reused for
+# consecutive tasks on the same document
+_worker_reader = None
+_worker_path = None
+
+
+def _extract_pages(filepath, page_numbers):
+    global _worker_reader, _worker_path
+    if _worker_path != filepath:
+        _worker_reader = pdf_reader_class()(filepath)
+        _worker_path = filepath
+    return [_worker_reader.pages[page_number - 1].extract_text() or ''
+            for page_number in page_numbers]
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """Return a process pool with the given number of workers, reusing it across calls"""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers,
+                                       mp_context=multiprocessing.get_context('spawn'))
+            _pools[workers] = pool
+        return pool
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+atexit.register(shutdown_pools)
+
+
+def write_pdf_text(filepath, output, pages, workers=1, parallel_min_pages=64, reader=None):
+    """
+    Write the text of the given pages to an open text file, one page after another.
+
+    Selections of at least parallel_min_pages pages are extracted by a pool
+    of worker processes, PAGES_PER_TASK pages per task, with at most
+    2 * workers tasks in flight. Returns the number of pages written.
+    """
+    PdfReader = pdf_reader_class()
+    if PdfReader is None:
+        raise Exception("pypdf library not available")
+
+    written = 0
+
+    def write_page(text):
+        nonlocal written
+        if written:
+            output.write('\n')
+        output.write(text)
+        written += 1
+
+    if workers <= 1 or len(pages) < parallel_min_pages:
+        reader = reader or PdfReader(filepath)
+        for page_number in pages:
+            write_page(reader.pages[page_number - 1].extract_text() or '')
+        return written
+
+    tasks = [pages[start:start + PAGES_PER_TASK] for start in range(0, len(pages), PAGES_PER_TASK)]
+    pool = get_pool(workers)
+    max_ahead = workers * 2
+    pending = {}
+    finished = {}
+    next_submit = 0
+    next_emit = 0
+
+    try:
+        while next_emit < len(tasks):
+            while next_submit < len(tasks) and next_submit < next_emit + max_ahead:
+                pending[pool.submit(_extract_pages, filepath, tasks[next_submit])] = next_submit
+                next_submit += 1
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finished[pending.pop(future)] = future.result()
+
+            while next_emit in finished:
+                for text in finished.pop(next_emit):
+                    write_page(text)
+                next_emit += 1
+    except Exception:
+        for future in pending:
+            future.cancel()
+        raise
+    return written
@@ -0,0 +1,161 @@
+"""
+Content-addressed cache of processing results.
+
+Entries are keyed on a hash of the uploaded bytes plus the parameters that
+affect the output (model, task, target language, target format, ...). Each
+entry is a directory holding a JSON payload and any result files, and the
+cache evicts least-recently-used entries once it grows past a size limit.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+from collections import OrderedDict
+
+PAYLOAD_FILE = 'payload.json'
+
+
+def cache_key(content_hash, **params):
+    """Build a cache key from an upload's content hash and its parameters"""
+    material = json.dumps({'content': content_hash, 'params': params}, sort_keys=True)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded LRU cache of results stored on disk"""
+
+    def __init__(self, directory='cache/results', max_bytes=1024 * 1024 * 1024, enabled=True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._lock = threading.Lock()
+        if enabled:
+            os.makedirs(directory, exist_ok=True)
+            self._load_index()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def _load_index(self):
+        """Rebuild the in-memory index from disk, oldest access first"""
+        found = []
+        for shard in os.listdir(self.directory):
+            shard_dir = os.path.join(self.directory, shard)
+            if shard.startswith('.tmp-'):
+                # Left behind by an interrupted write
+                shutil.rmtree(shard_dir, ignore_errors=True)
+                continue
+            if not os.path.isdir(shard_dir):
+                continue
+            for key in os.listdir(shard_dir):
+                entry_dir = os.path.join(shard_dir, key)
+                payload_path = os.path.join(entry_dir, PAYLOAD_FILE)
+                if not os.path.exists(payload_path):
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                    continue
+                size = sum(os.path.getsize(os.path.join(entry_dir, name))
+                           for name in os.listdir(entry_dir))
+                found.append((os.path.getmtime(payload_path), key, size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+
+    def get(self, key):
+        """
+        Return (payload, files) for a cached result, or None on a miss.
+
+        files maps each stored file name to its path inside the cache.
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            if key not in self._entries and not self._adopt(key):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, PAYLOAD_FILE), 'r', encoding='utf-8') as f:
+                payload = json.load(f)
+            os.utime(os.path.join(entry_dir, PAYLOAD_FILE))
+        except (OSError, ValueError):
+            with self._lock:
+                self._entries.pop(key, None)
+                self.hits -= 1
+                self.misses += 1
+            return None
+        files = {name: os.path.join(entry_dir, name)
+                 for name in os.listdir(entry_dir) if name != PAYLOAD_FILE}
+        return payload, files
+
+    def _adopt(self, key):
+        # Caller holds self._lock. Picks up an entry another process sharing
+        # the directory stored after this index was loaded.
+        entry_dir = self._entry_dir(key)
+        if not os.path.exists(os.path.join(entry_dir, PAYLOAD_FILE)):
+            return False
+        try:
+            self._entries[key] = sum(os.path.getsize(os.path.join(entry_dir, name))
+                                     for name in os.listdir(entry_dir))
+        except OSError:
+            return False
+        return True
+
+    def put(self, key, payload, files=None):
+        """Store a JSON-serialisable payload and copies of the given files"""
+        if not self.enabled:
+            return
+        entry_dir = self._entry_dir(key)
+        temp_dir = os.path.join(self.directory, f".tmp-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(temp_dir)
+            for name, path in (files or {}).items():
+                shutil.copyfile(path, os.path.join(temp_dir, name))
+            with open(os.path.join(temp_dir, PAYLOAD_FILE), 'w', encoding='utf-8') as f:
+                json.dump(payload, f)
+            size = sum(os.path.getsize(os.path.join(temp_dir, name)) for name in os.listdir(temp_dir))
+
+            os.makedirs(os.path.dirname(entry_dir), exist_ok=True)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(temp_dir, entry_dir)
+        except OSError as e:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            print(f"Failed to cache result {key}: {str(e)}")
+            return
+
+        with self._lock:
+            self._entries[key] = size
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        # Caller holds self._lock
+        total = sum(self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= size
+            self.evictions += 1
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'size_mb': round(sum(self._entries.values()) / (1024 * 1024), 2),
+                'max_size_mb': round(self.max_bytes / (1024 * 1024), 2),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
@@ -0,0 +1,186 @@
+"""
+Streaming spreadsheet conversion.
+
+Workbooks are opened in openpyxl's read-only mode, which parses rows as
+they are iterated instead of building a cell object for every cell, and
+each row is written to the output file as soon as it is read. Memory use
+therefore stays flat however large the workbook is. Workbooks with
+several sheets can have their sheets converted in parallel worker
+processes, each writing to its own part file that is then appended to the
+output in sheet order. CSV files are read and written row by row as well.
+"""
+
+import atexit
+import csv
+import io
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from openpyxl import Workbook, load_workbook
+
+CSV_SNIFF_BYTES = 64 * 1024
+
+
+def format_row(row):
+    """Tab-separated text for a row of cell values, or None for an empty row"""
+    row_text = '\t'.join(str(cell) if cell is not None else '' for cell in row)
+    return row_text if row_text.strip() else None
+
+
+def open_workbook(filepath):
+    # data_only=False keeps exporting formula cells as their formulas, as before streaming
+    return load_workbook(filepath, read_only=True, data_only=False)
+
+
+def write_sheet_text(worksheet, output):
+    """Write a worksheet's non-empty rows as tab-separated lines, returning the row count"""
+    rows = 0
+    for row in worksheet.iter_rows(values_only=True):
+        row_text = format_row(row)
+        if row_text is not None:
+            output.write(row_text + '\n')
+            rows += 1
+    return rows
+
+
+def _write_sheet_part(filepath, sheet_name, part_path):
+    wb = open_workbook(filepath)
+    try:
+        with open(part_path, 'w', encoding='utf-8') as f:
+            f.write(f"Sheet: {sheet_name}\n")
+            rows = write_sheet_text(wb[sheet_name], f)
+            f.write('\n')
+        return rows
+    finally:
+        wb.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(workers):
+    """Return a process pool with the given number of workers, reusing it across calls"""
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers,
+                                       mp_context=multiprocessing.get_context('spawn'))
+            _pools[workers] = pool
+        return pool
+
+
+def shutdown_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+
+
+atexit.register(shutdown_pools)
+
+
+def write_workbook_text(filepath, output, workers=1):
+    """
+    Write every sheet of a workbook to an open text file, returning the row count.
+
+    Each sheet starts with a "Sheet: <name>" line followed by its non-empty
+    rows as tab-separated lines and a blank line. With workers > 1 and more
+    than one sheet, sheets are converted in parallel worker processes, so
+    filepath must then be a path rather than a buffer.
+    """
+    wb = open_workbook(filepath)
+    try:
+        sheet_names = wb.sheetnames
+        if workers <= 1 or len(sheet_names) < 2:
+            rows = 0
+            for sheet_name in sheet_names:
+                output.write(f"Sheet: {sheet_name}\n")
+                rows += write_sheet_text(wb[sheet_name], output)
+                output.write('\n')
+            return rows
+    finally:
+        wb.close()
+
+    pool = get_pool(min(workers, len(sheet_names)))
+    with tempfile.TemporaryDirectory(prefix='sheets-') as temp_dir:
+        parts = [os.path.join(temp_dir, f"{index}.txt") for index in range(len(sheet_names))]
+        futures = [pool.submit(_write_sheet_part, filepath, sheet_name, part)
+                   for sheet_name, part in zip(sheet_names, parts)]
+        rows = 0
+        try:
+            for future, part in zip(futures, parts):
+                rows += future.result()
+                with open(part, 'r', encoding='utf-8') as f:
+                    shutil.copyfileobj(f, output)
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+    return rows
+
+
+def write_sheet_csv(source, output, sheet=None):
+    """Write one sheet (the first by default) of a workbook path or buffer to an open file as CSV"""
+    wb = open_workbook(source)
+    try:
+        if sheet is not None and sheet not in wb.sheetnames:
+            raise ValueError(f"Sheet '{sheet}' not found. Sheets: {', '.join(wb.sheetnames)}")
+        worksheet = wb[sheet or wb.sheetnames[0]]
+        writer = csv.writer(output)
+        rows = 0
+        for row in worksheet.iter_rows(values_only=True):
+            writer.writerow(['' if cell is None else cell for cell in row])
+            rows += 1
+        return rows
+    finally:
+        wb.close()
+
+
+def open_csv(source):
+    """
+    Open a CSV file path or binary buffer as text, returning (file, dialect)
+    with the delimiter sniffed from its start.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        f = open(source, 'r', encoding='utf-8-sig', errors='replace', newline='')
+    else:
+        f = io.TextIOWrapper(source, encoding='utf-8-sig', errors='replace', newline='')
+    sample = f.read(CSV_SNIFF_BYTES)
+    f.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t|')
+    except csv.Error:
+        dialect = csv.excel
+    return f, dialect
+
+
+def write_csv_text(source, output):
+    """Write a CSV file's non-empty rows as tab-separated lines, returning the row count"""
+    f, dialect = open_csv(source)
+    with f:
+        rows = 0
+        for row in csv.reader(f, dialect):
+            row_text = format_row(row)
+            if row_text is not None:
+                output.write(row_text + '\n')
+                rows += 1
+        return rows
+
+
+def write_csv_workbook(source, target):
+    """Convert a CSV file to a single-sheet xlsx workbook with a write-only workbook"""
+    wb = Workbook(write_only=True)
+    worksheet = wb.create_sheet('Sheet1')
+    f, dialect = open_csv(source)
+    with f:
+        rows = 0
+        for row in csv.reader(f, dialect):
+            worksheet.append(row)
+            rows += 1
+    wb.save(target)
+    return rows
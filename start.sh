@@ -11,4 +11,9 @@ echo "Starting server on http://localhost:5012"
 echo "Press Ctrl+C to stop the server"
 echo ""
 
+# Multi-process production server: bash start.sh --production
+if [ "$1" = "--production" ]; then
+    exec gunicorn --config gunicorn.conf.py app:app
+fi
+
 python app.py
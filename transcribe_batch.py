@@ -0,0 +1,244 @@
+"""
+Batch transcription of many files from the command line.
+
+Input paths may be files, directories (searched recursively for audio
+files) or glob patterns. Files are transcribed by a pool of worker
+processes that each load the Whisper model once and keep it for every
+file they are given, instead of one process and one model load per file.
+
+A JSON manifest in the output folder records the SHA-256 of each finished
+file and the outputs written for it. Files whose content hash and outputs
+match the manifest are skipped, so an interrupted run resumes where it
+stopped and an unchanged directory is not transcribed twice.
+"""
+
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from inference import InferenceEngine, transcribe
+
+AUDIO_EXTENSIONS = {
+    'mp3', 'wav', 'm4a', 'flac', 'ogg', 'opus', 'aac', 'wma', 'mp4', 'webm', '3gp', 'amr',
+    'aiff', 'au'
+}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def is_audio_file(path):
+    return os.path.splitext(path)[1].lower().lstrip('.') in AUDIO_EXTENSIONS
+
+
+def collect_inputs(paths):
+    """
+    Expand files, directories and glob patterns into a sorted list of audio
+    files without duplicates. Raises ValueError if nothing matches.
+    """
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = [name for name in dirs if not name.startswith('.')]
+                found.extend(os.path.join(root, name) for name in files
+                             if is_audio_file(name) and not name.startswith('.'))
+        elif os.path.isfile(path):
+            found.append(path)
+        elif glob.has_magic(path):
+            found.extend(match for match in glob.glob(path, recursive=True)
+                         if os.path.isfile(match) and is_audio_file(match))
+        else:
+            raise ValueError(f"File not found: {path}")
+
+    inputs = sorted({os.path.abspath(path) for path in found})
+    if not inputs:
+        raise ValueError("No audio files found")
+    return inputs
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(HASH_CHUNK_SIZE)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def output_bases(inputs, output_dir, known=None):
+    """
+    Map each input to the base path of its outputs, "<stem>_transcription",
+    adding _2, _3... when stems repeat.
+
+    known maps inputs to the base paths used by an earlier run; those are
+    kept so a later run over different files never reuses their names.
+    """
+    known = known or {}
+    bases = {}
+    seen = {os.path.basename(base)[:-len('_transcription')].lower() for base in known.values()}
+    for path in inputs:
+        if path in known:
+            bases[path] = known[path]
+            continue
+        stem = os.path.splitext(os.path.basename(path))[0]
+        candidate = stem
+        counter = 2
+        while candidate.lower() in seen:
+            candidate = f"{stem}_{counter}"
+            counter += 1
+        seen.add(candidate.lower())
+        bases[path] = os.path.join(output_dir, f"{candidate}_transcription")
+    return bases
+
+
+class TranscriptionManifest:
+    """
+    Finished files by path, with their content hash and outputs.
+
+    Saved after every file (written to a temporary file and renamed) so a
+    run that is killed part way loses at most the file in progress.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f).get('files', {})
+            except (OSError, ValueError) as e:
+                print(f"Ignoring unreadable manifest {path}: {str(e)}")
+
+    def is_done(self, path, sha256, formats, model_name, precision='fp32'):
+        entry = self.entries.get(path)
+        return bool(
+            entry
+            and entry['sha256'] == sha256
+            and entry['model'] == model_name
+            # Entries from before precisions were recorded are fp32
+            and entry.get('precision', 'fp32') == precision
+            and set(formats) <= set(entry['outputs'])
+            and all(os.path.exists(output) for output in entry['outputs'].values())
+        )
+
+    def base_paths(self):
+        return {path: entry['base_path'] for path, entry in self.entries.items()}
+
+    def record(self, path, entry):
+        self.entries[path] = entry
+        self.save()
+
+    def save(self):
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.entries}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+
+# Per-process state for pool workers
+_worker_model = None
+
+
+def _init_worker(model_name, engine):
+    global _worker_model
+    # Imported first so the thread counts are applied to torch itself
+    import torch  # noqa: F401
+    engine.configure_threads()
+    _worker_model = engine.load(model_name)
+
+
+def _transcribe_path(path, base_path, formats):
+    from audio_decode import audio_duration, decode_audio
+    from transcript_output import save_transcripts
+
+    audio = decode_audio(path)
+    duration = audio_duration(audio)
+    start = time.time()
+    result = transcribe(_worker_model, audio, language=None, task='transcribe')
+    transcription_time = time.time() - start
+    _, paths = save_transcripts(result, base_path, formats, round(duration, 2))
+    return {
+        'duration': round(duration, 2),
+        'transcription_time': round(transcription_time, 2),
+        'language': result.get('language'),
+        'outputs': dict(zip(formats, paths))
+    }
+
+
+def transcribe_batch(inputs, model_name, formats=('txt',), workers=2, output_dir='transcriptions',
+                     manifest_path=None, force=False, progress=print, engine=None):
+    """
+    Transcribe every input file with `workers` model-holding processes.
+
+    Files already recorded in the manifest with the same content hash,
+    model, precision and outputs are skipped unless force is set. Returns
+    a summary with file counts, total audio and wall-clock time and
+    throughput in hours of audio per hour. Workers load the model with
+    engine's precision, splitting its threads (or all CPUs) between them.
+    """
+    engine = engine or InferenceEngine()
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = TranscriptionManifest(manifest_path or os.path.join(output_dir, 'manifest.json'))
+    bases = output_bases(inputs, output_dir, manifest.base_paths())
+    formats = list(formats)
+
+    wall_start = time.time()
+    pending = []
+    skipped = 0
+    for path in inputs:
+        sha256 = file_sha256(path)
+        if not force and manifest.is_done(path, sha256, formats, model_name, engine.precision):
+            skipped += 1
+            continue
+        pending.append((path, sha256))
+    progress(f"{len(inputs)} files: {skipped} already done, {len(pending)} to transcribe")
+
+    summary = {
+        'files': len(inputs),
+        'skipped': skipped,
+        'transcribed': 0,
+        'failed': 0,
+        'audio_seconds': 0.0,
+        'wall_seconds': 0.0,
+        'audio_hours_per_hour': None
+    }
+    if pending:
+        workers = max(1, min(workers, len(pending)))
+        worker_engine = engine.for_workers(workers)
+        # spawn keeps workers independent of the parent's torch thread state
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(model_name, worker_engine)) as pool:
+            futures = {pool.submit(_transcribe_path, path, bases[path], formats): (path, sha256)
+                       for path, sha256 in pending}
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    path, sha256 = futures[future]
+                    try:
+                        entry = future.result()
+                    except Exception as e:
+                        summary['failed'] += 1
+                        progress(f"[{done}/{len(pending)}] FAILED {path}: {str(e)}")
+                        continue
+                    entry.update(sha256=sha256, model=model_name, precision=engine.precision,
+                                 base_path=bases[path], finished_at=time.time())
+                    manifest.record(path, entry)
+                    summary['transcribed'] += 1
+                    summary['audio_seconds'] += entry['duration']
+                    progress(f"[{done}/{len(pending)}] {os.path.basename(path)}: "
+                             f"{entry['duration']:.0f}s of audio in {entry['transcription_time']:.0f}s")
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    summary['wall_seconds'] = round(time.time() - wall_start, 2)
+    summary['audio_seconds'] = round(summary['audio_seconds'], 2)
+    if summary['wall_seconds'] > 0 and summary['transcribed']:
+        summary['audio_hours_per_hour'] = round(summary['audio_seconds'] / summary['wall_seconds'], 2)
+    return summary
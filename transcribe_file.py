@@ -1,83 +1,46 @@
 #!/usr/bin/env python3
 """
-Quick script to transcribe an audio file directly without the web interface.
-Usage: python transcribe_file.py "path/to/audio/file.m4a"
+Quick script to transcribe audio files directly without the web interface.
+Usage: python transcribe_file.py "path/to/audio/file.m4a" [--model small] [--long-audio] [--format txt,srt]
+       python transcribe_file.py "path/to/folder" "more/*.mp3" [--workers 4] [--force]
+       python transcribe_file.py "path/to/audio/file.m4a" [--precision int8] [--threads 4]
 """
 
+import argparse
 import sys
 import os
 import time
-import re
-import whisper
 from pathlib import Path
 
-def format_transcription_with_sentences(text):
-    """
-    Format transcription text with sentences on separate lines.
-    Splits on sentence endings (. ! ?) followed by space and capital letter.
+from inference import PRECISIONS, InferenceEngine, transcribe
+from model_registry import ModelRegistry
+from audio_decode import audio_duration, decode_audio, real_time_factor
+from long_audio import transcribe_long_audio
+from transcript_output import OUTPUT_FORMATS, parse_formats, save_transcripts
+from transcribe_batch import collect_inputs, transcribe_batch
+
+DEFAULT_MODEL = os.environ.get('WHISPER_MODEL', 'base')
+DEFAULT_PRECISION = os.environ.get('WHISPER_PRECISION', 'fp32')
+
+inference_engine = InferenceEngine(
+    device=os.environ.get('WHISPER_DEVICE', 'auto'),
+    precision=DEFAULT_PRECISION,
+    threads=int(os.environ.get('TORCH_THREADS', '0')),
+    interop_threads=int(os.environ.get('TORCH_INTEROP_THREADS', '0'))
+)
+
+# A one-off run transcribes a single file, so skip the warm-up inference
+model_registry = ModelRegistry(default_model=DEFAULT_MODEL, warm_up=False, engine=inference_engine)
+
+def transcribe_file(file_path, model_name=None, long_audio=False, chunk_seconds=300, workers=2,
+                    formats=('txt',)):
     """
-    if not text:
-        return text
-    
-    # Normalize whitespace
-    text = re.sub(r'\s+', ' ', text.strip())
-    
-    # Split on sentence endings: . ! ? followed by space and capital letter
-    # This pattern captures: sentence ending + space + capital letter
-    pattern = r'([.!?])\s+([A-Z])'
-    
-    # Split and keep delimiters
-    parts = re.split(pattern, text)
-    
-    if len(parts) == 1:
-        # No sentence endings found, return as is
-        return text
-    
-    # Reconstruct sentences
-    formatted_lines = []
-    i = 0
-    
-    while i < len(parts):
-        if i == 0:
-            # First sentence (before any split)
-            if parts[i].strip():
-                formatted_lines.append(parts[i].strip())
-        elif i + 1 < len(parts):
-            # We have: punctuation, space, next sentence start
-            punctuation = parts[i]  # . ! or ?
-            next_sentence_start = parts[i + 1]  # Capital letter + rest
-            
-            # Complete previous sentence with punctuation
-            if formatted_lines:
-                formatted_lines[-1] += punctuation
-            else:
-                formatted_lines.append(punctuation)
-            
-            # Start new sentence
-            if next_sentence_start.strip():
-                formatted_lines.append(next_sentence_start.strip())
-            
-            i += 1  # Skip next part as we processed it
-        else:
-            # Remaining text
-            if parts[i].strip():
-                if formatted_lines:
-                    formatted_lines[-1] += " " + parts[i].strip()
-                else:
-                    formatted_lines.append(parts[i].strip())
-        
-        i += 1
-    
-    # Join with newlines
-    result = '\n'.join(line.strip() for line in formatted_lines if line.strip())
-    
-    # Clean up excessive newlines
-    result = re.sub(r'\n{3,}', '\n\n', result)
+    Transcribe an audio file using Whisper.
     
-    return result
-
-def transcribe_file(file_path):
-    """Transcribe an audio file using Whisper"""
+    With long_audio, the file is split on silences into chunks of about
+    chunk_seconds that are transcribed in parallel by `workers` processes.
+    The transcript is saved in each of formats (txt, srt, vtt, json).
+    """
     
     # Check if file exists
     if not os.path.exists(file_path):
@@ -89,45 +52,67 @@ def transcribe_file(file_path):
     print(f"Size: {file_size:.2f} MB")
     print()
     
-    # Load model
-    print("Loading Whisper model (base)...")
-    print("   This may take 10-30 seconds on first run...")
-    load_start = time.time()
-    model = whisper.load_model("base")
-    load_time = time.time() - load_start
-    print(f"Model loaded in {load_time:.2f} seconds")
-    print()
+    model_name = model_registry.resolve(model_name)
     
-    # Transcribe
-    print("Starting transcription...")
-    print("   This may take several minutes for long audio files...")
-    print("   (Processing time is roughly 0.2-0.5x the audio duration)")
+    # Decode once into memory; both paths transcribe the same samples
+    print("Decoding audio...")
+    audio = decode_audio(file_path)
+    duration = audio_duration(audio)
+    print(f"Duration: {duration:.1f} seconds ({duration/60:.1f} minutes)")
     print()
     
-    transcription_start = time.time()
-    result = model.transcribe(
-        file_path,
-        language=None,  # Auto-detect language
-        task="transcribe"
-    )
-    transcription_time = time.time() - transcription_start
+    if long_audio:
+        print(f"Starting chunked transcription with {workers} workers ({model_name} model)...")
+        print("   Each worker loads its own copy of the model first")
+        print()
+        
+        transcription_start = time.time()
+        result = transcribe_long_audio(
+            audio,
+            model_name,
+            chunk_seconds=chunk_seconds,
+            workers=workers,
+            progress=lambda done, total: print(f"   Chunk {done}/{total} done"),
+            engine=inference_engine
+        )
+        transcription_time = time.time() - transcription_start
+    else:
+        # Load model
+        print(f"Loading Whisper model ({model_name}, {inference_engine.describe()})...")
+        print("   This may take 10-30 seconds on first run...")
+        # Imported first so the thread counts are applied to torch itself
+        import torch  # noqa: F401
+        inference_engine.configure_threads()
+        model, load_time = model_registry.get(model_name)
+        if load_time:
+            print(f"Model loaded in {load_time:.2f} seconds")
+        print()
+        
+        # Transcribe
+        print("Starting transcription...")
+        print("   This may take several minutes for long audio files...")
+        print("   (Processing time is roughly 0.2-0.5x the audio duration)")
+        print()
+        
+        transcription_start = time.time()
+        result = transcribe(
+            model,
+            audio,
+            language=None,  # Auto-detect language
+            task="transcribe"
+        )
+        transcription_time = time.time() - transcription_start
     
-    # Get transcription text
-    transcription_text = result["text"]
     detected_language = result.get('language', 'unknown')
     
-    # Format transcription with sentences on separate lines
-    formatted_text = format_transcription_with_sentences(transcription_text)
-    
-    # Save transcription
+    # Save transcription in each requested format, built from the segments
     output_dir = Path("transcriptions")
     output_dir.mkdir(exist_ok=True)
     
     input_filename = Path(file_path).stem
-    output_file = output_dir / f"{input_filename}_transcription.txt"
-    
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(formatted_text)
+    formatted_text, output_files = save_transcripts(
+        result, output_dir / f"{input_filename}_transcription", formats, round(duration, 2)
+    )
     
     # Print results
     print()
@@ -135,8 +120,11 @@ def transcribe_file(file_path):
     print("TRANSCRIPTION COMPLETE!")
     print("=" * 60)
     print(f"Total time: {transcription_time:.2f} seconds ({transcription_time/60:.2f} minutes)")
+    print(f"Real-time factor: {real_time_factor(transcription_time, duration)} "
+          f"(processing seconds per second of audio)")
     print(f"Detected language: {detected_language}")
-    print(f"Saved to: {output_file}")
+    print(f"Model: {model_name} ({inference_engine.precision})")
+    print(f"Saved to: {', '.join(str(output_file) for output_file in output_files)}")
     print()
     print("Transcription preview (first 500 characters):")
     print("-" * 60)
@@ -144,20 +132,85 @@ def transcribe_file(file_path):
     print(preview)
     print("-" * 60)
     print()
-    print(f"Full transcription saved to: {output_file}")
+    print(f"Full transcription saved to: {output_files[0]}")
     
     return True
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python transcribe_file.py <path_to_audio_file>")
-        print()
-        print("Example:")
-        print('  python transcribe_file.py "C:\\Users\\romeo.fredson\\Downloads\\2 Farmer using DAF Ghana.m4a"')
-        sys.exit(1)
+def transcribe_many(paths, model_name=None, workers=2, formats=('txt',), manifest_path=None, force=False):
+    """
+    Transcribe every audio file under the given files, folders and globs
+    with `workers` processes, skipping files finished in an earlier run.
+    """
+    inputs = collect_inputs(paths)
+    model_name = model_registry.resolve(model_name)
+    print(f"Transcribing {len(inputs)} files with {workers} workers ({model_name} model)...")
+    print("   Each worker loads the model once and keeps it for all its files")
+    print()
+    
+    summary = transcribe_batch(inputs, model_name, formats, workers,
+                               manifest_path=manifest_path, force=force, engine=inference_engine)
     
-    file_path = sys.argv[1]
-    success = transcribe_file(file_path)
+    print()
+    print("=" * 60)
+    print("BATCH COMPLETE!")
+    print("=" * 60)
+    print(f"Files: {summary['files']} ({summary['transcribed']} transcribed, "
+          f"{summary['skipped']} skipped, {summary['failed']} failed)")
+    print(f"Audio transcribed: {summary['audio_seconds'] / 3600:.2f} hours")
+    print(f"Wall-clock time: {summary['wall_seconds'] / 60:.2f} minutes")
+    if summary['audio_hours_per_hour'] is not None:
+        print(f"Throughput: {summary['audio_hours_per_hour']} hours of audio per hour")
+    
+    return summary['failed'] == 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Transcribe audio files using Whisper.",
+        epilog='Example: python transcribe_file.py "C:\\Users\\romeo.fredson\\Downloads\\2 Farmer using DAF Ghana.m4a"'
+    )
+    parser.add_argument("paths", nargs="+",
+                        help="audio file, or several files, folders or glob patterns for batch mode")
+    parser.add_argument("--model", default=DEFAULT_MODEL,
+                        help=f"Whisper model to use: tiny, base, small, medium or large (default: {DEFAULT_MODEL})")
+    parser.add_argument("--long-audio", action="store_true",
+                        help="split the file on silences and transcribe chunks in parallel")
+    parser.add_argument("--chunk-seconds", type=int, default=None,
+                        help="target chunk length for --long-audio (default: 300)")
+    parser.add_argument("--workers", type=int, default=2,
+                        help="worker processes for --long-audio or batch mode (default: 2)")
+    parser.add_argument("--format", default="txt",
+                        help=f"comma-separated output formats: {', '.join(OUTPUT_FORMATS)} (default: txt)")
+    parser.add_argument("--manifest", default=None,
+                        help="batch mode manifest of finished files (default: transcriptions/manifest.json)")
+    parser.add_argument("--force", action="store_true",
+                        help="batch mode: transcribe files again even if the manifest lists them as done")
+    parser.add_argument("--precision", default=DEFAULT_PRECISION,
+                        help=f"model precision: {', '.join(PRECISIONS)}; int8 is faster on CPU "
+                             f"(default: {DEFAULT_PRECISION})")
+    parser.add_argument("--threads", type=int, default=inference_engine.threads,
+                        help="torch threads, split between the workers in --long-audio and batch mode "
+                             "(default: torch's default, or all CPUs split between the workers)")
+    parser.add_argument("--interop-threads", type=int, default=inference_engine.interop_threads,
+                        help="torch inter-op threads per process (default: torch's choice)")
+    args = parser.parse_args()
+    batch_mode = len(args.paths) > 1 or not os.path.isfile(args.paths[0])
+    if batch_mode and (args.long_audio or args.chunk_seconds is not None):
+        parser.error("--long-audio and --chunk-seconds only apply to a single file")
+    
+    try:
+        model_registry.engine = inference_engine = InferenceEngine(
+            inference_engine.device, args.precision, args.threads, args.interop_threads
+        )
+        formats = parse_formats(args.format)
+        if batch_mode:
+            success = transcribe_many(args.paths, args.model, args.workers, formats,
+                                      args.manifest, args.force)
+        else:
+            success = transcribe_file(args.paths[0], args.model, args.long_audio,
+                                      args.chunk_seconds or 300, args.workers, formats)
+    except ValueError as e:
+        print(f"ERROR: {str(e)}")
+        success = False
     
     if not success:
         sys.exit(1)
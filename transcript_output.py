@@ -0,0 +1,186 @@
+"""
+Transcript output built from Whisper segments.
+
+Sentence-per-line text, SRT, WebVTT and JSON with timestamps are all
+produced from result["segments"] in a single pass over the segments and
+written line by line, instead of joining the transcript into one string
+and re-splitting it with regular expressions.
+"""
+
+import json
+import re
+
+OUTPUT_FORMATS = ('txt', 'srt', 'vtt', 'json')
+
+# A sentence ends at . ! or ? followed by a space and a capital letter
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?]) (?=[A-Z])')
+
+
+def compact_segments(segments):
+    """Keep only the fields the output formats need"""
+    return [{'start': segment['start'], 'end': segment['end'], 'text': segment['text'].strip()}
+            for segment in segments]
+
+
+def text_segments(text, duration=0):
+    """A single untimed segment for results that only have text"""
+    return [{'start': 0, 'end': duration or 0, 'text': text or ''}]
+
+
+def iter_sentences(segments):
+    """
+    Yield (sentence, start, end) for the sentences spoken across segments.
+
+    Whitespace is normalised within each segment, and a sentence ending
+    at a segment boundary is detected from the last character of the
+    previous segment and the first character of the next. Times come from
+    the segments a sentence starts and ends in.
+    """
+    parts = []
+    start = end = None
+    for segment in segments:
+        text = ' '.join(segment['text'].split())
+        if not text:
+            continue
+        if parts and parts[-1][-1] in '.!?' and 'A' <= text[0] <= 'Z':
+            yield ' '.join(parts), start, end
+            parts = []
+
+        pieces = _SENTENCE_BOUNDARY.split(text)
+        for piece in pieces[:-1]:
+            if not parts:
+                start = segment['start']
+            parts.append(piece)
+            yield ' '.join(parts), start, segment['end']
+            parts = []
+
+        if not parts:
+            start = segment['start']
+        parts.append(pieces[-1])
+        end = segment['end']
+
+    if parts:
+        yield ' '.join(parts), start, end
+
+
+def format_transcription_with_sentences(text):
+    """
+    Format transcription text with sentences on separate lines.
+    Splits on sentence endings (. ! ?) followed by space and capital letter.
+    """
+    if not text:
+        return text
+    return '\n'.join(sentence for sentence, _, _ in iter_sentences(text_segments(text)))
+
+
+def sentence_text(segments):
+    """Sentence-per-line transcript text built from segments"""
+    return '\n'.join(sentence for sentence, _, _ in iter_sentences(segments))
+
+
+def format_timestamp(seconds, decimal_marker=','):
+    """HH:MM:SS,mmm (SRT) or HH:MM:SS.mmm (WebVTT)"""
+    milliseconds = int(round(seconds * 1000))
+    hours, milliseconds = divmod(milliseconds, 3600000)
+    minutes, milliseconds = divmod(milliseconds, 60000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{decimal_marker}{milliseconds:03d}"
+
+
+def write_txt(segments, output, **info):
+    for index, (sentence, _, _) in enumerate(iter_sentences(segments)):
+        if index:
+            output.write('\n')
+        output.write(sentence)
+
+
+def write_srt(segments, output, **info):
+    index = 0
+    for segment in segments:
+        text = segment['text'].strip()
+        if not text:
+            continue
+        index += 1
+        output.write(f"{index}\n{format_timestamp(segment['start'])} --> "
+                     f"{format_timestamp(segment['end'])}\n{text}\n\n")
+
+
+def write_vtt(segments, output, **info):
+    output.write("WEBVTT\n\n")
+    for segment in segments:
+        text = segment['text'].strip()
+        if not text:
+            continue
+        output.write(f"{format_timestamp(segment['start'], '.')} --> "
+                     f"{format_timestamp(segment['end'], '.')}\n{text}\n\n")
+
+
+def write_json(segments, output, language=None, duration=None, **info):
+    # Written segment by segment so the document is never built in memory
+    output.write('{\n')
+    output.write(f'  "language": {json.dumps(language)},\n')
+    output.write(f'  "duration": {json.dumps(duration)},\n')
+    output.write('  "segments": [')
+    for index, segment in enumerate(segments):
+        output.write(',\n    ' if index else '\n    ')
+        output.write(json.dumps({'id': index, 'start': segment['start'], 'end': segment['end'],
+                                 'text': segment['text'].strip()}, ensure_ascii=False))
+    output.write('\n  ],\n  "sentences": [')
+    for index, (sentence, start, end) in enumerate(iter_sentences(segments)):
+        output.write(',\n    ' if index else '\n    ')
+        output.write(json.dumps({'start': start, 'end': end, 'text': sentence}, ensure_ascii=False))
+    output.write('\n  ]\n}\n')
+
+
+WRITERS = {
+    'txt': write_txt,
+    'srt': write_srt,
+    'vtt': write_vtt,
+    'json': write_json
+}
+
+
+def parse_formats(value, default=('txt',)):
+    """Parse a comma-separated format list such as "txt,srt", raising ValueError for unknown formats"""
+    if not value or not value.strip():
+        return list(default)
+    formats = []
+    for name in value.lower().split(','):
+        name = name.strip()
+        if not name:
+            continue
+        if name not in WRITERS:
+            raise ValueError(f"Unknown output format '{name}'. Options: {', '.join(OUTPUT_FORMATS)}")
+        if name not in formats:
+            formats.append(name)
+    return formats or list(default)
+
+
+def write_transcript(segments, fmt, path, language=None, duration=None):
+    """Write segments to path in one output format"""
+    with open(path, 'w', encoding='utf-8') as f:
+        WRITERS[fmt](segments, f, language=language, duration=duration)
+
+
+def save_transcripts(result, base_path, formats, duration=None):
+    """
+    Write a Whisper result to "<base_path>.<format>" for each format.
+
+    Returns the sentence-per-line text and the paths written.
+    """
+    language = result.get('language')
+    if result.get('segments'):
+        segments = compact_segments(result['segments'])
+    else:
+        segments = text_segments(result.get('text', ''), duration)
+    text = sentence_text(segments)
+    paths = []
+    for fmt in formats:
+        path = f"{base_path}.{fmt}"
+        if fmt == 'txt':
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+        else:
+            write_transcript(segments, fmt, path, language=language, duration=duration)
+        paths.append(path)
+    return text, paths
@@ -0,0 +1,241 @@
+"""
+Chunked, concurrent translation with a persistent translation memory.
+
+Text is translated line by line, using the sentence-per-line layout that
+format_transcription_with_sentences() produces. Lines already in the
+translation memory (a local SQLite database keyed on backend, target
+language and source text) are reused; the rest are packed into chunks
+under the backend's per-request character limit and translated
+concurrently on a bounded pool of threads.
+
+A backend is any object with a translate(text, target_language) method.
+GoogleBackend wraps deep-translator; load_backend() also accepts a
+"module:attribute" path so a local stand-in translator can be plugged in.
+"""
+
+import importlib
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from capabilities import installed
+
+# Imported on first translation
+GOOGLE_TRANSLATOR_AVAILABLE = installed('deep_translator')
+
+# Google rejects requests over 5000 characters
+MAX_CHUNK_CHARS = 4500
+
+LANGUAGE_CODES = {
+    'en': 'en',
+    'english': 'en',
+    'fr': 'fr',
+    'french': 'fr',
+    'es': 'es',
+    'spanish': 'es',
+    'de': 'de',
+    'german': 'de',
+    'nl': 'nl',
+    'dutch': 'nl'
+}
+
+
+class GoogleBackend:
+    """Google Translate through deep-translator (free, no API key needed)"""
+
+    name = 'google'
+
+    def translate(self, text, target_language):
+        from deep_translator import GoogleTranslator
+        return GoogleTranslator(source='auto', target=target_language).translate(text)
+
+
+def load_backend(spec):
+    """
+    Return a backend for a spec: 'google', or 'module:attribute' naming a
+    backend class or instance.
+    """
+    if spec == 'google':
+        if not GOOGLE_TRANSLATOR_AVAILABLE:
+            raise Exception("deep-translator library not available")
+        return GoogleBackend()
+    if ':' not in spec:
+        raise ValueError(f"Unknown translation backend '{spec}'")
+    module_name, attribute = spec.split(':', 1)
+    backend = getattr(importlib.import_module(module_name), attribute)
+    if isinstance(backend, type):
+        backend = backend()
+    if not getattr(backend, 'name', None):
+        backend.name = spec
+    return backend
+
+
+def split_long_line(line, max_chars):
+    """Split a line longer than max_chars on word boundaries"""
+    parts = []
+    current = ''
+    for word in line.split(' '):
+        while len(word) > max_chars:
+            if current:
+                parts.append(current)
+                current = ''
+            parts.append(word[:max_chars])
+            word = word[max_chars:]
+        candidate = f"{current} {word}" if current else word
+        if len(candidate) > max_chars:
+            parts.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def chunk_lines(lines, max_chars=MAX_CHUNK_CHARS):
+    """Pack lines into newline-joined chunks of at most max_chars characters"""
+    chunks = []
+    current = []
+    size = 0
+    for line in lines:
+        added = len(line) + (1 if current else 0)
+        if current and size + added > max_chars:
+            chunks.append(current)
+            current = []
+            size = 0
+            added = len(line)
+        current.append(line)
+        size += added
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class TranslationMemory:
+    """SQLite store of translated lines, shared by all threads"""
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._pid = None
+        self._connection = None
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS translations ('
+            'backend TEXT NOT NULL, target TEXT NOT NULL, source TEXT NOT NULL, '
+            'translation TEXT NOT NULL, PRIMARY KEY (backend, target, source))'
+        )
+        self._db.commit()
+
+    @property
+    def _db(self):
+        # A connection must not be used across fork, so each process opens its own
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._pid = os.getpid()
+        return self._connection
+
+    def get_many(self, backend, target, sources):
+        """Return {source: translation} for the sources already translated"""
+        found = {}
+        sources = list(sources)
+        with self._lock:
+            # Stay under SQLite's limit on bound parameters
+            for start in range(0, len(sources), 500):
+                batch = sources[start:start + 500]
+                rows = self._db.execute(
+                    'SELECT source, translation FROM translations WHERE backend = ? AND target = ? '
+                    f'AND source IN ({",".join("?" * len(batch))})',
+                    [backend, target] + batch
+                )
+                found.update(rows)
+            self.hits += len(found)
+            self.misses += len(sources) - len(found)
+        return found
+
+    def put_many(self, backend, target, pairs):
+        """Store (source, translation) pairs"""
+        with self._lock:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO translations (backend, target, source, translation) '
+                'VALUES (?, ?, ?, ?)',
+                [(backend, target, source, translation) for source, translation in pairs]
+            )
+            self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            entries = self._db.execute('SELECT COUNT(*) FROM translations').fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                'entries': entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None
+            }
+
+
+class Translator:
+    """Translates text through a backend, a translation memory and a thread pool"""
+
+    def __init__(self, backend, memory=None, workers=4, max_chunk_chars=MAX_CHUNK_CHARS):
+        self.backend = backend
+        self.memory = memory
+        self.workers = max(1, workers)
+        self.max_chunk_chars = max_chunk_chars
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='translate')
+
+    def translate(self, text, target_language):
+        """Translate text line by line, keeping its line breaks"""
+        if not text or not text.strip():
+            return text
+
+        lines = text.split('\n')
+        sources = []
+        for line in lines:
+            if line.strip() and len(line) > self.max_chunk_chars:
+                sources.extend(split_long_line(line.strip(), self.max_chunk_chars))
+            elif line.strip():
+                sources.append(line.strip())
+        unique_sources = list(dict.fromkeys(sources))
+
+        backend_name = getattr(self.backend, 'name', type(self.backend).__name__)
+        translations = {}
+        if self.memory is not None:
+            translations = self.memory.get_many(backend_name, target_language, unique_sources)
+        missing = [source for source in unique_sources if source not in translations]
+
+        if missing:
+            chunks = chunk_lines(missing, self.max_chunk_chars)
+            results = self._executor.map(
+                lambda chunk: self.backend.translate('\n'.join(chunk), target_language), chunks)
+            learned = []
+            for chunk, translated in zip(chunks, results):
+                translated_lines = (translated or '').split('\n')
+                if len(translated_lines) == len(chunk):
+                    learned.extend(zip(chunk, translated_lines))
+                else:
+                    # The backend merged or split lines; retry them one by one
+                    retried = self._executor.map(
+                        lambda source: self.backend.translate(source, target_language) or '', chunk)
+                    learned.extend(zip(chunk, retried))
+            translations.update(learned)
+            if self.memory is not None:
+                self.memory.put_many(backend_name, target_language, learned)
+
+        output = []
+        for line in lines:
+            if not line.strip():
+                output.append(line)
+            elif len(line) > self.max_chunk_chars:
+                output.append(' '.join(translations[part]
+                                       for part in split_long_line(line.strip(), self.max_chunk_chars)))
+            else:
+                output.append(translations[line.strip()])
+        return '\n'.join(output)